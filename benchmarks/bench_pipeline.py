@@ -0,0 +1,225 @@
+"""
+Benchmark the end-to-end pipeline against a synthetic lockfile & an in-process fake index.
+
+Each stage is timed separately: parsing the lockfile, filtering its wheels for the target
+platforms, querying the Simple API for the locked packages, and downloading the compatible wheels
+of their latest releases. Network conditions are simulated by the fake index's tunable latency,
+bandwidth & error rate, so results are repeatable without network access.
+
+Results are written as JSON, including the wall time, throughput & peak traced memory of each
+stage; a previous result may be provided to compare against.
+
+Usage: python -m benchmarks.bench_pipeline [--packages N] [--output out.json] [--compare base.json]
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+import typing as t
+from collections import abc
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+import httpx
+from packaging.requirements import Requirement
+
+from benchmarks.fake_index import FakeIndex, FakeIndexTransport
+from benchmarks.synthetic import write_synthetic_lockfile
+from wheely_bucket.dl_manager import DownloadOptions, download_packages, filter_packages
+from wheely_bucket.package_query import stream_filtered_queries
+from wheely_bucket.parse_lockfile import PackageSpec, parse_project, supported_tags
+from wheely_bucket.retry import RetryPolicy
+from wheely_bucket.throttle import SchedulePolicy
+
+PYTHON_VERSIONS = ((3, 12), (3, 13))
+PLATFORMS = ("manylinux_2_17_x86_64", "manylinux2014_x86_64")
+
+# Injected errors are answered with `Retry-After: 0`, so retries don't add backoff delays
+BENCH_RETRY = RetryPolicy(max_attempts=10, base_delay=0)
+
+
+@dataclass(slots=True)
+class StageResult:
+    """Wall time, throughput & peak traced memory of a single pipeline stage."""
+
+    items: int
+    wall_time: float
+    peak_memory: int
+    n_bytes: int = 0
+
+    @property
+    def throughput(self) -> float:
+        """Items processed per second."""
+        return self.items / self.wall_time if self.wall_time > 0 else 0
+
+    def to_dict(self) -> dict[str, float]:  # noqa: D102
+        result = asdict(self)
+        result["throughput"] = self.throughput
+        if self.n_bytes:
+            result["bytes_per_second"] = self.n_bytes / self.wall_time if self.wall_time > 0 else 0
+
+        return result
+
+
+R = t.TypeVar("R")
+
+
+def _measure(stage: abc.Callable[[], R], count: abc.Callable[[R], int]) -> tuple[R, StageResult]:
+    """Run the stage, measuring its wall time & peak traced memory."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        result = stage()
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return result, StageResult(items=count(result), wall_time=elapsed, peak_memory=peak)
+
+
+async def _query_all(
+    transport: FakeIndexTransport, project_names: abc.Iterable[str]
+) -> list[PackageSpec]:
+    async with httpx.AsyncClient(transport=transport) as client:
+        return [
+            p
+            async for p in stream_filtered_queries(
+                client=client,
+                reqs=(Requirement(name) for name in project_names),
+                python_versions=PYTHON_VERSIONS,
+                platforms=PLATFORMS,
+                retry=BENCH_RETRY,
+            )
+        ]
+
+
+async def _download_all(
+    transport: FakeIndexTransport,
+    specs: abc.Iterable[PackageSpec],
+    dest: Path,
+    concurrency: int,
+    schedule: SchedulePolicy,
+) -> int:
+    options = DownloadOptions(retry=BENCH_RETRY, concurrency=concurrency, schedule=schedule)
+    async with httpx.AsyncClient(transport=transport) as client:
+        summary = await download_packages(specs, dest=dest, client=client, options=options)
+
+    return summary.downloaded
+
+
+def run(args: argparse.Namespace) -> dict[str, t.Any]:
+    """Run each pipeline stage in turn, returning the configuration & per-stage results."""
+    index = FakeIndex.synthetic(
+        args.packages, history=args.history, median_size=args.wheel_size * 1024, seed=args.seed
+    )
+    transport = FakeIndexTransport(
+        index,
+        latency=args.latency / 1000,
+        bandwidth=None if args.bandwidth is None else args.bandwidth * 1024,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+
+    # Build the fake index's responses up front so serving them isn't included in the stages
+    for project in index.projects:
+        index.project_page(project)
+
+    stages: dict[str, StageResult] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_dir = Path(tmp)
+        write_synthetic_lockfile(tmp_dir / "uv.lock", args.packages, seed=args.seed)
+
+        specs, stages["parse"] = _measure(lambda: parse_project(tmp_dir), len)
+
+        supported_tags.cache_clear()
+        _, stages["filter"] = _measure(
+            lambda: filter_packages(specs, python_versions=PYTHON_VERSIONS, platforms=PLATFORMS),
+            len,
+        )
+
+        project_names = sorted(index.projects)
+        queried, stages["query"] = _measure(
+            lambda: asyncio.run(_query_all(transport, project_names)), lambda _: len(project_names)
+        )
+
+        dest = tmp_dir / "wheels"
+        dest.mkdir()
+        sent_before = transport.stats.bytes_sent
+        _, stages["download"] = _measure(
+            lambda: asyncio.run(
+                _download_all(transport, queried, dest, args.concurrency, args.schedule)
+            ),
+            lambda n_downloaded: n_downloaded,
+        )
+        stages["download"].n_bytes = transport.stats.bytes_sent - sent_before
+
+    return {
+        "config": vars(args) | {"output": None, "compare": None},
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "transport": asdict(transport.stats),
+        "stages": {name: result.to_dict() for name, result in stages.items()},
+    }
+
+
+def compare(results: dict[str, t.Any], baseline: dict[str, t.Any]) -> None:
+    """Print the wall time & peak memory of each stage relative to the baseline's."""
+    for name, stage in results["stages"].items():
+        if (base := baseline["stages"].get(name)) is None:
+            continue
+
+        time_ratio = stage["wall_time"] / base["wall_time"] if base["wall_time"] else float("inf")
+        memory_ratio = (
+            stage["peak_memory"] / base["peak_memory"] if base["peak_memory"] else float("inf")
+        )
+        print(f"{name:>8}: {time_ratio:.2f}x wall time, {memory_ratio:.2f}x peak memory")
+
+
+def _parse_args(argv: abc.Sequence[str]) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bench_pipeline")
+    parser.add_argument("--packages", type=int, default=200, help="Locked packages to generate")
+    parser.add_argument("--history", type=int, default=10, help="Older releases per project")
+    parser.add_argument("--wheel-size", type=int, default=256, help="Median wheel size, KiB")
+    parser.add_argument("--latency", type=float, default=20, help="Per-request latency, ms")
+    parser.add_argument("--bandwidth", type=float, help="Per-request bandwidth, KiB/s")
+    parser.add_argument("--error-rate", type=float, default=0, help="Fraction of requests failed")
+    parser.add_argument("--concurrency", type=int, default=5, help="Concurrent downloads")
+    parser.add_argument(
+        "--schedule",
+        type=SchedulePolicy,
+        choices=list(SchedulePolicy),
+        default=SchedulePolicy.SMALLEST_FIRST,
+        help="Order in which queued downloads are started",
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", type=Path, help="Write the results as JSON to this path")
+    parser.add_argument("--compare", type=Path, help="Compare against previous JSON results")
+
+    return parser.parse_args(argv)
+
+
+def main(argv: abc.Sequence[str] | None = None) -> None:
+    """Run the pipeline benchmark with the provided command line arguments."""
+    args = _parse_args(sys.argv[1:] if argv is None else argv)
+    with contextlib.redirect_stdout(sys.stderr):
+        results = run(args)
+
+    rendered = json.dumps(results, indent=2)
+    if args.output is not None:
+        args.output.write_text(rendered)
+    else:
+        print(rendered)
+
+    if args.compare is not None:
+        compare(results, json.loads(args.compare.read_text()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Compare wheel tag filtering against the memoized supported tag index.
+
+The baseline regenerates the supported tags for every wheel & target, matching the behavior of
+`is_compatible_with` prior to the tag index being cached.
+
+Usage: python -m benchmarks.bench_tag_filter [n_packages]
+"""
+
+import sys
+import time
+from collections import abc
+
+from packaging.tags import Tag, compatible_tags, cpython_tags
+
+from benchmarks.synthetic import synthetic_specs
+from wheely_bucket.dl_manager import filter_packages
+from wheely_bucket.parse_lockfile import PackageSpec, supported_tags
+
+PYTHON_VERSIONS = ((3, 12), (3, 13), (3, 14), (3, 15))
+PLATFORMS = ("manylinux_2_17_x86_64", "manylinux2014_x86_64")
+
+
+def _regenerated_is_compatible_with(
+    tags: abc.Iterable[Tag],
+    python_version: abc.Sequence[int] | None = None,
+    platforms: abc.Iterable[str] | None = None,
+) -> bool:
+    for tag in cpython_tags(python_version=python_version, platforms=platforms):
+        if tag in tags:
+            return True
+
+    for tag in compatible_tags(python_version=python_version, platforms=platforms):
+        if tag in tags:
+            return True
+
+    return False
+
+
+def baseline_filter(specs: abc.Iterable[PackageSpec]) -> set[PackageSpec]:
+    """Filter the specs by regenerating the supported tags for every wheel & target."""
+    keep = set()
+    for p in specs:
+        for pyver in PYTHON_VERSIONS:
+            if _regenerated_is_compatible_with(p.tags, python_version=pyver, platforms=PLATFORMS):
+                keep.add(p)
+                break
+
+    return keep
+
+
+def main(n_packages: int = 1_000) -> None:
+    """Time both filtering approaches against a synthetic lockfile of `n_packages` packages."""
+    specs = synthetic_specs(n_packages)
+    print(f"Filtering {len(specs)} synthetic wheels for {len(PYTHON_VERSIONS)} Python versions")
+
+    start = time.perf_counter()
+    baseline = baseline_filter(specs)
+    baseline_elapsed = time.perf_counter() - start
+
+    supported_tags.cache_clear()
+    start = time.perf_counter()
+    indexed = filter_packages(specs, python_versions=PYTHON_VERSIONS, platforms=PLATFORMS)
+    indexed_elapsed = time.perf_counter() - start
+
+    assert baseline == indexed, "Filtered results do not match"
+    print(f"Regenerated tags: {baseline_elapsed:.3f}s")
+    print(f"Tag index:        {indexed_elapsed:.3f}s ({baseline_elapsed / indexed_elapsed:.0f}x)")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
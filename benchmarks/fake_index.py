@@ -0,0 +1,177 @@
+import asyncio
+import hashlib
+import random
+import typing as t
+from collections import abc
+from dataclasses import dataclass, field
+
+import httpx
+
+from benchmarks.synthetic import BASE_URL, synthetic_wheel_names
+from wheely_bucket.package_query import PYPI_SIMPLE_API
+
+CHUNK_SIZE = 64 * 1024
+
+
+def _wheel_block(wheel_name: str) -> bytes:
+    """Build the `CHUNK_SIZE` block repeated to make up the wheel's synthetic contents."""
+    return hashlib.sha256(wheel_name.encode()).digest() * (CHUNK_SIZE // 32)
+
+
+@dataclass(slots=True)
+class FakeIndex:
+    """
+    Synthetic Simple API & wheel host, for benchmarking without network access.
+
+    Each project serves its synthetic wheels along with `history` older releases of the same
+    wheels, so Simple API responses are of a realistic size. Wheel sizes are drawn from a log-normal
+    distribution with a median of `median_size` bytes; wheel contents are synthetic but stable, and
+    the SHA256 digests of the latest releases' wheels are served for verification.
+    """
+
+    projects: dict[str, dict[str, list[str]]]
+    median_size: int = 256 * 1024
+    seed: int = 42
+    _sizes: dict[str, int] = field(default_factory=dict, repr=False)
+    _digests: dict[str, str] = field(default_factory=dict, repr=False)
+    _pages: dict[str, bytes] = field(default_factory=dict, repr=False)
+
+    @classmethod
+    def synthetic(
+        cls, n_packages: int, history: int = 10, median_size: int = 256 * 1024, seed: int = 42
+    ) -> t.Self:
+        """Build an index serving the synthetic wheels of `n_packages` packages."""
+        projects: dict[str, dict[str, list[str]]] = {}
+        for wheel_name in synthetic_wheel_names(n_packages, seed=seed):
+            name, version, *tags = wheel_name.split("-")
+            releases = projects.setdefault(name.replace("_", "-"), {})
+            releases.setdefault(version, []).append(wheel_name)
+
+            for n in range(history):
+                old_version = f"0.0.{n}"
+                releases.setdefault(old_version, []).append("-".join((name, old_version, *tags)))
+
+        return cls(projects=projects, median_size=median_size, seed=seed)
+
+    def size(self, wheel_name: str) -> int:
+        """Size, in bytes, of the wheel's synthetic contents."""
+        if (size := self._sizes.get(wheel_name)) is None:
+            rng = random.Random(f"{self.seed}-{wheel_name}")
+            size = max(1024, int(self.median_size * rng.lognormvariate(0, 1)))
+            self._sizes[wheel_name] = size
+
+        return size
+
+    def chunks(self, wheel_name: str) -> abc.Iterator[bytes]:
+        """Yield the wheel's synthetic contents in chunks of up to `CHUNK_SIZE` bytes."""
+        block = _wheel_block(wheel_name)
+        remaining = self.size(wheel_name)
+        while remaining > 0:
+            chunk = block[:remaining]
+            remaining -= len(chunk)
+            yield chunk
+
+    def digest(self, wheel_name: str) -> str:
+        """SHA256 digest of the wheel's synthetic contents."""
+        if (digest := self._digests.get(wheel_name)) is None:
+            hasher = hashlib.sha256()
+            for chunk in self.chunks(wheel_name):
+                hasher.update(chunk)
+            digest = self._digests[wheel_name] = hasher.hexdigest()
+
+        return digest
+
+    def project_page(self, project: str) -> bytes | None:
+        """
+        Build the project's PEP 691 JSON response, or `None` if the project isn't served.
+
+        Digests are only served for the latest release, as hashing every release's synthetic
+        contents would dominate the benchmark's setup time.
+        """
+        if (page := self._pages.get(project)) is not None:
+            return page
+
+        releases = self.projects.get(project)
+        if releases is None:
+            return None
+
+        *_, latest = releases
+        files = []
+        for version in sorted(releases, key=lambda v: tuple(int(n) for n in v.split("."))):
+            for wheel_name in releases[version]:
+                entry: dict[str, t.Any] = {
+                    "filename": wheel_name,
+                    "url": f"{BASE_URL}/{wheel_name}",
+                    "size": self.size(wheel_name),
+                    "requires-python": ">=3.9",
+                }
+                if version == latest:
+                    entry["hashes"] = {"sha256": self.digest(wheel_name)}
+                files.append(entry)
+
+        versions = sorted(releases, key=lambda v: tuple(int(n) for n in v.split(".")))
+        page = httpx.Response(200, json={"files": files, "versions": versions}).content
+        self._pages[project] = page
+        return page
+
+
+@dataclass(slots=True)
+class TransportStats:  # noqa: D101
+    requests: int = 0
+    injected_errors: int = 0
+    bytes_sent: int = 0
+
+
+class FakeIndexTransport(httpx.AsyncBaseTransport):
+    """
+    In-process transport serving a `FakeIndex`, with tunable latency, bandwidth & error rate.
+
+    Each request is delayed by `latency` seconds before its response begins; wheel bodies are then
+    streamed at up to `bandwidth` bytes per second per request, if specified. A fraction,
+    `error_rate`, of requests fail with a retryable `503`.
+    """
+
+    def __init__(
+        self,
+        index: FakeIndex,
+        latency: float = 0,
+        bandwidth: float | None = None,
+        error_rate: float = 0,
+        seed: int = 42,
+    ) -> None:
+        self.index = index
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.error_rate = error_rate
+        self.stats = TransportStats()
+        self._rng = random.Random(seed)
+
+    async def _stream(self, wheel_name: str) -> abc.AsyncIterator[bytes]:
+        for chunk in self.index.chunks(wheel_name):
+            if self.bandwidth is not None:
+                await asyncio.sleep(len(chunk) / self.bandwidth)
+            self.stats.bytes_sent += len(chunk)
+            yield chunk
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        """Serve the Simple API page or wheel requested."""
+        self.stats.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        if self._rng.random() < self.error_rate:
+            self.stats.injected_errors += 1
+            return httpx.Response(503, headers={"Retry-After": "0"})
+
+        url = str(request.url)
+        if url.startswith(PYPI_SIMPLE_API):
+            project = url.removeprefix(PYPI_SIMPLE_API).strip("/")
+            page = self.index.project_page(project)
+            if page is None:
+                return httpx.Response(404)
+            return httpx.Response(
+                200, content=page, headers={"Content-Type": "application/vnd.pypi.simple.v1+json"}
+            )
+
+        wheel_name = url.rsplit("/", 1)[-1]
+        return httpx.Response(200, content=self._stream(wheel_name))
@@ -0,0 +1,87 @@
+import random
+from pathlib import Path
+
+from wheely_bucket.parse_lockfile import PackageSpec
+
+PYTHON_TAGS = ("cp312", "cp313", "cp314")
+PLATFORM_TAGS = (
+    "win_amd64",
+    "win32",
+    "macosx_11_0_arm64",
+    "macosx_10_13_x86_64",
+    "manylinux_2_17_x86_64.manylinux2014_x86_64",
+    "manylinux_2_17_aarch64.manylinux2014_aarch64",
+    "musllinux_1_2_x86_64",
+)
+BASE_URL = "https://files.example.org/packages"
+
+
+def synthetic_wheel_names(n_packages: int, seed: int = 42) -> list[str]:
+    """
+    Generate wheel filenames for a synthetic collection of locked packages.
+
+    Roughly a third of the packages are pure Python & ship a single `py3-none-any` wheel; the rest
+    ship a wheel per CPython version & platform, along with an occasional `abi3` wheel.
+    """
+    rng = random.Random(seed)
+
+    wheel_names = []
+    for idx in range(n_packages):
+        name = f"package_{idx:05d}"
+        version = f"{rng.randint(0, 9)}.{rng.randint(0, 30)}.{rng.randint(0, 9)}"
+
+        if rng.random() < 0.33:
+            wheel_names.append(f"{name}-{version}-py3-none-any.whl")
+            continue
+
+        for pytag in PYTHON_TAGS:
+            for plat in PLATFORM_TAGS:
+                wheel_names.append(f"{name}-{version}-{pytag}-{pytag}-{plat}.whl")
+
+        if rng.random() < 0.2:
+            for plat in PLATFORM_TAGS:
+                wheel_names.append(f"{name}-{version}-cp312-abi3-{plat}.whl")
+
+    return wheel_names
+
+
+def synthetic_specs(n_packages: int, seed: int = 42) -> list[PackageSpec]:
+    """Build `PackageSpec` instances for a synthetic collection of locked packages."""
+    return [
+        PackageSpec.from_url(f"{BASE_URL}/{wheel_name}")
+        for wheel_name in synthetic_wheel_names(n_packages, seed=seed)
+    ]
+
+
+def write_synthetic_lockfile(path: Path, n_packages: int, seed: int = 42) -> Path:
+    """Write a synthetic `uv.lock` containing the generated wheels to the provided path."""
+    by_package: dict[tuple[str, str], list[str]] = {}
+    for wheel_name in synthetic_wheel_names(n_packages, seed=seed):
+        name, version, *_ = wheel_name.split("-")
+        by_package.setdefault((name, version), []).append(wheel_name)
+
+    lines = ["version = 1", "revision = 3", 'requires-python = ">=3.12"', ""]
+    for (name, version), wheel_names in by_package.items():
+        lines.extend(
+            (
+                "[[package]]",
+                f'name = "{name.replace("_", "-")}"',
+                f'version = "{version}"',
+                'source = { registry = "https://pypi.org/simple" }',
+                "wheels = [",
+            )
+        )
+        for wheel_name in wheel_names:
+            digest = fake_digest(wheel_name)
+            lines.append(
+                f'    {{ url = "{BASE_URL}/{wheel_name}", hash = "sha256:{digest}", size = 1024 }},'
+            )
+        lines.extend(("]", ""))
+
+    path.write_text("\n".join(lines))
+    return path
+
+
+def fake_digest(wheel_name: str) -> str:
+    """Generate a stable, fake SHA256 hex digest for the provided wheel name."""
+    return f"{random.Random(wheel_name).getrandbits(256):064x}"
@@ -0,0 +1,27 @@
+import hashlib
+from collections import abc
+
+import httpx
+import pytest
+import pytest_asyncio
+
+WHEEL_BYTES = b"not really a wheel"
+WHEEL_SHA256 = hashlib.sha256(WHEEL_BYTES).hexdigest()
+
+
+@pytest.fixture
+def wheel_requests() -> list[httpx.Request]:
+    """Requests received by the `wheel_client` fixture's transport, in order."""
+    return []
+
+
+@pytest_asyncio.fixture
+async def wheel_client(wheel_requests: list[httpx.Request]) -> abc.AsyncIterator[httpx.AsyncClient]:
+    """Client answering every request with `WHEEL_BYTES`, recording each to `wheel_requests`."""
+
+    def _handler(request: httpx.Request) -> httpx.Response:
+        wheel_requests.append(request)
+        return httpx.Response(200, content=WHEEL_BYTES)
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(_handler)) as client:
+        yield client
@@ -1,11 +1,30 @@
+import asyncio
+import errno
+import hashlib
+import os
 from collections import abc
 from pathlib import Path
 
+import httpx
 import pytest
 from pytest_mock import MockerFixture
 
-from wheely_bucket.dl_manager import download_packages, filter_packages
+from tests.conftest import WHEEL_BYTES, WHEEL_SHA256
+from wheely_bucket.dl_manager import (
+    DownloadOptions,
+    PARTIAL_SUFFIX,
+    VALIDATOR_SUFFIX,
+    _abatched,
+    _check_pip_cache,
+    download_packages,
+    filter_packages,
+    select_best_wheels,
+)
 from wheely_bucket.parse_lockfile import PackageSpec
+from wheely_bucket.retry import RetryPolicy
+
+NO_WAIT_RETRY = RetryPolicy(max_attempts=3, base_delay=0)
+NO_WAIT_OPTIONS = DownloadOptions(retry=NO_WAIT_RETRY)
 
 # fmt: off
 BASE_PACKAGES = (
@@ -55,6 +74,56 @@ def test_filter_packages(
     assert filtered == truth_out
 
 
+ABI3_WIN = PackageSpec.from_url("https://a.b.c/black-25.1.0-cp311-abi3-win_amd64.whl")
+BEST_WHEEL_TEST_CASES = (
+    (
+        ((3, 13),),
+        ("win_amd64",),
+        {PackageSpec.from_url("https://a.b.c/black-25.1.0-cp313-cp313-win_amd64.whl")},
+    ),
+    (
+        ((3, 12), (3, 13)),
+        ("win_amd64", "macosx_11_0_arm64"),
+        {
+            PackageSpec.from_url("https://a.b.c/black-25.1.0-cp312-cp312-win_amd64.whl"),
+            PackageSpec.from_url("https://a.b.c/black-25.1.0-cp313-cp313-win_amd64.whl"),
+            PackageSpec.from_url("https://a.b.c/black-25.1.0-cp312-cp312-macosx_11_0_arm64.whl"),
+            PackageSpec.from_url("https://a.b.c/black-25.1.0-cp313-cp313-macosx_11_0_arm64.whl"),
+        },
+    ),
+    (((3, 14),), ("win_amd64",), {ABI3_WIN}),
+    (
+        ((3, 14),),
+        ("musllinux_1_2_x86_64",),
+        {PackageSpec.from_url("https://a.b.c/black-25.1.0-py3-none-any.whl")},
+    ),
+)
+
+
+@pytest.mark.parametrize(("python_versions", "platforms", "truth_out"), BEST_WHEEL_TEST_CASES)
+def test_select_best_wheels(
+    python_versions: abc.Iterable[tuple[int, int]],
+    platforms: abc.Iterable[str],
+    truth_out: set[PackageSpec],
+) -> None:
+    best = select_best_wheels(
+        (*BASE_PACKAGES, ABI3_WIN), python_versions=python_versions, platforms=platforms
+    )
+    assert best == truth_out
+
+
+def test_select_best_wheels_per_release() -> None:
+    older = PackageSpec.from_url("https://a.b.c/black-24.1.0-py3-none-any.whl")
+    best = select_best_wheels(
+        (*BASE_PACKAGES, older), python_versions=((3, 13),), platforms=("win_amd64",)
+    )
+
+    assert {p.wheel_name for p in best} == {
+        "black-25.1.0-cp313-cp313-win_amd64.whl",
+        "black-24.1.0-py3-none-any.whl",
+    }
+
+
 @pytest.mark.asyncio
 async def test_download_packages_already_exist(
     tmp_path: Path,
@@ -90,3 +159,364 @@ async def test_download_packages_in_pip_cache(
     captured = capsys.readouterr()
     assert captured.out.startswith("Using cached")
     assert download_wheel.exists()
+
+
+@pytest.mark.asyncio
+async def test_download_packages_pip_cache_error_downloads(
+    tmp_path: Path,
+    capsys: pytest.CaptureFixture,
+    mocker: MockerFixture,
+    wheel_client: httpx.AsyncClient,
+) -> None:
+    dummy_pip_cache = tmp_path / "pip_cache"
+    mocker.patch("wheely_bucket.parse_lockfile.PIP_HTTP_CACHE", dummy_pip_cache)
+    mocker.patch(
+        "wheely_bucket.dl_manager.materialize", side_effect=OSError(errno.EXDEV, "cross-device")
+    )
+
+    DUMMY_PACKAGE = PackageSpec.from_url("https://a.b.c/black-25.1.0-py3-none-any.whl")
+    DUMMY_PACKAGE.cached_wheel_path.parent.mkdir(parents=True)
+    DUMMY_PACKAGE.cached_wheel_path.touch()
+
+    dest = tmp_path / "dest"
+    dest.mkdir()
+    summary = await download_packages(packages=(DUMMY_PACKAGE,), dest=dest, client=wheel_client)
+
+    captured = capsys.readouterr()
+    assert captured.out.startswith("Could not use cached")
+    assert (summary.cached, summary.downloaded) == (0, 1)
+    assert (dest / DUMMY_PACKAGE.wheel_name).read_bytes() == WHEEL_BYTES
+    assert not (dest / f"{DUMMY_PACKAGE.wheel_name}{PARTIAL_SUFFIX}").exists()
+
+
+@pytest.mark.asyncio
+async def test_download_packages_async_iterable_dedupes(
+    tmp_path: Path,
+    capsys: pytest.CaptureFixture,
+) -> None:
+    DUMMY_PACKAGE = PackageSpec.from_url("https://a.b.c/black-25.1.0-py3-none-any.whl")
+    download_wheel = tmp_path / DUMMY_PACKAGE.wheel_name
+    download_wheel.touch()
+
+    async def _stream() -> abc.AsyncIterator[PackageSpec]:
+        yield DUMMY_PACKAGE
+        yield DUMMY_PACKAGE
+
+    await download_packages(packages=_stream(), dest=tmp_path)
+
+    captured = capsys.readouterr()
+    assert captured.out.count("Wheel was already downloaded") == 1
+
+
+@pytest.mark.asyncio
+async def test_download_packages_verified(tmp_path: Path, wheel_client: httpx.AsyncClient) -> None:
+    DUMMY_PACKAGE = PackageSpec.from_url(
+        "https://a.b.c/black-25.1.0-py3-none-any.whl", sha256=WHEEL_SHA256, size=len(WHEEL_BYTES)
+    )
+
+    await download_packages(packages=(DUMMY_PACKAGE,), dest=tmp_path, client=wheel_client)
+
+    assert (tmp_path / DUMMY_PACKAGE.wheel_name).read_bytes() == WHEEL_BYTES
+
+
+@pytest.mark.asyncio
+async def test_download_packages_hash_mismatch_discarded(
+    tmp_path: Path,
+    capsys: pytest.CaptureFixture,
+    wheel_client: httpx.AsyncClient,
+) -> None:
+    DUMMY_PACKAGE = PackageSpec.from_url(
+        "https://a.b.c/black-25.1.0-py3-none-any.whl", sha256="0" * 64
+    )
+
+    summary = await download_packages(
+        packages=(DUMMY_PACKAGE,), dest=tmp_path, client=wheel_client, options=NO_WAIT_OPTIONS
+    )
+
+    captured = capsys.readouterr()
+    assert captured.out.count("Retrying") == NO_WAIT_RETRY.max_attempts - 1
+    assert DUMMY_PACKAGE.wheel_name in summary.failed
+    assert not (tmp_path / DUMMY_PACKAGE.wheel_name).exists()
+
+
+@pytest.mark.asyncio
+async def test_download_packages_existing_fails_verification(
+    tmp_path: Path,
+    capsys: pytest.CaptureFixture,
+    wheel_client: httpx.AsyncClient,
+) -> None:
+    DUMMY_PACKAGE = PackageSpec.from_url(
+        "https://a.b.c/black-25.1.0-py3-none-any.whl", sha256=WHEEL_SHA256, size=len(WHEEL_BYTES)
+    )
+    download_wheel = tmp_path / DUMMY_PACKAGE.wheel_name
+    download_wheel.write_bytes(WHEEL_BYTES[:4])
+
+    await download_packages(packages=(DUMMY_PACKAGE,), dest=tmp_path, client=wheel_client)
+
+    captured = capsys.readouterr()
+    assert captured.out.startswith("Existing wheel failed verification")
+    assert download_wheel.read_bytes() == WHEEL_BYTES
+
+
+WHEEL_ETAG = '"v1"'
+
+
+def _range_handler(request: httpx.Request) -> httpx.Response:
+    range_header = request.headers.get("Range")
+    if range_header is None or request.headers.get("If-Range", WHEEL_ETAG) != WHEEL_ETAG:
+        return httpx.Response(200, content=WHEEL_BYTES, headers={"ETag": WHEEL_ETAG})
+
+    start = int(range_header.removeprefix("bytes=").removesuffix("-"))
+    content_range = f"bytes {start}-{len(WHEEL_BYTES) - 1}/{len(WHEEL_BYTES)}"
+    return httpx.Response(
+        206, content=WHEEL_BYTES[start:], headers={"Content-Range": content_range}
+    )
+
+
+@pytest.mark.asyncio
+async def test_download_packages_resumes_partial(
+    tmp_path: Path,
+    capsys: pytest.CaptureFixture,
+) -> None:
+    DUMMY_PACKAGE = PackageSpec.from_url(
+        "https://a.b.c/black-25.1.0-py3-none-any.whl", sha256=WHEEL_SHA256, size=len(WHEEL_BYTES)
+    )
+    download_wheel = tmp_path / DUMMY_PACKAGE.wheel_name
+    partial_wheel = tmp_path / f"{DUMMY_PACKAGE.wheel_name}{PARTIAL_SUFFIX}"
+    partial_wheel.write_bytes(WHEEL_BYTES[:5])
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(_range_handler)) as client:
+        await download_packages(packages=(DUMMY_PACKAGE,), dest=tmp_path, client=client)
+
+    captured = capsys.readouterr()
+    assert "Resuming" in captured.out
+    assert download_wheel.read_bytes() == WHEEL_BYTES
+    assert not partial_wheel.exists()
+
+
+# Without a known digest, a partial file is only resumed if the server confirms it is unchanged
+RESUME_VALIDATOR_CASES = (
+    (None, False),
+    ('"v0"', False),
+    (WHEEL_ETAG, True),
+)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(("validator", "truth_resumed"), RESUME_VALIDATOR_CASES)
+async def test_download_packages_resume_validator(
+    tmp_path: Path, capsys: pytest.CaptureFixture, validator: str | None, truth_resumed: bool
+) -> None:
+    DUMMY_PACKAGE = PackageSpec.from_url("https://a.b.c/black-25.1.0-py3-none-any.whl")
+    download_wheel = tmp_path / DUMMY_PACKAGE.wheel_name
+    partial_wheel = tmp_path / f"{DUMMY_PACKAGE.wheel_name}{PARTIAL_SUFFIX}"
+    validator_file = tmp_path / f"{partial_wheel.name}{VALIDATOR_SUFFIX}"
+    partial_wheel.write_bytes(WHEEL_BYTES[:5])
+    if validator is not None:
+        validator_file.write_text(validator)
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(_range_handler)) as client:
+        await download_packages(packages=(DUMMY_PACKAGE,), dest=tmp_path, client=client)
+
+    captured = capsys.readouterr()
+    assert ("Resuming" in captured.out) == truth_resumed
+    assert download_wheel.read_bytes() == WHEEL_BYTES
+    assert not validator_file.exists()
+
+
+@pytest.mark.asyncio
+async def test_download_packages_misplaced_range_restarts(tmp_path: Path) -> None:
+    DUMMY_PACKAGE = PackageSpec.from_url(
+        "https://a.b.c/black-25.1.0-py3-none-any.whl", sha256=WHEEL_SHA256
+    )
+    download_wheel = tmp_path / DUMMY_PACKAGE.wheel_name
+    partial_wheel = tmp_path / f"{DUMMY_PACKAGE.wheel_name}{PARTIAL_SUFFIX}"
+    partial_wheel.write_bytes(WHEEL_BYTES[:5])
+    requests: list[httpx.Request] = []
+
+    def _handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if "Range" in request.headers:
+            # Server ignores the requested start
+            return httpx.Response(
+                206, content=WHEEL_BYTES, headers={"Content-Range": "bytes 0-17/18"}
+            )
+        return httpx.Response(200, content=WHEEL_BYTES)
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(_handler)) as client:
+        summary = await download_packages(
+            packages=(DUMMY_PACKAGE,), dest=tmp_path, client=client, options=NO_WAIT_OPTIONS
+        )
+
+    assert summary.downloaded == 1
+    assert ["Range" in r.headers for r in requests] == [True, False]
+    assert download_wheel.read_bytes() == WHEEL_BYTES
+
+
+@pytest.mark.asyncio
+async def test_download_packages_range_ignored_restarts(
+    tmp_path: Path, wheel_client: httpx.AsyncClient
+) -> None:
+    DUMMY_PACKAGE = PackageSpec.from_url(
+        "https://a.b.c/black-25.1.0-py3-none-any.whl", sha256=WHEEL_SHA256, size=len(WHEEL_BYTES)
+    )
+    download_wheel = tmp_path / DUMMY_PACKAGE.wheel_name
+    partial_wheel = tmp_path / f"{DUMMY_PACKAGE.wheel_name}{PARTIAL_SUFFIX}"
+    partial_wheel.write_bytes(WHEEL_BYTES[:5])
+
+    await download_packages(packages=(DUMMY_PACKAGE,), dest=tmp_path, client=wheel_client)
+
+    assert download_wheel.read_bytes() == WHEEL_BYTES
+    assert not partial_wheel.exists()
+
+
+@pytest.mark.asyncio
+async def test_download_packages_smallest_first(tmp_path: Path) -> None:
+    sizes = (400, 100, 300, 200)
+    packages = [
+        PackageSpec.from_url(f"https://a.b.c/pkg{size}-1.0-py3-none-any.whl", size=size)
+        for size in sizes
+    ]
+    requested: list[int] = []
+
+    def _handler(request: httpx.Request) -> httpx.Response:
+        size = int(request.url.path.split("-")[0].removeprefix("/pkg"))
+        requested.append(size)
+        return httpx.Response(200, content=b"x" * size)
+
+    options = DownloadOptions(retry=NO_WAIT_RETRY, concurrency=1)
+    async with httpx.AsyncClient(transport=httpx.MockTransport(_handler)) as client:
+        summary = await download_packages(packages, dest=tmp_path, client=client, options=options)
+
+    assert summary.downloaded == 4
+    # The first download starts immediately, the queued downloads are started smallest first
+    assert requested == [400, 100, 200, 300]
+
+
+@pytest.mark.asyncio
+async def test_download_packages_follows_redirect(tmp_path: Path) -> None:
+    DUMMY_PACKAGE = PackageSpec.from_url(
+        "https://mirror.test/black-25.1.0-py3-none-any.whl", sha256=WHEEL_SHA256
+    )
+
+    def _handler(request: httpx.Request) -> httpx.Response:
+        if request.url.host == "mirror.test":
+            return httpx.Response(302, headers={"Location": "https://blob.test/abc123"})
+        return httpx.Response(200, content=WHEEL_BYTES)
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(_handler)) as client:
+        summary = await download_packages(
+            packages=(DUMMY_PACKAGE,), dest=tmp_path, client=client, options=NO_WAIT_OPTIONS
+        )
+
+    assert summary.downloaded == 1
+    assert (tmp_path / DUMMY_PACKAGE.wheel_name).read_bytes() == WHEEL_BYTES
+
+
+@pytest.mark.asyncio
+async def test_download_packages_retries_transient_status(tmp_path: Path) -> None:
+    DUMMY_PACKAGE = PackageSpec.from_url("https://a.b.c/black-25.1.0-py3-none-any.whl")
+    responses = iter(
+        (
+            httpx.Response(503, headers={"Retry-After": "0"}),
+            httpx.Response(200, content=WHEEL_BYTES),
+        )
+    )
+
+    transport = httpx.MockTransport(lambda _: next(responses))
+    async with httpx.AsyncClient(transport=transport) as client:
+        summary = await download_packages(
+            packages=(DUMMY_PACKAGE,), dest=tmp_path, client=client, options=NO_WAIT_OPTIONS
+        )
+
+    assert summary.downloaded == 1
+    assert (tmp_path / DUMMY_PACKAGE.wheel_name).read_bytes() == WHEEL_BYTES
+
+
+@pytest.mark.asyncio
+async def test_download_packages_paused_host_frees_slot(tmp_path: Path) -> None:
+    THROTTLED_PACKAGE = PackageSpec.from_url("https://a.test/black-25.1.0-py3-none-any.whl")
+    DUMMY_PACKAGE = PackageSpec.from_url("https://b.test/cogapp-3.5.1-py3-none-any.whl")
+    requested: list[str] = []
+
+    def _handler(request: httpx.Request) -> httpx.Response:
+        requested.append(request.url.host)
+        if request.url.host == "a.test":
+            return httpx.Response(429, headers={"Retry-After": "0.2"})
+        return httpx.Response(200, content=WHEEL_BYTES)
+
+    options = DownloadOptions(retry=RetryPolicy(max_attempts=2, base_delay=0), concurrency=1)
+    async with httpx.AsyncClient(transport=httpx.MockTransport(_handler)) as client:
+        summary = await download_packages(
+            (THROTTLED_PACKAGE, DUMMY_PACKAGE), dest=tmp_path, client=client, options=options
+        )
+
+    # The only slot is released while the throttled host is paused, so the other host isn't held up
+    assert requested == ["a.test", "b.test", "a.test"]
+    assert summary.downloaded == 1
+    assert set(summary.failed) == {THROTTLED_PACKAGE.wheel_name}
+
+
+@pytest.mark.asyncio
+async def test_download_packages_failure_does_not_abort_batch(tmp_path: Path) -> None:
+    MISSING_PACKAGE = PackageSpec.from_url("https://a.b.c/missing/black-25.1.0-py3-none-any.whl")
+    DUMMY_PACKAGE = PackageSpec.from_url("https://a.b.c/black-25.1.0-cp313-cp313-win_amd64.whl")
+
+    def _handler(request: httpx.Request) -> httpx.Response:
+        if "missing" in request.url.path:
+            return httpx.Response(404)
+        return httpx.Response(200, content=WHEEL_BYTES)
+
+    async with httpx.AsyncClient(transport=httpx.MockTransport(_handler)) as client:
+        summary = await download_packages(
+            packages=(MISSING_PACKAGE, DUMMY_PACKAGE),
+            dest=tmp_path,
+            client=client,
+            options=NO_WAIT_OPTIONS,
+        )
+
+    assert summary.downloaded == 1
+    assert set(summary.failed) == {MISSING_PACKAGE.wheel_name}
+    assert (tmp_path / DUMMY_PACKAGE.wheel_name).exists()
+
+
+@pytest.mark.asyncio
+async def test_abatched_sync_iterable() -> None:
+    batches = [b async for b in _abatched(BASE_PACKAGES, n=4)]
+    assert [len(b) for b in batches] == [4, 4, 1]
+
+
+@pytest.mark.asyncio
+async def test_abatched_emits_partial_batch_for_slow_source() -> None:
+    async def _stream() -> abc.AsyncIterator[PackageSpec]:
+        yield BASE_PACKAGES[0]
+        yield BASE_PACKAGES[1]
+        await asyncio.sleep(0.1)
+        yield BASE_PACKAGES[2]
+
+    batches = [b async for b in _abatched(_stream(), n=10, max_wait=0.01)]
+    assert batches == [list(BASE_PACKAGES[:2]), [BASE_PACKAGES[2]]]
+
+
+def test_check_pip_cache_lists_shards_once(tmp_path: Path, mocker: MockerFixture) -> None:
+    mocker.patch("wheely_bucket.parse_lockfile.PIP_HTTP_CACHE", tmp_path)
+    cached = BASE_PACKAGES[0]
+    cached.cached_wheel_path.parent.mkdir(parents=True)
+    cached.cached_wheel_path.touch()
+
+    listdir = mocker.spy(os, "listdir")
+    shard_listings: dict[Path, frozenset[str]] = {}
+    assert _check_pip_cache((cached, cached, BASE_PACKAGES[1]), shard_listings) == [
+        True,
+        True,
+        False,
+    ]
+    assert listdir.call_count == 2
+
+
+def test_url_hash_memoized(mocker: MockerFixture) -> None:
+    p = PackageSpec.from_url("https://a.b.c/black-25.1.0-py3-none-any.whl")
+    sha224 = mocker.spy(hashlib, "sha224")
+
+    assert p.url_hash == p.url_hash
+    assert sha224.call_count == 1
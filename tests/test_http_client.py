@@ -0,0 +1,46 @@
+from pathlib import Path
+
+import httpx
+import pytest
+import typer
+from pytest_mock import MockerFixture
+from typer.testing import CliRunner
+
+from wheely_bucket import USER_AGENT
+from wheely_bucket.cli import _DownloadArgs, wb_cli
+from wheely_bucket.dl_manager import DownloadSummary
+from wheely_bucket.http_client import ClientOptions
+
+
+@pytest.mark.asyncio
+async def test_build_client() -> None:
+    options = ClientOptions(connect_timeout=2, read_timeout=5)
+    auth = httpx.BasicAuth("user", "token")
+
+    async with options.build_client(auth=auth) as client:
+        assert client.headers["User-Agent"] == USER_AGENT
+        assert client.auth is auth
+        assert client.timeout == httpx.Timeout(connect=2, read=5, write=5, pool=None)
+
+
+def test_http2_requires_h2(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr("wheely_bucket.cli.http2_available", lambda: False)
+    with pytest.raises(typer.BadParameter, match="h2"):
+        _DownloadArgs(http2=True).build()
+
+
+def test_cli_download_options(tmp_path: Path, mocker: MockerFixture) -> None:
+    pipeline = mocker.patch("wheely_bucket.cli._diff_pipeline", return_value=DownloadSummary())
+    lockfile = tmp_path / "uv.lock"
+    lockfile.write_text("version = 1\npackage = []\n")
+    args = ["diff", str(lockfile), "--base", str(lockfile), "--dest", str(tmp_path)]
+    options = ["--retries", "2", "--max-connections", "3", "--store", str(tmp_path / "store")]
+
+    result = CliRunner().invoke(wb_cli, [*args, *options])
+
+    assert result.exit_code == 0, result.output
+    download_options = pipeline.call_args.kwargs["options"]
+    assert download_options.retry.max_attempts == 2
+    assert download_options.http.max_connections == 3
+    # The store is saved once the run completes
+    assert (tmp_path / "store" / "refs.json").exists()
@@ -0,0 +1,116 @@
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from wheely_bucket.lock_diff import (
+    BaselineError,
+    added_wheels,
+    load_baseline,
+    load_snapshot,
+    save_snapshot,
+)
+
+OLD_LOCK = """\
+version = 1
+revision = 3
+requires-python = ">=3.12"
+
+[[package]]
+name = "cogapp"
+version = "3.5.1"
+source = { registry = "https://pypi.org/simple" }
+wheels = [
+    { url = "https://a.b.c/packages/abc/cogapp-3.5.1-py3-none-any.whl", hash = "sha256:abc", size = 30390 },
+]
+"""
+
+NEW_LOCK = OLD_LOCK + """
+[[package]]
+name = "pip"
+version = "25.2"
+source = { registry = "https://pypi.org/simple" }
+wheels = [
+    { url = "https://a.b.c/packages/def/pip-25.2-py3-none-any.whl", hash = "sha256:def", size = 1752557 },
+]
+"""
+
+ADDED_WHEEL = ("https://a.b.c/packages/def/pip-25.2-py3-none-any.whl", "def", 1752557)
+
+
+@pytest.fixture
+def lockfile(tmp_path: Path) -> Path:
+    lf = tmp_path / "proj" / "uv.lock"
+    lf.parent.mkdir()
+    lf.write_text(NEW_LOCK)
+
+    return lf
+
+
+def test_added_wheels() -> None:
+    old = [("a", None, None), ("b", None, None)]
+    new = [("b", None, None), ("c", None, None), ("c", None, None)]
+
+    assert added_wheels(old, new) == [("c", None, None)]
+
+
+def test_load_baseline_lockfile(lockfile: Path, tmp_path: Path) -> None:
+    base = tmp_path / "old.lock"
+    base.write_text(OLD_LOCK)
+
+    old = load_baseline(lockfile, base=base)
+    new = load_baseline(lockfile, base=lockfile)
+    assert added_wheels(old, new) == [ADDED_WHEEL]
+
+
+def test_load_baseline_missing_lockfile(lockfile: Path, tmp_path: Path) -> None:
+    with pytest.raises(BaselineError, match="does not exist"):
+        load_baseline(lockfile, base=tmp_path / "missing.lock")
+
+
+def test_load_baseline_requires_single_source(lockfile: Path) -> None:
+    with pytest.raises(ValueError, match="Either"):
+        load_baseline(lockfile)
+
+    with pytest.raises(ValueError, match="Only one"):
+        load_baseline(lockfile, base=lockfile, base_rev="HEAD")
+
+
+def test_snapshot_roundtrip(tmp_path: Path) -> None:
+    snapshot = tmp_path / "snapshot.json"
+    assert load_snapshot(snapshot) == []
+
+    save_snapshot(snapshot, [ADDED_WHEEL, ADDED_WHEEL])
+    assert load_snapshot(snapshot) == [ADDED_WHEEL]
+    assert load_baseline(tmp_path / "uv.lock", base=snapshot) == [ADDED_WHEEL]
+
+
+def test_load_snapshot_corrupt(tmp_path: Path) -> None:
+    snapshot = tmp_path / "snapshot.json"
+    snapshot.write_text("{")
+
+    with pytest.raises(BaselineError, match="Could not parse"):
+        load_snapshot(snapshot)
+
+
+def _git(cwd: Path, *args: str) -> None:
+    subprocess.run(
+        ["git", "-c", "user.name=test", "-c", "user.email=test@test", *args],
+        cwd=cwd,
+        check=True,
+        capture_output=True,
+    )
+
+
+def test_load_baseline_git_rev(lockfile: Path, tmp_path: Path) -> None:
+    _git(tmp_path, "init")
+    lockfile.write_text(OLD_LOCK)
+    _git(tmp_path, "add", ".")
+    _git(tmp_path, "commit", "-m", "old")
+    lockfile.write_text(NEW_LOCK)
+
+    old = load_baseline(lockfile, base_rev="HEAD")
+    assert added_wheels(old, load_baseline(lockfile, base=lockfile)) == [ADDED_WHEEL]
+
+    with pytest.raises(BaselineError, match="at revision"):
+        load_baseline(lockfile, base_rev="not-a-revision")
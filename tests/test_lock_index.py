@@ -0,0 +1,123 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+from pytest_mock import MockerFixture
+
+from wheely_bucket.lock_index import (
+    LockIndex,
+    check_lockfile,
+    locked_wheels_to_specs,
+    parse_lockfile_content,
+)
+from wheely_bucket.parse_lockfile import PackageSpec, parse_project
+
+DUMMY_LOCK = """\
+version = 1
+revision = 3
+requires-python = ">=3.12"
+
+[[package]]
+name = "cogapp"
+version = "3.5.1"
+source = { registry = "https://pypi.org/simple" }
+wheels = [
+    { url = "https://a.b.c/packages/abc/cogapp-3.5.1-py3-none-any.whl", hash = "sha256:abc", size = 30390 },
+]
+
+[[package]]
+name = "pip"
+version = "25.2"
+source = { registry = "https://pypi.org/simple" }
+wheels = [
+    { url = "https://a.b.c/packages/def/pip-25.2-py3-none-any.whl", hash = "sha256:def", size = 1752557 },
+]
+
+[[package]]
+name = "wheely-bucket"
+version = "0.1.0"
+source = { editable = "." }
+"""
+
+
+@pytest.fixture
+def lockfile(tmp_path: Path) -> Path:
+    lf = tmp_path / "proj" / "uv.lock"
+    lf.parent.mkdir()
+    lf.write_text(DUMMY_LOCK)
+
+    return lf
+
+
+def _parse(lockfile: Path, index: LockIndex | None = None) -> set[PackageSpec]:
+    state = check_lockfile(lockfile, index=index)
+    wheels = state.wheels
+    if wheels is None:
+        wheels = parse_lockfile_content(state.content)
+        if index is not None:
+            index.update(state.lockfile, state.stat, state.digest, wheels)
+
+    return locked_wheels_to_specs(wheels)
+
+
+def test_parse_lockfile_content_matches_parse_project(lockfile: Path) -> None:
+    assert _parse(lockfile) == parse_project(lockfile.parent)
+
+
+def test_lock_index_roundtrip_skips_unchanged(
+    tmp_path: Path, lockfile: Path, mocker: MockerFixture
+) -> None:
+    index_path = tmp_path / "index.json"
+    index = LockIndex.load(index_path)
+    truth_packages = _parse(lockfile, index=index)
+    index.save()
+    assert (index.hits, index.misses) == (0, 1)
+
+    # An unchanged lockfile shouldn't even be read
+    reloaded = LockIndex.load(index_path)
+    spy_read = mocker.spy(Path, "read_bytes")
+    assert _parse(lockfile, index=reloaded) == truth_packages
+    assert (reloaded.hits, reloaded.misses) == (1, 0)
+    assert spy_read.call_count == 0
+
+    (p,) = (p for p in truth_packages if p.package_name == "pip")
+    assert p.size == 1752557
+
+
+def test_lock_index_touched_lockfile_uses_content_hash(tmp_path: Path, lockfile: Path) -> None:
+    index = LockIndex(path=tmp_path / "index.json")
+    truth_packages = _parse(lockfile, index=index)
+
+    stat = lockfile.stat()
+    os.utime(lockfile, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert _parse(lockfile, index=index) == truth_packages
+    assert (index.hits, index.misses) == (1, 1)
+
+
+def test_lock_index_changed_lockfile_reparsed(tmp_path: Path, lockfile: Path) -> None:
+    index = LockIndex(path=tmp_path / "index.json")
+    _parse(lockfile, index=index)
+
+    lockfile.write_text(DUMMY_LOCK.split('[[package]]\nname = "pip"')[0])
+    packages = _parse(lockfile, index=index)
+    assert {p.package_name for p in packages} == {"cogapp"}
+    assert (index.hits, index.misses) == (0, 2)
+
+
+def test_lock_index_corrupt_loads_empty(tmp_path: Path) -> None:
+    index_path = tmp_path / "index.json"
+    index_path.write_text("{not json")
+
+    assert LockIndex.load(index_path).entries == {}
+
+
+def test_lock_index_concurrent_saves(tmp_path: Path) -> None:
+    index_path = tmp_path / "index.json"
+    indexes = [LockIndex(path=index_path, entries={str(i): {}}) for i in range(8)]
+
+    with ThreadPoolExecutor(max_workers=len(indexes)) as pool:
+        list(pool.map(LockIndex.save, indexes))
+
+    assert len(LockIndex.load(index_path).entries) == 1
+    assert [p.name for p in tmp_path.iterdir()] == ["index.json"]
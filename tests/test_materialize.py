@@ -0,0 +1,73 @@
+import errno
+import os
+from pathlib import Path
+
+import pytest
+from pytest_mock import MockerFixture
+
+from tests.conftest import WHEEL_BYTES
+from wheely_bucket.materialize import LinkMode, materialize
+
+
+@pytest.fixture
+def src_wheel(tmp_path: Path) -> Path:
+    src = tmp_path / "src" / "black-25.1.0-py3-none-any.whl"
+    src.parent.mkdir()
+    src.write_bytes(WHEEL_BYTES)
+
+    return src
+
+
+@pytest.mark.parametrize("mode", (LinkMode.HARDLINK, LinkMode.SYMLINK, LinkMode.COPY))
+def test_materialize(src_wheel: Path, tmp_path: Path, mode: LinkMode) -> None:
+    dst = tmp_path / src_wheel.name
+    assert materialize(src_wheel, dst, mode=mode) == mode
+    assert dst.read_bytes() == WHEEL_BYTES
+
+
+def test_materialize_hardlink_shares_inode(src_wheel: Path, tmp_path: Path) -> None:
+    dst = tmp_path / src_wheel.name
+    materialize(src_wheel, dst, mode=LinkMode.HARDLINK)
+
+    assert os.path.samefile(src_wheel, dst)
+
+
+def test_materialize_copy_is_independent(src_wheel: Path, tmp_path: Path) -> None:
+    dst = tmp_path / src_wheel.name
+    materialize(src_wheel, dst, mode=LinkMode.COPY)
+
+    assert not os.path.samefile(src_wheel, dst)
+
+
+def test_materialize_replaces_existing(src_wheel: Path, tmp_path: Path) -> None:
+    dst = tmp_path / src_wheel.name
+    dst.write_bytes(b"stale partial")
+
+    materialize(src_wheel, dst, mode=LinkMode.HARDLINK)
+    assert dst.read_bytes() == WHEEL_BYTES
+
+
+def test_materialize_reflink_falls_back(src_wheel: Path, tmp_path: Path) -> None:
+    # Reflink support depends on the filesystem under test, either outcome is acceptable
+    dst = tmp_path / src_wheel.name
+    assert materialize(src_wheel, dst, mode=LinkMode.REFLINK) in {LinkMode.REFLINK, LinkMode.COPY}
+    assert dst.read_bytes() == WHEEL_BYTES
+
+
+def test_materialize_cross_device_falls_back(
+    src_wheel: Path, tmp_path: Path, mocker: MockerFixture
+) -> None:
+    mocker.patch("os.link", side_effect=OSError(errno.EXDEV, "Invalid cross-device link"))
+
+    dst = tmp_path / src_wheel.name
+    assert materialize(src_wheel, dst, mode=LinkMode.HARDLINK) == LinkMode.COPY
+    assert dst.read_bytes() == WHEEL_BYTES
+
+
+def test_materialize_unrelated_error_raises(
+    src_wheel: Path, tmp_path: Path, mocker: MockerFixture
+) -> None:
+    mocker.patch("os.link", side_effect=OSError(errno.ENOSPC, "No space left on device"))
+
+    with pytest.raises(OSError, match="No space"):
+        materialize(src_wheel, tmp_path / src_wheel.name, mode=LinkMode.HARDLINK)
@@ -7,7 +7,16 @@ from packaging.requirements import Requirement
 from packaging.version import Version
 from pytest_mock import MockerFixture
 
-from wheely_bucket.package_query import _normalize, filtered_pypi_query, query_pypi_simple
+from wheely_bucket.metadata_cache import MetadataCache
+from wheely_bucket.package_query import (
+    ProjectMemo,
+    SimpleProject,
+    _normalize,
+    allows_python,
+    filename_version,
+    filtered_pypi_query,
+    query_pypi_simple,
+)
 from wheely_bucket.parse_lockfile import PackageSpec
 
 TEST_DATA_DIR = Path(__file__).parent / "test_data"
@@ -28,7 +37,21 @@ def test_normalize(package_name: str, truth_normalized: str) -> None:
     assert _normalize(package_name) == truth_normalized
 
 
+FILENAME_VERSION_TEST_CASES = (
+    ("black-25.1.0-py3-none-any.whl", "25.1.0"),
+    ("black-25.1.0-1-cp312-cp312-win_amd64.whl", "25.1.0"),
+    ("black-25.1.0.tar.gz", None),
+)
+
+
+@pytest.mark.parametrize(("filename", "truth_version"), FILENAME_VERSION_TEST_CASES)
+def test_filename_version(filename: str, truth_version: str | None) -> None:
+    assert filename_version(filename) == truth_version
+
+
 class DummyResponse:
+    status_code = 200
+
     def __init__(self, json_resp: dict[str, t.Any]) -> None:
         self._json = json_resp
 
@@ -105,3 +128,151 @@ async def test_filtered_pypi_query(
 
     wheels = await filtered_pypi_query(client=mock_client, req=requirement)
     assert wheels == truth_out
+
+
+class DummyCacheResponse(DummyResponse):
+    def __init__(
+        self,
+        json_resp: dict[str, t.Any],
+        status_code: int = 200,
+        headers: dict[str, str] | None = None,
+    ) -> None:
+        super().__init__(json_resp)
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.content = json.dumps(json_resp).encode()
+
+
+@pytest.mark.asyncio
+async def test_query_pypi_simple_cache_miss_then_revalidated_hit(
+    tmp_path: Path, mocker: MockerFixture
+) -> None:
+    cache = MetadataCache(cache_dir=tmp_path)
+    mock_client = mocker.AsyncMock()
+    mock_client.get.return_value = DummyCacheResponse(SAMPLE_RESPONSE_JSON, headers={"ETag": "abc"})
+
+    packages, _ = await query_pypi_simple(
+        client=mock_client, package_name="flake8-annotations", cache=cache
+    )
+    assert (cache.hits, cache.misses) == (0, 1)
+
+    mock_client.get.return_value = DummyCacheResponse({}, status_code=304)
+    cached_packages, _ = await query_pypi_simple(
+        client=mock_client, package_name="flake8-annotations", cache=cache
+    )
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert cached_packages == packages
+    assert mock_client.get.call_args.kwargs["headers"]["If-None-Match"] == "abc"
+
+
+@pytest.mark.asyncio
+async def test_query_pypi_simple_cache_fresh_skips_request(
+    tmp_path: Path, mocker: MockerFixture
+) -> None:
+    cache = MetadataCache(cache_dir=tmp_path, ttl=3600)
+    mock_client = mocker.AsyncMock()
+    mock_client.get.return_value = DummyCacheResponse(SAMPLE_RESPONSE_JSON)
+
+    await query_pypi_simple(client=mock_client, package_name="flake8-annotations", cache=cache)
+    await query_pypi_simple(client=mock_client, package_name="flake8-annotations", cache=cache)
+    assert mock_client.get.call_count == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+@pytest.mark.asyncio
+async def test_query_pypi_simple_offline_miss_raises(tmp_path: Path, mocker: MockerFixture) -> None:
+    cache = MetadataCache(cache_dir=tmp_path, offline=True)
+    mock_client = mocker.AsyncMock()
+
+    with pytest.raises(LookupError, match="offline"):
+        await query_pypi_simple(client=mock_client, package_name="flake8-annotations", cache=cache)
+
+    mock_client.get.assert_not_called()
+
+
+REQUIRES_PYTHON_CASES = (
+    (None, ((3, 12),), True),
+    ("", ((3, 12),), True),
+    ("not a specifier", ((3, 12),), True),
+    (">=3.12", ((3, 11),), False),
+    (">=3.12", ((3, 11), (3, 12)), True),
+    (">=3.12.1", ((3, 12),), True),
+    ("<3.12", ((3, 12),), False),
+    ("~=3.13.0rc1", ((3, 13),), True),
+)
+
+
+@pytest.mark.parametrize(
+    ("requires_python", "python_versions", "truth_allows"), REQUIRES_PYTHON_CASES
+)
+def test_allows_python(
+    requires_python: str | None, python_versions: tuple[tuple[int, int]], truth_allows: bool
+) -> None:
+    assert allows_python(requires_python, python_versions) == truth_allows
+
+
+def _simple_file(filename: str, requires_python: str | None = None) -> dict[str, t.Any]:
+    return {"url": f"https://a.b.c/{filename}", "requires-python": requires_python}
+
+
+PROJECT_JSON = {
+    "files": [
+        _simple_file("numpy-1.26.4-cp39-cp39-win_amd64.whl", ">=3.9"),
+        _simple_file("numpy-1.26.4-cp312-cp312-win_amd64.whl", ">=3.9"),
+        _simple_file(
+            "numpy-2.3.0-cp312-cp312-manylinux_2_17_x86_64.manylinux2014_x86_64.whl", ">=3.11"
+        ),
+        _simple_file("numpy-2.3.0-cp312-cp312-win_amd64.whl", ">=3.11"),
+        _simple_file("numpy-2.3.0-cp313-cp313-win_amd64.whl", ">=3.11"),
+        _simple_file("numpy-2.3.0-pp311-pypy311_pp73-win_amd64.whl", ">=3.11"),
+        _simple_file("numpy-2.3.0-py3-none-any.whl", ">=3.13"),
+        _simple_file("numpy-2.3.0.tar.gz", ">=3.11"),
+    ],
+    "versions": ["1.26.4", "2.3.0"],
+}
+
+
+def test_simple_project_compatible_wheels() -> None:
+    project = SimpleProject.from_json(PROJECT_JSON)
+    assert project.versions == [Version("2.3.0"), Version("1.26.4")]
+
+    wheels = project.compatible_wheels(
+        Version("2.3.0"), python_versions=((3, 12),), platforms=("win_amd64",)
+    )
+    assert [p.wheel_name for p in wheels] == ["numpy-2.3.0-cp312-cp312-win_amd64.whl"]
+
+    # Specs are only built for the compatible wheels
+    assert len(project._specs) == 1
+
+
+def test_simple_project_compatible_wheels_best_only() -> None:
+    project = SimpleProject.from_json(PROJECT_JSON)
+    wheels = project.compatible_wheels(
+        Version("2.3.0"), python_versions=((3, 13),), platforms=("win_amd64",), best_only=True
+    )
+
+    assert [p.wheel_name for p in wheels] == ["numpy-2.3.0-cp313-cp313-win_amd64.whl"]
+
+
+def test_simple_project_wheels() -> None:
+    project = SimpleProject.from_json(PROJECT_JSON)
+
+    assert {p.wheel_name for p in project.wheels(Version("1.26.4"))} == {
+        "numpy-1.26.4-cp39-cp39-win_amd64.whl",
+        "numpy-1.26.4-cp312-cp312-win_amd64.whl",
+    }
+    assert project.wheels(Version("3.0.0")) == []
+    assert len(project.all_wheels()) == 7
+
+
+@pytest.mark.asyncio
+async def test_project_memo(mocker: MockerFixture) -> None:
+    mock_client = mocker.AsyncMock()
+    mock_client.get.return_value = DummyResponse(SAMPLE_RESPONSE_JSON)
+
+    memo = ProjectMemo()
+    first = await memo.get(client=mock_client, package_name="flake8-annotations")
+    second = await memo.get(client=mock_client, package_name="Flake8_Annotations")
+
+    assert first is second
+    assert mock_client.get.call_count == 1
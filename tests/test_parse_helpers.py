@@ -9,8 +9,10 @@ from packaging.version import Version
 from wheely_bucket.parse_lockfile import (
     PIP_HTTP_CACHE,
     PackageSpec,
+    _parse_lock_hash,
     is_compatible_with,
     parse_project,
+    supported_tags,
 )
 
 
@@ -41,7 +43,7 @@ def test_package_from_lock_spec() -> None:
         "wheels": [
             {
                 "url": "https://a.b.c/packages/def/pip-25.2-py3-none-any.whl",
-                "hash": "...",
+                "hash": "sha256:abc123",
                 "size": 1752557,
                 "upload-time": "2025-07-30T21:50:13.323Z",
             }
@@ -56,7 +58,10 @@ def test_package_from_lock_spec() -> None:
         tags=parse_tag("py3-none-any"),
     )
 
-    assert PackageSpec.from_lock(LOCK_SPEC) == {TRUTH_P}
+    (p,) = PackageSpec.from_lock(LOCK_SPEC)
+    assert p == TRUTH_P
+    assert p.sha256 == "abc123"
+    assert p.size == 1752557
 
 
 def test_package_from_lock_spec_no_wheels() -> None:
@@ -75,6 +80,20 @@ def test_package_from_lock_spec_no_wheels() -> None:
     assert PackageSpec.from_lock(LOCK_SPEC) == set()
 
 
+LOCK_HASH_CASES = (
+    ("sha256:abc123", "abc123"),
+    ("sha512:abc123", None),
+    ("sha256:", None),
+    ("...", None),
+    (None, None),
+)
+
+
+@pytest.mark.parametrize(("lock_hash", "truth_digest"), LOCK_HASH_CASES)
+def test_parse_lock_hash(lock_hash: str | None, truth_digest: str | None) -> None:
+    assert _parse_lock_hash(lock_hash) == truth_digest
+
+
 def test_url_hash() -> None:
     WHEEL_URL = "https://a.b.c/packages/def/pip-25.2-py3-none-any.whl"
     p = PackageSpec.from_url(WHEEL_URL)
@@ -185,3 +204,18 @@ def test_is_compatible_with(
         is_compatible_with(tags=tags, python_version=python_version, platforms=platforms)
         == truth_out
     )
+
+
+def test_supported_tags_priority() -> None:
+    supported = supported_tags(python_version=(3, 13), platforms=("win_amd64",))
+
+    assert supported[next(iter(parse_tag("cp313-cp313-win_amd64")))] == 0
+    assert (
+        supported[next(iter(parse_tag("cp313-abi3-win_amd64")))]
+        < supported[next(iter(parse_tag("py3-none-any")))]
+    )
+    assert next(iter(parse_tag("cp313-cp313-macosx_11_0_arm64"))) not in supported
+
+
+def test_supported_tags_cached() -> None:
+    assert supported_tags((3, 13), ("win_amd64",)) is supported_tags((3, 13), ("win_amd64",))
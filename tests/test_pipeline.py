@@ -0,0 +1,136 @@
+from collections import abc
+from pathlib import Path
+
+import pytest
+from pytest_mock import MockerFixture
+
+from wheely_bucket import pipeline
+from wheely_bucket.lock_index import LockIndex
+from wheely_bucket.pipeline import PipelineStats, discover_lockfiles, stream_project_wheels
+
+DUMMY_LOCK = """\
+version = 1
+revision = 3
+requires-python = ">=3.12"
+
+[[package]]
+name = "cogapp"
+version = "3.5.1"
+source = { registry = "https://pypi.org/simple" }
+wheels = [
+    { url = "https://a.b.c/packages/abc/cogapp-3.5.1-py3-none-any.whl", hash = "sha256:abc", size = 30390 },
+]
+
+[[package]]
+name = "orjson"
+version = "3.11.3"
+source = { registry = "https://pypi.org/simple" }
+wheels = [
+    { url = "https://a.b.c/packages/def/orjson-3.11.3-cp312-cp312-win_amd64.whl", hash = "sha256:def", size = 131021 },
+    { url = "https://a.b.c/packages/ghi/orjson-3.11.3-cp313-cp313-win_amd64.whl", hash = "sha256:ghi", size = 131062 },
+]
+"""
+
+
+@pytest.fixture
+def project_tree(tmp_path: Path) -> Path:
+    for proj in ("proj_a", "proj_b", "nested/proj_c"):
+        lf = tmp_path / proj / "uv.lock"
+        lf.parent.mkdir(parents=True)
+        lf.write_text(DUMMY_LOCK)
+
+    (tmp_path / "proj_a" / "not_a.lock").write_text("")
+    return tmp_path
+
+
+@pytest.fixture
+def lockfiles(project_tree: Path) -> list[Path]:
+    return sorted(project_tree.rglob("uv.lock"))
+
+
+async def _collect(ait: abc.AsyncIterable[Path]) -> list[Path]:
+    return [x async for x in ait]
+
+
+async def _aiter_lockfiles(lockfiles: abc.Iterable[Path]) -> abc.AsyncIterator[Path]:
+    for lf in lockfiles:
+        yield lf
+
+
+@pytest.mark.asyncio
+async def test_discover_lockfiles(project_tree: Path, lockfiles: list[Path]) -> None:
+    found = await _collect(discover_lockfiles(project_tree, "**/uv.lock"))
+    assert sorted(found) == lockfiles
+
+
+@pytest.mark.asyncio
+async def test_discover_lockfiles_batches(project_tree: Path, mocker: MockerFixture) -> None:
+    mocker.patch("wheely_bucket.pipeline.DISCOVERY_BATCH_SIZE", 1)
+    found = await _collect(discover_lockfiles(project_tree, "**/uv.lock"))
+    assert len(found) == 3
+
+
+@pytest.mark.asyncio
+async def test_stream_project_wheels_dedupes_and_filters(lockfiles: list[Path]) -> None:
+    stats = PipelineStats()
+    wheels = [
+        p
+        async for p in stream_project_wheels(
+            _aiter_lockfiles(lockfiles),
+            python_versions=((3, 13),),
+            platforms=("win_amd64",),
+            stats=stats,
+        )
+    ]
+
+    assert sorted(p.wheel_name for p in wheels) == [
+        "cogapp-3.5.1-py3-none-any.whl",
+        "orjson-3.11.3-cp313-cp313-win_amd64.whl",
+    ]
+    assert stats == PipelineStats(lockfiles=3, wheels=9, unique_wheels=3, compatible_wheels=2)
+
+
+@pytest.mark.asyncio
+async def test_stream_project_wheels_uses_index(tmp_path: Path, lockfiles: list[Path]) -> None:
+    index = LockIndex.load(tmp_path / "lock_index.json")
+    first = [p async for p in stream_project_wheels(_aiter_lockfiles(lockfiles), index=index)]
+    index.save()
+
+    reloaded = LockIndex.load(tmp_path / "lock_index.json")
+    second = [p async for p in stream_project_wheels(_aiter_lockfiles(lockfiles), index=reloaded)]
+
+    assert set(second) == set(first)
+    assert (reloaded.hits, reloaded.misses) == (3, 0)
+
+
+@pytest.mark.asyncio
+async def test_stream_project_wheels_parses_few_lockfiles_in_thread(
+    lockfiles: list[Path], mocker: MockerFixture
+) -> None:
+    spy_pool = mocker.spy(pipeline, "ProcessPoolExecutor")
+    wheels = [p async for p in stream_project_wheels(_aiter_lockfiles(lockfiles))]
+
+    assert wheels
+    spy_pool.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_stream_project_wheels_parallel(lockfiles: list[Path], mocker: MockerFixture) -> None:
+    mocker.patch("wheely_bucket.pipeline.PARALLEL_PARSE_THRESHOLD", 2)
+    spy_pool = mocker.spy(pipeline, "ProcessPoolExecutor")
+
+    stats = PipelineStats()
+    wheels = [
+        p
+        async for p in stream_project_wheels(
+            _aiter_lockfiles(lockfiles),
+            python_versions=((3, 13),),
+            platforms=("win_amd64",),
+            max_workers=2,
+            stats=stats,
+        )
+    ]
+
+    assert len(wheels) == 2
+    assert stats.lockfiles == 3
+    spy_pool.assert_called_once_with(max_workers=2, mp_context=pipeline.PARSE_MP_CONTEXT)
@@ -0,0 +1,214 @@
+import typing as t
+
+import httpx
+import pytest
+from packaging.requirements import Requirement
+
+from wheely_bucket.parse_lockfile import PackageSpec
+from wheely_bucket.resolve import (
+    ResolveStats,
+    _platform_markers,
+    dependency_applies,
+    stream_transitive_wheels,
+    target_environments,
+)
+from wheely_bucket.retry import RetryPolicy
+
+NO_WAIT_RETRY = RetryPolicy(max_attempts=1, base_delay=0)
+
+PLATFORM_MARKER_CASES = (
+    ("win_amd64", "win32", "AMD64"),
+    ("win32", "win32", "x86"),
+    ("macosx_11_0_arm64", "darwin", "arm64"),
+    ("manylinux_2_17_x86_64", "linux", "x86_64"),
+    ("manylinux2014_aarch64", "linux", "aarch64"),
+    ("musllinux_1_2_x86_64", "linux", "x86_64"),
+    ("linux_x86_64", "linux", "x86_64"),
+)
+
+
+@pytest.mark.parametrize(("platform", "sys_platform", "machine"), PLATFORM_MARKER_CASES)
+def test_platform_markers(platform: str, sys_platform: str, machine: str) -> None:
+    markers = _platform_markers(platform)
+    assert markers["sys_platform"] == sys_platform
+    assert markers["platform_machine"] == machine
+
+
+def test_platform_markers_unknown() -> None:
+    assert _platform_markers("any") == {}
+
+
+def test_target_environments() -> None:
+    envs = target_environments(python_versions=((3, 12), (3, 13)), platforms=("win_amd64",))
+    assert [(e["python_version"], e["sys_platform"]) for e in envs] == [
+        ("3.12", "win32"),
+        ("3.13", "win32"),
+    ]
+
+
+DEPENDENCY_CASES = (
+    ("click>=8.0.0", (), True),
+    ("colorama; platform_system == 'Windows'", (), True),
+    ("uvloop; sys_platform != 'win32'", (), False),
+    ("tomli; python_version < '3.11'", (), False),
+    ("aiohttp; extra == 'd'", (), False),
+    ("aiohttp; extra == 'd'", ("d",), True),
+)
+
+
+@pytest.mark.parametrize(("dep", "extras", "truth_applies"), DEPENDENCY_CASES)
+def test_dependency_applies(dep: str, extras: tuple[str, ...], truth_applies: bool) -> None:
+    envs = target_environments(python_versions=((3, 12),), platforms=("win_amd64",))
+    assert dependency_applies(Requirement(dep), envs, extras=extras) == truth_applies
+
+
+def _wheel(name: str, version: str, tag: str, core_metadata: bool = True) -> dict[str, t.Any]:
+    return {
+        "filename": f"{name}-{version}-{tag}.whl",
+        "url": f"https://files.test/{name}-{version}-{tag}.whl",
+        "hashes": {"sha256": "abc"},
+        "core-metadata": core_metadata,
+    }
+
+
+SIMPLE_PAGES = {
+    "black": {
+        "files": [
+            _wheel("black", "24.1.0", "py3-none-any"),
+            _wheel("black", "25.1.0", "py3-none-any"),
+            _wheel("black", "25.1.0", "cp312-cp312-win_amd64"),
+        ],
+        "versions": ["24.1.0", "25.1.0"],
+    },
+    "click": {
+        "files": [_wheel("click", "8.1.8", "py3-none-any")],
+        "versions": ["8.1.8"],
+    },
+    "colorama": {
+        # Legacy PEP 658 key
+        "files": [
+            {
+                "filename": "colorama-0.4.6-py2.py3-none-any.whl",
+                "url": "https://files.test/colorama-0.4.6-py2.py3-none-any.whl",
+                "data-dist-info-metadata": {"sha256": "def"},
+            }
+        ],
+        "versions": ["0.4.6"],
+    },
+    "uvloop": {
+        "files": [
+            _wheel("uvloop", "0.21.0", "cp312-cp312-manylinux_2_17_x86_64", core_metadata=False)
+        ],
+        "versions": ["0.21.0"],
+    },
+}
+
+METADATA = {
+    "black-25.1.0-py3-none-any.whl": (
+        "Metadata-Version: 2.1\n"
+        "Name: black\n"
+        "Version: 25.1.0\n"
+        "Requires-Dist: click>=8.0.0\n"
+        "Requires-Dist: uvloop>=0.15.2; sys_platform != 'win32'\n"
+        "Requires-Dist: missing-dep; extra == 'd'\n"
+    ),
+    "click-8.1.8-py3-none-any.whl": (
+        "Metadata-Version: 2.1\n"
+        "Name: click\n"
+        "Version: 8.1.8\n"
+        "Requires-Dist: colorama; platform_system == 'Windows'\n"
+    ),
+    "colorama-0.4.6-py2.py3-none-any.whl": (
+        "Metadata-Version: 2.1\nName: colorama\nVersion: 0.4.6\n"
+    ),
+}
+
+
+def _index_client(requested: list[str]) -> httpx.AsyncClient:
+    def _handler(request: httpx.Request) -> httpx.Response:
+        requested.append(str(request.url))
+        if request.url.host == "pypi.org":
+            project = request.url.path.strip("/").split("/")[-1]
+            if project not in SIMPLE_PAGES:
+                return httpx.Response(404)
+            return httpx.Response(200, json=SIMPLE_PAGES[project])
+
+        wheel_name = request.url.path.strip("/").removesuffix(".metadata")
+        return httpx.Response(200, text=METADATA[wheel_name])
+
+    return httpx.AsyncClient(transport=httpx.MockTransport(_handler))
+
+
+@pytest.mark.asyncio
+async def test_stream_transitive_wheels() -> None:
+    requested: list[str] = []
+    stats = ResolveStats()
+    async with _index_client(requested) as client:
+        wheels = {
+            p
+            async for p in stream_transitive_wheels(
+                client,
+                reqs=(Requirement("black"), Requirement("click")),
+                python_versions=((3, 12),),
+                platforms=("win_amd64",),
+                retry=NO_WAIT_RETRY,
+                stats=stats,
+            )
+        }
+
+    assert {p.wheel_name for p in wheels} == {
+        "black-25.1.0-py3-none-any.whl",
+        "black-25.1.0-cp312-cp312-win_amd64.whl",
+        "click-8.1.8-py3-none-any.whl",
+        "colorama-0.4.6-py2.py3-none-any.whl",
+    }
+
+    # Only metadata files are fetched, and each project & release is only fetched once
+    assert not any(url.endswith(".whl") for url in requested)
+    assert sum("click" in url for url in requested) == 2
+    assert stats.projects == 3
+    assert stats.metadata_fetched == 3
+
+
+@pytest.mark.asyncio
+async def test_stream_transitive_wheels_records_failures() -> None:
+    failures: dict[str, str] = {}
+    async with _index_client([]) as client:
+        wheels = [
+            p
+            async for p in stream_transitive_wheels(
+                client,
+                reqs=(Requirement("black[d]"), Requirement("black<1")),
+                python_versions=((3, 12),),
+                platforms=("win_amd64",),
+                retry=NO_WAIT_RETRY,
+                failures=failures,
+            )
+        ]
+
+    assert wheels
+    assert set(failures) == {"missing-dep", "black<1"}
+
+
+@pytest.mark.asyncio
+async def test_stream_transitive_wheels_missing_metadata() -> None:
+    stats = ResolveStats()
+    async with _index_client([]) as client:
+        wheels = [
+            p
+            async for p in stream_transitive_wheels(
+                client,
+                reqs=(Requirement("uvloop"),),
+                python_versions=((3, 12),),
+                platforms=("manylinux_2_17_x86_64",),
+                retry=NO_WAIT_RETRY,
+                stats=stats,
+            )
+        ]
+
+    assert wheels == [
+        PackageSpec.from_url(
+            "https://files.test/uvloop-0.21.0-cp312-cp312-manylinux_2_17_x86_64.whl"
+        )
+    ]
+    assert stats.missing_metadata == ["uvloop==0.21.0"]
@@ -0,0 +1,119 @@
+from datetime import UTC, datetime, timedelta
+from email.utils import format_datetime
+
+import httpx
+import pytest
+
+from wheely_bucket.retry import (
+    RetryPolicy,
+    RetryableStatusError,
+    call_with_retry,
+    check_response,
+    parse_retry_after,
+)
+
+NO_WAIT_RETRY = RetryPolicy(max_attempts=3, base_delay=0)
+
+RETRY_AFTER_CASES = (
+    (None, None),
+    ("5", 5),
+    ("-5", 0),
+    ("not a date", None),
+    (format_datetime(datetime.now(UTC) - timedelta(hours=1), usegmt=True), 0),
+)
+
+
+@pytest.mark.parametrize(("header", "truth_delay"), RETRY_AFTER_CASES)
+def test_parse_retry_after(header: str | None, truth_delay: float | None) -> None:
+    assert parse_retry_after(header) == truth_delay
+
+
+def test_parse_retry_after_future_date() -> None:
+    retry_at = format_datetime(datetime.now(UTC) + timedelta(seconds=60), usegmt=True)
+    delay = parse_retry_after(retry_at)
+
+    assert delay is not None
+    assert 50 < delay <= 60
+
+
+def test_backoff_bounds() -> None:
+    policy = RetryPolicy(base_delay=1, max_delay=5, jitter=0.5)
+
+    assert 0.5 <= policy.backoff(1) <= 1
+    assert 2 <= policy.backoff(3) <= 4
+    assert 2.5 <= policy.backoff(10) <= 5
+
+
+def test_backoff_prefers_retry_after() -> None:
+    assert RetryPolicy().backoff(1, retry_after=12) == 12
+
+
+def test_backoff_caps_retry_after() -> None:
+    assert RetryPolicy(max_delay=30).backoff(1, retry_after=3600) == 30
+
+
+@pytest.mark.parametrize("retry_after", (float("inf"), float("nan"), -1))
+def test_backoff_ignores_invalid_retry_after(retry_after: float) -> None:
+    policy = RetryPolicy(base_delay=1, jitter=0)
+    assert policy.backoff(1, retry_after=retry_after) == 1
+
+
+CHECK_RESPONSE_CASES = (
+    (200, None),
+    (429, RetryableStatusError),
+    (503, RetryableStatusError),
+    (404, httpx.HTTPStatusError),
+)
+
+
+@pytest.mark.parametrize(("status_code", "truth_exception"), CHECK_RESPONSE_CASES)
+def test_check_response(status_code: int, truth_exception: type[Exception] | None) -> None:
+    r = httpx.Response(status_code, request=httpx.Request("GET", "https://a.b.c"))
+
+    if truth_exception is None:
+        check_response(r)
+    else:
+        with pytest.raises(truth_exception):
+            check_response(r)
+
+
+@pytest.mark.asyncio
+async def test_call_with_retry_recovers() -> None:
+    attempts = []
+
+    async def _flaky() -> str:
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise httpx.ConnectError("connection reset")
+        return "ok"
+
+    assert await call_with_retry(_flaky, policy=NO_WAIT_RETRY, description="flaky") == "ok"
+    assert len(attempts) == 3
+
+
+@pytest.mark.asyncio
+async def test_call_with_retry_exhausted_raises() -> None:
+    attempts = []
+
+    async def _broken() -> None:
+        attempts.append(1)
+        raise httpx.ReadTimeout("timed out")
+
+    with pytest.raises(httpx.ReadTimeout):
+        await call_with_retry(_broken, policy=NO_WAIT_RETRY, description="broken")
+
+    assert len(attempts) == NO_WAIT_RETRY.max_attempts
+
+
+@pytest.mark.asyncio
+async def test_call_with_retry_non_retryable_raises_immediately() -> None:
+    attempts = []
+
+    async def _invalid() -> None:
+        attempts.append(1)
+        raise ValueError("nope")
+
+    with pytest.raises(ValueError, match="nope"):
+        await call_with_retry(_invalid, policy=NO_WAIT_RETRY, description="invalid")
+
+    assert len(attempts) == 1
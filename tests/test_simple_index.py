@@ -0,0 +1,76 @@
+import hashlib
+import json
+from pathlib import Path
+
+import pytest
+from pytest_mock import MockerFixture
+
+from tests.conftest import WHEEL_BYTES, WHEEL_SHA256
+from wheely_bucket.simple_index import update_simple_index
+
+BLACK_WHEELS = (
+    "black-25.1.0-py3-none-any.whl",
+    "black-25.1.0-cp313-cp313-win_amd64.whl",
+)
+COGAPP_WHEEL = "cogapp-3.5.1-py3-none-any.whl"
+
+
+@pytest.fixture
+def bucket(tmp_path: Path) -> Path:
+    for wheel_name in (*BLACK_WHEELS, COGAPP_WHEEL):
+        (tmp_path / wheel_name).write_bytes(WHEEL_BYTES)
+    (tmp_path / "not_a_wheel.txt").touch()
+    (tmp_path / "not-a-wheel.whl").touch()
+
+    return tmp_path
+
+
+def _load_page(bucket: Path, project: str) -> dict:
+    return json.loads((bucket / "simple" / project / "index.json").read_bytes())  # type: ignore[no-any-return]
+
+
+def test_update_simple_index(bucket: Path) -> None:
+    assert update_simple_index(bucket) == 2
+
+    root = json.loads((bucket / "simple" / "index.json").read_bytes())
+    assert [p["name"] for p in root["projects"]] == ["black", "cogapp"]
+
+    page = _load_page(bucket, "black")
+    assert page["versions"] == ["25.1.0"]
+    assert sorted(f["filename"] for f in page["files"]) == sorted(BLACK_WHEELS)
+    assert all(f["hashes"]["sha256"] == WHEEL_SHA256 for f in page["files"])
+    assert all(f["url"].startswith("../../") for f in page["files"])
+
+    html_page = (bucket / "simple" / "black" / "index.html").read_text()
+    assert f'href="../../{BLACK_WHEELS[0]}#sha256={WHEEL_SHA256}"' in html_page
+
+
+def test_update_simple_index_incremental(bucket: Path, mocker: MockerFixture) -> None:
+    update_simple_index(bucket)
+    hasher = mocker.spy(hashlib, "file_digest")
+
+    new_wheel = "cogapp-3.5.2-py3-none-any.whl"
+    (bucket / new_wheel).write_bytes(WHEEL_BYTES)
+    assert update_simple_index(bucket, projects={"cogapp"}, known_digests={new_wheel: "abc"}) == 1
+
+    # Previously indexed digests are reused & known digests are trusted
+    assert hasher.call_count == 0
+    page = _load_page(bucket, "cogapp")
+    assert page["versions"] == ["3.5.1", "3.5.2"]
+    assert {f["filename"]: f["hashes"]["sha256"] for f in page["files"]} == {
+        COGAPP_WHEEL: WHEEL_SHA256,
+        new_wheel: "abc",
+    }
+
+
+def test_update_simple_index_adds_missing_pages(bucket: Path) -> None:
+    assert update_simple_index(bucket, projects=()) == 2
+
+
+def test_update_simple_index_removes_stale_pages(bucket: Path) -> None:
+    update_simple_index(bucket)
+    (bucket / COGAPP_WHEEL).unlink()
+
+    assert update_simple_index(bucket, projects={"cogapp"}) == 0
+    assert not (bucket / "simple" / "cogapp").exists()
+    assert "cogapp" not in (bucket / "simple" / "index.html").read_text()
@@ -0,0 +1,125 @@
+import typing as t
+from collections import abc
+from pathlib import Path
+
+import httpx
+import pytest
+from pytest_mock import MockerFixture
+
+from tests.conftest import WHEEL_BYTES, WHEEL_SHA256
+from wheely_bucket.cli import _sync_pipeline
+from wheely_bucket.dl_manager import DownloadOptions
+from wheely_bucket.metadata_cache import MetadataCache
+from wheely_bucket.parse_lockfile import PackageSpec
+from wheely_bucket.sync import plan_sync, scan_wheels, sync_bucket
+
+KEEP_PACKAGE = PackageSpec.from_url(
+    "https://a.b.c/black-25.1.0-py3-none-any.whl", sha256=WHEEL_SHA256, size=len(WHEEL_BYTES)
+)
+ADD_PACKAGE = PackageSpec.from_url(
+    "https://a.b.c/cogapp-3.5.1-py3-none-any.whl", sha256=WHEEL_SHA256, size=len(WHEEL_BYTES)
+)
+STALE_WHEEL = "black-24.1.0-py3-none-any.whl"
+
+
+@pytest.fixture
+def bucket(tmp_path: Path) -> Path:
+    (tmp_path / KEEP_PACKAGE.wheel_name).write_bytes(WHEEL_BYTES)
+    (tmp_path / STALE_WHEEL).write_bytes(WHEEL_BYTES)
+    (tmp_path / "simple").mkdir()
+    (tmp_path / "notes.txt").touch()
+
+    return tmp_path
+
+
+def test_scan_wheels(bucket: Path) -> None:
+    assert scan_wheels(bucket) == {
+        KEEP_PACKAGE.wheel_name: len(WHEEL_BYTES),
+        STALE_WHEEL: len(WHEEL_BYTES),
+    }
+
+
+def test_scan_wheels_missing_dest(tmp_path: Path) -> None:
+    assert scan_wheels(tmp_path / "missing") == {}
+
+
+def test_plan_sync(bucket: Path) -> None:
+    plan = plan_sync((KEEP_PACKAGE, ADD_PACKAGE, ADD_PACKAGE), scan_wheels(bucket))
+
+    assert plan.to_add == [ADD_PACKAGE]
+    assert plan.to_keep == [KEEP_PACKAGE]
+    assert plan.to_remove == [STALE_WHEEL]
+
+
+def test_plan_sync_size_mismatch() -> None:
+    plan = plan_sync((KEEP_PACKAGE,), {KEEP_PACKAGE.wheel_name: 1})
+    assert plan.to_add == [KEEP_PACKAGE]
+
+
+@pytest.mark.asyncio
+async def test_sync_bucket_dry_run(bucket: Path, capsys: pytest.CaptureFixture) -> None:
+    plan, summary = await sync_bucket((KEEP_PACKAGE, ADD_PACKAGE), bucket, prune=True, dry_run=True)
+
+    captured = capsys.readouterr()
+    assert f"+ {ADD_PACKAGE.wheel_name}" in captured.out
+    assert f"- {STALE_WHEEL}" in captured.out
+    assert summary.downloaded == 0
+    assert not (bucket / ADD_PACKAGE.wheel_name).exists()
+    assert (bucket / STALE_WHEEL).exists()
+
+
+@pytest.mark.asyncio
+async def test_sync_bucket_prune(bucket: Path, wheel_client: httpx.AsyncClient) -> None:
+    _, summary = await sync_bucket(
+        (KEEP_PACKAGE, ADD_PACKAGE), bucket, prune=True, client=wheel_client
+    )
+
+    assert (summary.downloaded, summary.existing) == (1, 1)
+    assert scan_wheels(bucket).keys() == {KEEP_PACKAGE.wheel_name, ADD_PACKAGE.wheel_name}
+
+
+@pytest.mark.asyncio
+async def test_sync_bucket_no_prune(bucket: Path, wheel_client: httpx.AsyncClient) -> None:
+    await sync_bucket((KEEP_PACKAGE, ADD_PACKAGE), bucket, client=wheel_client)
+
+    assert (bucket / STALE_WHEEL).exists()
+
+
+@pytest.mark.asyncio
+async def test_sync_bucket_verify_existing(bucket: Path, wheel_client: httpx.AsyncClient) -> None:
+    (bucket / KEEP_PACKAGE.wheel_name).write_bytes(WHEEL_BYTES.upper())
+
+    plan, summary = await sync_bucket(
+        (KEEP_PACKAGE,),
+        bucket,
+        client=wheel_client,
+        options=DownloadOptions(verify_existing=True),
+    )
+
+    assert plan.to_add == [KEEP_PACKAGE]
+    assert summary.downloaded == 1
+    assert (bucket / KEEP_PACKAGE.wheel_name).read_bytes() == WHEEL_BYTES
+
+
+@pytest.mark.asyncio
+async def test_sync_pipeline_queries_use_metadata_cache(
+    bucket: Path, tmp_path: Path, mocker: MockerFixture
+) -> None:
+    async def _queries(**kwargs: t.Any) -> abc.AsyncIterator[PackageSpec]:
+        yield KEEP_PACKAGE
+
+    queries = mocker.patch("wheely_bucket.cli.stream_filtered_queries", side_effect=_queries)
+    cache = MetadataCache(cache_dir=tmp_path / "cache")
+
+    await _sync_pipeline(
+        topdir=None,
+        pattern="uv.lock",
+        packages=["black"],
+        dest=bucket,
+        python_version=None,
+        platform=None,
+        dry_run=True,
+        cache=cache,
+    )
+
+    assert queries.call_args.kwargs["cache"] is cache
@@ -0,0 +1,112 @@
+import json
+from collections import abc
+from pathlib import Path
+
+import pytest
+
+from wheely_bucket.dl_manager import DownloadSummary
+from wheely_bucket.parse_lockfile import PackageSpec
+from wheely_bucket.targets import MANIFEST_DIRNAME, Target, TargetManifests, target_matrix
+
+PY312_WIN = Target(python_version=(3, 12), platform="win_amd64")
+PY313_WIN = Target(python_version=(3, 13), platform="win_amd64")
+PY312_LINUX = Target(python_version=(3, 12), platform="manylinux_2_17_x86_64")
+
+PURE = PackageSpec.from_url("https://a.b.c/cogapp-3.5.1-py3-none-any.whl", sha256="abc", size=10)
+CP312_WIN = PackageSpec.from_url("https://a.b.c/orjson-3.11.3-cp312-cp312-win_amd64.whl")
+CP313_WIN = PackageSpec.from_url("https://a.b.c/orjson-3.11.3-cp313-cp313-win_amd64.whl")
+MACOS = PackageSpec.from_url("https://a.b.c/orjson-3.11.3-cp312-cp312-macosx_11_0_arm64.whl")
+
+
+def test_target_matrix() -> None:
+    targets = target_matrix([(3, 12), (3, 13), (3, 12)], ["win_amd64", "manylinux_2_17_x86_64"])
+
+    assert targets == [
+        PY312_WIN,
+        PY312_LINUX,
+        PY313_WIN,
+        Target(python_version=(3, 13), platform="manylinux_2_17_x86_64"),
+    ]
+    assert target_matrix() == [Target()]
+
+
+def test_target_name() -> None:
+    assert PY312_WIN.name == "py3.12-win_amd64"
+    assert Target().name == "pycurrent-current"
+
+
+def test_assign() -> None:
+    manifests = TargetManifests([PY312_WIN, PY313_WIN, PY312_LINUX])
+
+    assert manifests.assign(PURE)
+    assert manifests.assign(CP312_WIN)
+    assert manifests.assign(CP313_WIN)
+    assert not manifests.assign(MACOS)
+    assert not manifests.assign(PURE)
+
+    assert manifests.assigned == {
+        PY312_WIN: {PURE.wheel_name, CP312_WIN.wheel_name},
+        PY313_WIN: {PURE.wheel_name, CP313_WIN.wheel_name},
+        PY312_LINUX: {PURE.wheel_name},
+    }
+
+
+@pytest.mark.asyncio
+async def test_select_yields_each_wheel_once() -> None:
+    async def _wheels() -> abc.AsyncIterator[PackageSpec]:
+        for p in (PURE, CP312_WIN, MACOS, PURE, CP312_WIN):
+            yield p
+
+    manifests = TargetManifests([PY312_WIN, PY313_WIN])
+    selected = [p async for p in manifests.select(_wheels())]
+
+    assert selected == [PURE, CP312_WIN]
+
+
+def test_write_manifests(tmp_path: Path) -> None:
+    manifests = TargetManifests([PY312_WIN, PY313_WIN])
+    for p in (PURE, CP312_WIN, CP313_WIN):
+        manifests.assign(p)
+
+    summary = DownloadSummary(
+        added={CP312_WIN.wheel_name: "def"}, failed={CP313_WIN.wheel_name: "nope"}
+    )
+    written = manifests.write(tmp_path, summary)
+
+    assert written == [
+        tmp_path / MANIFEST_DIRNAME / "py3.12-win_amd64.json",
+        tmp_path / MANIFEST_DIRNAME / "py3.13-win_amd64.json",
+    ]
+
+    py312 = json.loads(written[0].read_text())
+    assert py312["target"] == {
+        "name": "py3.12-win_amd64",
+        "python_version": "3.12",
+        "platform": "win_amd64",
+    }
+    assert py312["wheels"] == [
+        {"filename": PURE.wheel_name, "path": f"../{PURE.wheel_name}", "sha256": "abc", "size": 10},
+        {
+            "filename": CP312_WIN.wheel_name,
+            "path": f"../{CP312_WIN.wheel_name}",
+            "sha256": "def",
+            "size": None,
+        },
+    ]
+
+    py313 = json.loads(written[1].read_text())
+    assert [w["filename"] for w in py313["wheels"]] == [PURE.wheel_name]
+
+
+def test_manifest_best_only() -> None:
+    abi3 = PackageSpec.from_url("https://a.b.c/orjson-3.11.3-cp312-abi3-win_amd64.whl")
+    manifests = TargetManifests([PY312_WIN, PY313_WIN], best_only=True)
+    for p in (PURE, CP312_WIN, abi3):
+        manifests.assign(p)
+
+    summary = DownloadSummary()
+    py312 = manifests.manifest(PY312_WIN, summary)
+    py313 = manifests.manifest(PY313_WIN, summary)
+
+    assert [w["filename"] for w in py312["wheels"]] == [PURE.wheel_name, CP312_WIN.wheel_name]
+    assert [w["filename"] for w in py313["wheels"]] == [PURE.wheel_name, abi3.wheel_name]
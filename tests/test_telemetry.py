@@ -0,0 +1,157 @@
+import io
+import json
+from pathlib import Path
+
+import httpx
+import pytest
+
+from tests.conftest import WHEEL_BYTES, WHEEL_SHA256
+from wheely_bucket.dl_manager import DownloadOptions, PARTIAL_SUFFIX, download_packages
+from wheely_bucket.package_query import fetch_simple_project
+from wheely_bucket.parse_lockfile import PackageSpec
+from wheely_bucket.retry import RetryPolicy
+from wheely_bucket.telemetry import (
+    Event,
+    ProgressDisplay,
+    QuerySource,
+    RunTelemetry,
+    WheelSource,
+)
+
+
+def _telemetry() -> RunTelemetry:
+    telemetry = RunTelemetry()
+    telemetry.wheel("a.whl", WheelSource.NETWORK, n_bytes=100, duration=1, attempts=2)
+    telemetry.wheel("b.whl", WheelSource.NETWORK, n_bytes=300, duration=3)
+    telemetry.wheel("c.whl", WheelSource.PIP_CACHE, n_bytes=50)
+    telemetry.wheel("d.whl", WheelSource.DESTINATION, n_bytes=50)
+    telemetry.wheel("e.whl", WheelSource.FAILED, attempts=3, error="nope")
+    telemetry.query("black", QuerySource.CACHE, duration=0.5)
+
+    return telemetry
+
+
+def test_summary() -> None:
+    summary = _telemetry().summary()
+
+    assert summary["network_bytes"] == 400
+    assert summary["cache_hit_ratio"] == 0.5
+    assert summary["retries"] == 3
+    assert summary["wheels"]["network"] == {"count": 2, "bytes": 400, "duration": 4}
+    assert summary["queries"]["cache"]["count"] == 1
+    assert summary["transfer_duration"]["max"] == 3
+
+
+def test_summary_empty() -> None:
+    summary = RunTelemetry().summary()
+
+    assert summary["cache_hit_ratio"] == 0
+    assert summary["transfer_duration"] == {"p50": 0, "p95": 0, "max": 0}
+
+
+def test_write_json(tmp_path: Path) -> None:
+    report = tmp_path / "report.json"
+    _telemetry().write(report)
+
+    written = json.loads(report.read_text())
+    assert written["summary"]["network_bytes"] == 400
+    assert [e["name"] for e in written["events"]] == [
+        "a.whl",
+        "b.whl",
+        "c.whl",
+        "d.whl",
+        "e.whl",
+        "black",
+    ]
+
+
+def test_write_ndjson_appends(tmp_path: Path) -> None:
+    report = tmp_path / "report.ndjson"
+    _telemetry().write(report)
+    _telemetry().write(report)
+
+    records = [json.loads(line) for line in report.read_text().splitlines()]
+    assert len(records) == 14
+    assert [r["type"] for r in records].count("summary") == 2
+
+
+def test_progress_display() -> None:
+    stream = io.StringIO()
+    progress = ProgressDisplay(interval=0, stream=stream)
+    telemetry = RunTelemetry(on_event=progress)
+    telemetry.query("black", QuerySource.NETWORK)
+    telemetry.wheel("a.whl", WheelSource.NETWORK, n_bytes=2048)
+    telemetry.wheel("b.whl", WheelSource.FAILED)
+
+    assert (progress.queries, progress.wheels, progress.failed) == (1, 1, 1)
+    last_line = stream.getvalue().splitlines()[-1]
+    assert "1 wheels, 1 failed, 2.0 KiB transferred" in last_line
+
+
+def test_progress_display_throttled() -> None:
+    stream = io.StringIO()
+    progress = ProgressDisplay(interval=3600, stream=stream)
+    for _ in range(5):
+        progress(Event("wheel", "a.whl", WheelSource.DESTINATION))
+
+    assert len(stream.getvalue().splitlines()) == 1
+
+
+@pytest.mark.asyncio
+async def test_download_packages_telemetry(tmp_path: Path, wheel_client: httpx.AsyncClient) -> None:
+    existing = PackageSpec.from_url("https://a.b.c/black-25.1.0-py3-none-any.whl")
+    downloaded = PackageSpec.from_url("https://a.b.c/cogapp-3.5.1-py3-none-any.whl")
+    (tmp_path / existing.wheel_name).write_bytes(WHEEL_BYTES)
+
+    telemetry = RunTelemetry()
+    options = DownloadOptions(retry=RetryPolicy(max_attempts=1, base_delay=0), telemetry=telemetry)
+    await download_packages(
+        (existing, downloaded), dest=tmp_path, client=wheel_client, options=options
+    )
+
+    sources = {e.name: (e.source, e.n_bytes) for e in telemetry.events}
+    assert sources == {
+        existing.wheel_name: (WheelSource.DESTINATION, len(WHEEL_BYTES)),
+        downloaded.wheel_name: (WheelSource.NETWORK, len(WHEEL_BYTES)),
+    }
+
+
+@pytest.mark.asyncio
+async def test_download_packages_telemetry_resumed(tmp_path: Path) -> None:
+    p = PackageSpec.from_url("https://a.b.c/black-25.1.0-py3-none-any.whl", sha256=WHEEL_SHA256)
+    (tmp_path / f"{p.wheel_name}{PARTIAL_SUFFIX}").write_bytes(WHEEL_BYTES[:5])
+
+    def _handler(request: httpx.Request) -> httpx.Response:
+        content_range = f"bytes 5-{len(WHEEL_BYTES) - 1}/{len(WHEEL_BYTES)}"
+        return httpx.Response(
+            206, content=WHEEL_BYTES[5:], headers={"Content-Range": content_range}
+        )
+
+    telemetry = RunTelemetry()
+    options = DownloadOptions(retry=RetryPolicy(max_attempts=1, base_delay=0), telemetry=telemetry)
+    async with httpx.AsyncClient(transport=httpx.MockTransport(_handler)) as client:
+        await download_packages((p,), dest=tmp_path, client=client, options=options)
+
+    # Only the bytes actually streamed are counted, not the resumed prefix
+    assert [(e.source, e.n_bytes) for e in telemetry.events] == [
+        (WheelSource.NETWORK, len(WHEEL_BYTES) - 5)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_fetch_simple_project_telemetry() -> None:
+    def _handler(request: httpx.Request) -> httpx.Response:
+        if "missing" in request.url.path:
+            return httpx.Response(404)
+        return httpx.Response(200, json={"files": [], "versions": []})
+
+    telemetry = RunTelemetry()
+    async with httpx.AsyncClient(transport=httpx.MockTransport(_handler)) as client:
+        await fetch_simple_project(client=client, package_name="black", telemetry=telemetry)
+        with pytest.raises(httpx.HTTPStatusError):
+            await fetch_simple_project(client=client, package_name="missing", telemetry=telemetry)
+
+    assert [(e.name, e.source) for e in telemetry.events] == [
+        ("black", QuerySource.NETWORK),
+        ("missing", QuerySource.FAILED),
+    ]
@@ -0,0 +1,207 @@
+import asyncio
+import time
+from pathlib import Path
+
+import pytest
+from typer.testing import CliRunner
+
+from wheely_bucket.cli import wb_cli
+from wheely_bucket.throttle import (
+    AdaptiveLimiter,
+    BandwidthLimiter,
+    ConcurrencyLimiter,
+    HostLimiter,
+    SmallestFirstQueue,
+    WaitQueue,
+)
+
+
+@pytest.mark.parametrize("limiter_cls", (ConcurrencyLimiter, BandwidthLimiter))
+def test_invalid_limit_raises(limiter_cls: type[ConcurrencyLimiter | BandwidthLimiter]) -> None:
+    with pytest.raises(ValueError, match="must be"):
+        limiter_cls(0)
+
+
+@pytest.mark.parametrize("command", ("package", "project", "sync", "diff", "watch"))
+@pytest.mark.parametrize("option", ("--max-bandwidth", "--max-host-rate"))
+def test_cli_rejects_nonpositive_rates(command: str, option: str, tmp_path: Path) -> None:
+    args = {
+        "package": ["package", "cogapp"],
+        "project": ["project", str(tmp_path)],
+        "sync": ["sync", str(tmp_path)],
+        "diff": ["diff", str(tmp_path / "uv.lock"), "--base", str(tmp_path / "uv.lock")],
+        "watch": ["watch", str(tmp_path)],
+    }[command]
+    (tmp_path / "uv.lock").write_text("version = 1\npackage = []\n")
+
+    result = CliRunner().invoke(wb_cli, [*args, "--dest", str(tmp_path), option, "0"])
+
+    assert result.exit_code == 2
+    assert "must be positive" in result.output
+
+
+@pytest.mark.asyncio
+async def test_concurrency_limiter_caps_active() -> None:
+    limiter = ConcurrencyLimiter(limit=2)
+    peak = 0
+
+    async def _worker() -> None:
+        nonlocal peak
+        async with limiter:
+            peak = max(peak, limiter.active)
+            await asyncio.sleep(0.01)
+
+    await asyncio.gather(*(_worker() for _ in range(6)))
+    assert peak == 2
+    assert limiter.active == 0
+
+
+@pytest.mark.asyncio
+async def test_adaptive_limiter_grows_while_saturated() -> None:
+    limiter = AdaptiveLimiter(limit=1, max_limit=4, window=0)
+
+    await limiter.acquire()
+    await limiter.record_transfer(n_bytes=100, latency=0.1)
+    await limiter.release()
+    assert limiter.limit == 2
+
+
+@pytest.mark.asyncio
+async def test_adaptive_limiter_backs_off_on_latency() -> None:
+    limiter = AdaptiveLimiter(limit=2, window=0)
+
+    await limiter.acquire()
+    await limiter.acquire()
+    await limiter.record_transfer(n_bytes=100, latency=0.1)
+    assert limiter.limit == 3
+
+    await limiter.acquire()
+    await limiter.record_transfer(n_bytes=100, latency=10)
+    assert limiter.limit == 2
+
+
+@pytest.mark.asyncio
+async def test_adaptive_limiter_throttle_halves() -> None:
+    limiter = AdaptiveLimiter(limit=8)
+
+    await limiter.record_failure(throttled=True)
+    assert limiter.limit == 4
+
+    await limiter.record_failure()
+    assert limiter.limit == 3
+
+
+@pytest.mark.asyncio
+async def test_adaptive_limiter_respects_min_limit() -> None:
+    limiter = AdaptiveLimiter(limit=1)
+
+    await limiter.record_failure(throttled=True)
+    assert limiter.limit == 1
+
+
+@pytest.mark.asyncio
+async def test_bandwidth_limiter_delays() -> None:
+    limiter = BandwidthLimiter(bytes_per_second=1000)
+
+    start = time.monotonic()
+    await limiter.consume(1000)  # Initial burst allowance
+    await limiter.consume(100)
+    assert time.monotonic() - start >= 0.09
+
+
+def _admission_order(queue: WaitQueue, sizes: list[float | None]) -> list[float | None]:
+    tickets = {queue.push(size): size for size in sizes}
+    order = []
+    while (ticket := queue.peek()) is not None:
+        queue.admit(ticket)
+        order.append(tickets[ticket])
+
+    return order
+
+
+def test_wait_queue_fifo() -> None:
+    assert _admission_order(WaitQueue(), [300, 10, None, 20]) == [300, 10, None, 20]
+
+
+def test_smallest_first_queue_interleaves_oldest() -> None:
+    queue = SmallestFirstQueue(oldest_every=3)
+    order = _admission_order(queue, [500, 400, 10, None, 30, 20, 40])
+
+    # Every third admission goes to the longest-waiting waiter
+    assert order == [10, 20, 500, 30, 40, 400, None]
+
+
+def test_smallest_first_queue_skips_removed() -> None:
+    queue = SmallestFirstQueue()
+    small = queue.push(1)
+    large = queue.push(100)
+    queue.remove(small)
+
+    assert queue.peek() == large
+
+
+@pytest.mark.asyncio
+async def test_concurrency_limiter_admits_smallest_first() -> None:
+    limiter = ConcurrencyLimiter(limit=1, queue=SmallestFirstQueue(oldest_every=100))
+    started: list[int] = []
+
+    async def _worker(size: int) -> None:
+        async with limiter.slot(size=size):
+            started.append(size)
+            await asyncio.sleep(0.01)
+
+    await limiter.acquire()
+    tasks = [asyncio.create_task(_worker(size)) for size in (300, 100, 200)]
+    await asyncio.sleep(0.01)
+    await limiter.release()
+    await asyncio.gather(*tasks)
+
+    assert started == [100, 200, 300]
+    assert limiter.active == 0
+
+
+@pytest.mark.asyncio
+async def test_concurrency_limiter_cancelled_waiter_dropped() -> None:
+    limiter = ConcurrencyLimiter(limit=1)
+    await limiter.acquire()
+
+    waiter = asyncio.create_task(limiter.acquire())
+    await asyncio.sleep(0)
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+
+    await limiter.release()
+    await asyncio.wait_for(limiter.acquire(), timeout=1)
+
+
+def test_host_limiter_invalid_rate() -> None:
+    with pytest.raises(ValueError, match="must be"):
+        HostLimiter(requests_per_second=0)
+
+
+@pytest.mark.asyncio
+async def test_host_limiter_rate_per_host() -> None:
+    limiter = HostLimiter(requests_per_second=10)
+
+    start = time.monotonic()
+    for _ in range(10):  # Initial burst allowance
+        await limiter.acquire("a.test")
+    await limiter.acquire("b.test")
+    assert time.monotonic() - start < 0.05
+
+    await limiter.acquire("a.test")
+    assert time.monotonic() - start >= 0.09
+
+
+@pytest.mark.asyncio
+async def test_host_limiter_pause() -> None:
+    limiter = HostLimiter()
+    limiter.pause("a.test", 0.1)
+
+    start = time.monotonic()
+    await limiter.acquire("b.test")
+    assert time.monotonic() - start < 0.05
+
+    await limiter.acquire("a.test")
+    assert time.monotonic() - start >= 0.09
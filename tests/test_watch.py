@@ -0,0 +1,279 @@
+import asyncio
+import os
+import typing as t
+from collections import abc
+from pathlib import Path
+
+import httpx
+import pytest
+from pytest_mock import MockerFixture
+
+from tests.conftest import WHEEL_BYTES
+from wheely_bucket.lock_index import LockIndex
+from wheely_bucket.telemetry import Event, WheelSource
+from wheely_bucket.watch import (
+    LockfilePoller,
+    WatchBackend,
+    WatchService,
+    WatchStatus,
+    find_lockfiles,
+    select_backend,
+    start_status_server,
+)
+
+LOCK_TEMPLATE = """\
+version = 1
+revision = 3
+requires-python = ">=3.12"
+{packages}
+"""
+
+PACKAGE_TEMPLATE = """
+[[package]]
+name = "{name}"
+version = "1.0.0"
+source = {{ registry = "https://pypi.org/simple" }}
+wheels = [
+    {{ url = "https://a.b.c/packages/{name}-1.0.0-py3-none-any.whl" }},
+]
+"""
+
+
+def _write_lock(lockfile: Path, *names: str) -> None:
+    lockfile.parent.mkdir(parents=True, exist_ok=True)
+    packages = "".join(PACKAGE_TEMPLATE.format(name=name) for name in names)
+    lockfile.write_text(LOCK_TEMPLATE.format(packages=packages))
+
+
+def _bump_mtime(lockfile: Path) -> None:
+    st = lockfile.stat()
+    os.utime(lockfile, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+
+
+def test_select_backend(mocker: MockerFixture) -> None:
+    mocker.patch("wheely_bucket.watch.inotify_available", return_value=True)
+    assert select_backend() == WatchBackend.INOTIFY
+    assert select_backend(polling=True) == WatchBackend.POLLING
+
+    mocker.patch("wheely_bucket.watch.inotify_available", return_value=False)
+    assert select_backend() == WatchBackend.POLLING
+
+
+def test_find_lockfiles_overlapping_roots(tmp_path: Path) -> None:
+    _write_lock(tmp_path / "proj_a" / "uv.lock", "cogapp")
+    _write_lock(tmp_path / "proj_b" / "UV.LOCK", "cogapp")
+
+    found = find_lockfiles([tmp_path, tmp_path / "proj_a"], "uv.lock")
+    assert sorted(found) == [tmp_path / "proj_a" / "uv.lock", tmp_path / "proj_b" / "UV.LOCK"]
+
+
+def test_poller_reports_changes(tmp_path: Path) -> None:
+    lf_a = tmp_path / "proj_a" / "uv.lock"
+    lf_b = tmp_path / "proj_b" / "uv.lock"
+    _write_lock(lf_a, "cogapp")
+    poller = LockfilePoller([tmp_path], rescan_every=2)
+
+    assert poller.poll() == {lf_a}
+    assert poller.poll() == set()
+
+    # New lockfiles are only found when the tree is walked again
+    _write_lock(lf_b, "cogapp")
+    _bump_mtime(lf_a)
+    assert poller.poll() == {lf_a, lf_b}
+
+    lf_b.unlink()
+    assert poller.poll() == set()
+    assert set(poller.snapshot) == {lf_a}
+
+
+def test_poller_skips_unchanged_rescan(tmp_path: Path) -> None:
+    lf = tmp_path / "uv.lock"
+    _write_lock(lf, "cogapp")
+    poller = LockfilePoller([tmp_path], rescan_every=1)
+
+    assert poller.poll() == {lf}
+    assert poller.poll() == set()
+
+
+def test_status_record_and_respond() -> None:
+    status = WatchStatus()
+    status.queued = 3
+    status.record(Event(kind="wheel", name="a.whl", source=WheelSource.NETWORK))
+    status.record(Event(kind="wheel", name="b.whl", source=WheelSource.DESTINATION))
+    status.record(Event(kind="query", name="c", source="network"))
+
+    code, payload = status.respond("/status")
+    assert code == 200
+    assert payload["queue_depth"] == {"lockfiles": 0, "wheels": 1}
+    assert payload["downloaded"] == 1
+    assert payload["status"] == "ok"
+
+    status.last_error = "boom"
+    assert status.respond("/health") == (503, {"status": "error"})
+    assert status.respond("/nope")[0] == 404
+
+
+async def _get(server: asyncio.Server, path: str) -> tuple[int, dict[str, t.Any]]:
+    host, port = server.sockets[0].getsockname()[:2]
+    async with httpx.AsyncClient() as client:
+        response = await client.get(f"http://{host}:{port}{path}")
+
+    return response.status_code, response.json()
+
+
+@pytest.mark.asyncio
+async def test_status_server() -> None:
+    status = WatchStatus(lockfiles=2)
+    server = await start_status_server(status, port=0)
+    try:
+        code, payload = await _get(server, "/status")
+        assert code == 200
+        assert payload["lockfiles"] == 2
+        assert payload["backend"] == "polling"
+
+        assert await _get(server, "/health") == (200, {"status": "ok"})
+        assert (await _get(server, "/missing"))[0] == 404
+    finally:
+        server.close()
+        await server.wait_closed()
+
+
+@pytest.mark.asyncio
+async def test_sync_only_fetches_new_wheels(
+    tmp_path: Path, wheel_client: httpx.AsyncClient, wheel_requests: list[httpx.Request]
+) -> None:
+    lf = tmp_path / "proj" / "uv.lock"
+    _write_lock(lf, "cogapp")
+    dest = tmp_path / "wheels"
+    dest.mkdir()
+
+    service = WatchService(dest=dest, index=LockIndex(path=tmp_path / "index.json"))
+    summary = await service.sync([lf], wheel_client)
+    assert summary.downloaded == 1
+
+    _write_lock(lf, "cogapp", "orjson")
+    summary = await service.sync([lf], wheel_client)
+
+    assert summary.downloaded == 1
+    requested = [r.url.path.rsplit("/", 1)[-1] for r in wheel_requests]
+    assert requested == ["cogapp-1.0.0-py3-none-any.whl", "orjson-1.0.0-py3-none-any.whl"]
+    assert service.status.syncs == 2
+    assert service.status.queued == service.status.completed == 1
+    assert service.status.lockfiles == 1
+    assert (tmp_path / "index.json").exists()
+
+
+@pytest.mark.asyncio
+async def test_sync_failed_wheels_unhealthy(tmp_path: Path) -> None:
+    lf_a = tmp_path / "proj_a" / "uv.lock"
+    lf_b = tmp_path / "proj_b" / "uv.lock"
+    _write_lock(lf_a, "cogapp", "orjson")
+    _write_lock(lf_b, "cogapp")
+    unavailable = {"orjson-1.0.0-py3-none-any.whl", "tomli-1.0.0-py3-none-any.whl"}
+
+    def _handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path.rsplit("/", 1)[-1] in unavailable:
+            return httpx.Response(404)
+        return httpx.Response(200, content=WHEEL_BYTES)
+
+    service = WatchService(dest=tmp_path)
+    async with httpx.AsyncClient(transport=httpx.MockTransport(_handler)) as client:
+        summary = await service.sync([lf_a], client)
+        assert set(summary.failed) == {"orjson-1.0.0-py3-none-any.whl"}
+        assert service.status.missing == 1
+        assert service.status.respond("/health")[0] == 503
+
+        # A sync of an unrelated lockfile retries the missing wheel, staying unhealthy while it is
+        _write_lock(lf_b, "cogapp", "tomli")
+        summary = await service.sync([lf_b], client)
+        assert set(summary.failed) == {
+            "orjson-1.0.0-py3-none-any.whl",
+            "tomli-1.0.0-py3-none-any.whl",
+        }
+        assert service.status.respond("/health")[0] == 503
+
+        unavailable.clear()
+        summary = await service.sync([], client)
+
+    assert summary.downloaded == 2
+    assert service.failed == {}
+    assert service.status.healthy
+    assert (tmp_path / "orjson-1.0.0-py3-none-any.whl").exists()
+
+
+@pytest.mark.asyncio
+async def test_run_retries_missing_wheels(tmp_path: Path) -> None:
+    lf = tmp_path / "proj" / "uv.lock"
+    _write_lock(lf, "orjson")
+    responses = iter((httpx.Response(404), httpx.Response(200, content=WHEEL_BYTES)))
+
+    async def _changes() -> abc.AsyncIterator[set[Path]]:
+        yield {lf}
+        await asyncio.Event().wait()
+
+    service = WatchService(dest=tmp_path, debounce=0, retry_interval=0.01)
+    async with httpx.AsyncClient(transport=httpx.MockTransport(lambda _: next(responses))) as c:
+        task = asyncio.create_task(service.run(_changes(), c))
+        try:
+            while service.status.syncs < 2:  # noqa: ASYNC110
+                await asyncio.sleep(0.01)
+        finally:
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+    assert service.status.healthy
+    assert (tmp_path / "orjson-1.0.0-py3-none-any.whl").exists()
+
+
+@pytest.mark.asyncio
+async def test_sync_drops_missing_lockfiles(
+    tmp_path: Path, wheel_client: httpx.AsyncClient
+) -> None:
+    lf = tmp_path / "proj" / "uv.lock"
+    _write_lock(lf, "cogapp")
+    service = WatchService(dest=tmp_path, watched={lf})
+
+    summary = await service.sync([lf, tmp_path / "gone" / "uv.lock"], wheel_client)
+
+    assert summary.downloaded == 1
+    assert service.watched == {lf}
+
+
+@pytest.mark.asyncio
+async def test_run_syncs_changes_and_survives_errors(
+    tmp_path: Path, wheel_client: httpx.AsyncClient
+) -> None:
+    good = tmp_path / "good" / "uv.lock"
+    bad = tmp_path / "bad" / "uv.lock"
+    _write_lock(good, "cogapp")
+    bad.parent.mkdir()
+    bad.write_text("not = [valid toml")
+
+    batches: asyncio.Queue[set[Path]] = asyncio.Queue()
+
+    async def _changes() -> abc.AsyncIterator[set[Path]]:
+        while True:
+            yield await batches.get()
+
+    async def _wait_until(predicate: abc.Callable[[], bool]) -> None:
+        while not predicate():  # noqa: ASYNC110
+            await asyncio.sleep(0.01)
+
+    service = WatchService(dest=tmp_path / "wheels", debounce=0)
+    (tmp_path / "wheels").mkdir()
+    task = asyncio.create_task(service.run(_changes(), wheel_client))
+    try:
+        await batches.put({bad})
+        await asyncio.wait_for(_wait_until(lambda: service.status.last_error is not None), 10)
+        assert service.status.last_error is not None
+        assert service.status.respond("/health")[0] == 503
+
+        await batches.put({good})
+        await asyncio.wait_for(_wait_until(lambda: service.status.syncs == 1), 10)
+        assert service.status.healthy
+        assert (tmp_path / "wheels" / "cogapp-1.0.0-py3-none-any.whl").exists()
+    finally:
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
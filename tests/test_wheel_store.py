@@ -0,0 +1,235 @@
+import errno
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import httpx
+import pytest
+from pytest_mock import MockerFixture
+
+from tests.conftest import WHEEL_BYTES, WHEEL_SHA256
+from wheely_bucket.dl_manager import DownloadOptions, download_packages
+from wheely_bucket.parse_lockfile import PackageSpec
+from wheely_bucket.wheel_store import WheelStore
+
+WHEEL_NAME = "black-25.1.0-py3-none-any.whl"
+
+
+@pytest.fixture
+def store(tmp_path: Path) -> WheelStore:
+    return WheelStore.load(tmp_path / "store")
+
+
+@pytest.fixture
+def bucket_wheel(tmp_path: Path) -> Path:
+    wheel = tmp_path / "bucket_a" / WHEEL_NAME
+    wheel.parent.mkdir()
+    wheel.write_bytes(WHEEL_BYTES)
+
+    return wheel
+
+
+def test_add_hardlinks_into_store(store: WheelStore, bucket_wheel: Path) -> None:
+    assert store.add(bucket_wheel) == WHEEL_SHA256
+    assert os.path.samefile(bucket_wheel, store.object_path(WHEEL_SHA256))
+    assert store.refs == {WHEEL_SHA256: [str(bucket_wheel.resolve())]}
+
+    # Already stored wheels are only referenced once
+    assert store.add(bucket_wheel, sha256=WHEEL_SHA256) == WHEEL_SHA256
+    assert store.added == 1
+    assert len(store.refs[WHEEL_SHA256]) == 1
+
+
+def test_add_digest_mismatch_skipped(store: WheelStore, bucket_wheel: Path) -> None:
+    assert store.add(bucket_wheel, sha256="0" * 64) is None
+    assert not store.refs
+
+
+def test_add_stored_wheel_deduplicated(
+    store: WheelStore, bucket_wheel: Path, tmp_path: Path
+) -> None:
+    store.add(bucket_wheel)
+
+    duplicate = tmp_path / "bucket_b" / WHEEL_NAME
+    duplicate.parent.mkdir()
+    duplicate.write_bytes(WHEEL_BYTES)
+    assert store.add(duplicate, sha256=WHEEL_SHA256) == WHEEL_SHA256
+    assert os.path.samefile(duplicate, store.object_path(WHEEL_SHA256))
+    assert len(store.refs[WHEEL_SHA256]) == 2
+
+
+@pytest.mark.parametrize("content", (WHEEL_BYTES[:-1], WHEEL_BYTES[::-1]))
+def test_add_stored_wheel_mismatch_skipped(
+    store: WheelStore, bucket_wheel: Path, tmp_path: Path, content: bytes
+) -> None:
+    store.add(bucket_wheel)
+
+    other = tmp_path / "bucket_b" / WHEEL_NAME
+    other.parent.mkdir()
+    other.write_bytes(content)
+    assert store.add(other, sha256=WHEEL_SHA256) is None
+    assert other.read_bytes() == content
+    assert len(store.refs[WHEEL_SHA256]) == 1
+
+
+def test_link_into_bucket(store: WheelStore, bucket_wheel: Path, tmp_path: Path) -> None:
+    store.add(bucket_wheel)
+
+    dest = tmp_path / "bucket_b" / WHEEL_NAME
+    dest.parent.mkdir()
+    assert store.link(WHEEL_SHA256, dest, size=len(WHEEL_BYTES))
+    assert os.path.samefile(dest, bucket_wheel)
+    assert len(store.refs[WHEEL_SHA256]) == 2
+
+
+def test_link_missing_or_size_mismatch(store: WheelStore, bucket_wheel: Path) -> None:
+    dest = bucket_wheel.with_name("other.whl")
+    assert not store.link(WHEEL_SHA256, dest)
+
+    store.add(bucket_wheel)
+    assert not store.link(WHEEL_SHA256, dest, size=1)
+    assert not dest.exists()
+
+
+def test_save_load_roundtrip(store: WheelStore, bucket_wheel: Path) -> None:
+    store.add(bucket_wheel)
+    store.save()
+
+    assert WheelStore.load(store.root).refs == store.refs
+
+
+def test_save_merges_concurrent_runs(bucket_wheel: Path, tmp_path: Path) -> None:
+    first = WheelStore.load(tmp_path / "store")
+    second = WheelStore.load(tmp_path / "store")
+
+    first.add(bucket_wheel)
+    first.save()
+
+    other = tmp_path / "bucket_b" / WHEEL_NAME
+    other.parent.mkdir()
+    assert second.link(WHEEL_SHA256, other)
+    second.save()
+
+    assert sorted(WheelStore.load(tmp_path / "store").refs[WHEEL_SHA256]) == sorted(
+        [str(bucket_wheel.resolve()), str(other.resolve())]
+    )
+
+
+def test_save_drops_collected_refs(store: WheelStore, bucket_wheel: Path) -> None:
+    store.add(bucket_wheel)
+    store.save()
+
+    bucket_wheel.unlink()
+    collector = WheelStore.load(store.root)
+    assert collector.collect_garbage().stale_refs == 1
+    collector.save()
+
+    assert WheelStore.load(store.root).refs == {}
+
+
+def test_add_ref_threadsafe(store: WheelStore, bucket_wheel: Path) -> None:
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(lambda _: store.add(bucket_wheel, WHEEL_SHA256), range(64)))
+
+    assert store.refs == {WHEEL_SHA256: [str(bucket_wheel.resolve())]}
+
+
+def test_collect_garbage_keeps_linked_objects(store: WheelStore, bucket_wheel: Path) -> None:
+    # e.g. a concurrent run that has linked the wheel but not yet saved its references
+    store.add(bucket_wheel)
+    collector = WheelStore.load(store.root)
+
+    assert collector.collect_garbage().removed == 0
+    assert store.object_path(WHEEL_SHA256).exists()
+
+
+def test_collect_garbage(store: WheelStore, bucket_wheel: Path, tmp_path: Path) -> None:
+    store.add(bucket_wheel)
+    dest = tmp_path / "bucket_b" / WHEEL_NAME
+    dest.parent.mkdir()
+    store.link(WHEEL_SHA256, dest)
+
+    # Wheel is still referenced by the second bucket
+    bucket_wheel.unlink()
+    summary = store.collect_garbage()
+    assert (summary.stale_refs, summary.removed) == (1, 0)
+    assert store.object_path(WHEEL_SHA256).exists()
+
+    dest.unlink()
+    summary = store.collect_garbage()
+    assert (summary.stale_refs, summary.removed) == (1, 1)
+    assert summary.freed_bytes == len(WHEEL_BYTES)
+    assert not store.object_path(WHEEL_SHA256).exists()
+    assert not store.refs
+
+
+def test_collect_garbage_replaced_wheel(store: WheelStore, bucket_wheel: Path) -> None:
+    store.add(bucket_wheel)
+    bucket_wheel.unlink()
+    bucket_wheel.write_bytes(b"a different wheel")
+
+    assert store.collect_garbage().removed == 1
+
+
+@pytest.mark.asyncio
+async def test_download_packages_shares_store(
+    store: WheelStore,
+    tmp_path: Path,
+    wheel_client: httpx.AsyncClient,
+    wheel_requests: list[httpx.Request],
+) -> None:
+    DUMMY_PACKAGE = PackageSpec.from_url(
+        f"https://a.b.c/{WHEEL_NAME}", sha256=WHEEL_SHA256, size=len(WHEEL_BYTES)
+    )
+    options = DownloadOptions(store=store)
+    (tmp_path / "a").mkdir()
+    (tmp_path / "b").mkdir()
+
+    first = await download_packages(
+        packages=(DUMMY_PACKAGE,), dest=tmp_path / "a", client=wheel_client, options=options
+    )
+    second = await download_packages(
+        packages=(DUMMY_PACKAGE,), dest=tmp_path / "b", client=wheel_client, options=options
+    )
+
+    assert len(wheel_requests) == 1
+    assert (first.downloaded, second.stored) == (1, 1)
+    assert (tmp_path / "a" / WHEEL_NAME).stat().st_ino == (
+        tmp_path / "b" / WHEEL_NAME
+    ).stat().st_ino
+
+
+@pytest.mark.asyncio
+async def test_download_packages_store_error_recorded(
+    store: WheelStore,
+    tmp_path: Path,
+    wheel_client: httpx.AsyncClient,
+    mocker: MockerFixture,
+) -> None:
+    FAILING_PACKAGE = PackageSpec.from_url(f"https://a.b.c/{WHEEL_NAME}", sha256=WHEEL_SHA256)
+    DUMMY_PACKAGE = PackageSpec.from_url(
+        "https://a.b.c/cogapp-3.5.1-py3-none-any.whl", sha256=WHEEL_SHA256
+    )
+    real_add = WheelStore.add
+
+    def _add(
+        self: WheelStore, filepath: Path, sha256: str | None = None, verified: bool = False
+    ) -> str | None:
+        if filepath.name == WHEEL_NAME:
+            raise OSError(errno.ENOSPC, "No space left on device")
+        return real_add(self, filepath, sha256, verified)
+
+    mocker.patch.object(WheelStore, "add", autospec=True, side_effect=_add)
+    (tmp_path / "dest").mkdir()
+
+    summary = await download_packages(
+        packages=(FAILING_PACKAGE, DUMMY_PACKAGE),
+        dest=tmp_path / "dest",
+        client=wheel_client,
+        options=DownloadOptions(store=store),
+    )
+
+    assert set(summary.failed) == {WHEEL_NAME}
+    assert "No space left" in summary.failed[WHEEL_NAME]
+    assert summary.downloaded == 1
+    assert [Path(ref).name for ref in store.refs[WHEEL_SHA256]] == [DUMMY_PACKAGE.wheel_name]
@@ -1,15 +1,134 @@
 import asyncio
+import contextlib
+import hashlib
+import itertools
+import os
+import re
+import time
+import typing as t
 from collections import abc
+from dataclasses import dataclass, field
 from pathlib import Path
+from urllib.parse import urlsplit
+from urllib.request import url2pathname
 
-import aioshutil
 import anyio
 import httpx
+from packaging.tags import Tag
+from packaging.version import Version
 
-from wheely_bucket import USER_AGENT
-from wheely_bucket.parse_lockfile import PackageSpec, is_compatible_with
+from wheely_bucket.http_client import ClientOptions, DEFAULT_CLIENT_OPTIONS
+from wheely_bucket.materialize import LinkMode, file_sha256, materialize
+from wheely_bucket.parse_lockfile import PackageSpec, supported_tags
+from wheely_bucket.retry import (
+    DEFAULT_RETRY_POLICY,
+    RETRYABLE_EXCEPTIONS,
+    RetryPolicy,
+    RetryableStatusError,
+    call_with_retry,
+    check_response,
+)
+from wheely_bucket.telemetry import RunTelemetry, WheelSource
+from wheely_bucket.throttle import (
+    AdaptiveLimiter,
+    BandwidthLimiter,
+    ConcurrencyLimiter,
+    HostLimiter,
+    SchedulePolicy,
+    build_wait_queue,
+)
+from wheely_bucket.wheel_store import WheelStore
 
 MAX_CONCURRENT_DOWNLOADS = 5
+MAX_PENDING_DOWNLOADS = 128
+CHECK_BATCH_SIZE = 256
+CHECK_BATCH_WAIT = 0.05  # seconds
+PARTIAL_SUFFIX = ".part"
+VALIDATOR_SUFFIX = ".validator"
+HASH_CHUNK_SIZE = 1024 * 1024
+THROTTLE_STATUS_CODES = frozenset({httpx.codes.TOO_MANY_REQUESTS, httpx.codes.SERVICE_UNAVAILABLE})
+
+
+@dataclass(frozen=True, slots=True)
+class DownloadOptions:
+    """
+    Configuration for a `download_packages` run.
+
+    `concurrency` sets the number of simultaneous transfers; if `adaptive` is `True` it is instead
+    used as the starting point for a limit that is tuned to the observed throughput, up to
+    `max_concurrency`. `max_bandwidth`, if specified, caps the aggregate transfer rate in bytes per
+    second.
+
+    `schedule` determines the order in which queued downloads are started; by default the smallest
+    wheels are started first, as known from their lockfile or Simple API size, with the longest
+    waiting download regularly started instead so large wheels aren't starved. `max_host_rate`, if
+    specified, caps the number of requests per second sent to each host. Regardless of the rate
+    limit, a host throttling a download (e.g. `429`) is paused for every download from that host.
+
+    `link_mode` determines how wheels found in `pip`'s cache are placed into the destination.
+
+    `http` configures the connection pool & protocol of the HTTP client used for the run.
+
+    If `telemetry` is provided, how each wheel was obtained is recorded to it, along with the bytes
+    & time spent.
+
+    If a `store` is provided, wheels are shared with other destinations through the
+    content-addressed wheel store: wheels already in the store are linked into the destination
+    rather than being downloaded, and newly obtained wheels are added to it.
+    """
+
+    verify_existing: bool = False
+    retry: RetryPolicy = DEFAULT_RETRY_POLICY
+    concurrency: int = MAX_CONCURRENT_DOWNLOADS
+    adaptive: bool = False
+    max_concurrency: int = 64
+    max_bandwidth: float | None = None
+    schedule: SchedulePolicy = SchedulePolicy.SMALLEST_FIRST
+    max_host_rate: float | None = None
+    link_mode: LinkMode = LinkMode.COPY
+    store: WheelStore | None = None
+    http: ClientOptions = DEFAULT_CLIENT_OPTIONS
+    telemetry: RunTelemetry | None = None
+
+    def build_limiter(self) -> ConcurrencyLimiter:
+        """Build the concurrency limiter described by these options."""
+        queue = build_wait_queue(self.schedule)
+        if self.adaptive:
+            return AdaptiveLimiter(
+                limit=self.concurrency, max_limit=self.max_concurrency, queue=queue
+            )
+
+        return ConcurrencyLimiter(limit=self.concurrency, queue=queue)
+
+    def build_bandwidth_limiter(self) -> BandwidthLimiter | None:
+        """Build the bandwidth limiter described by these options, if a cap is specified."""
+        if self.max_bandwidth is None:
+            return None
+
+        return BandwidthLimiter(bytes_per_second=self.max_bandwidth)
+
+    def build_host_limiter(self) -> HostLimiter:
+        """Build the per-host request limiter described by these options."""
+        return HostLimiter(requests_per_second=self.max_host_rate)
+
+
+DEFAULT_DOWNLOAD_OPTIONS = DownloadOptions()
+
+
+def target_tags(
+    python_versions: abc.Iterable[tuple[int, int]] | None = None,
+    platforms: abc.Iterable[str] | None = None,
+) -> list[abc.Mapping[Tag, int]]:
+    """
+    Build the supported tag index of each targeted Python version, for the given platform(s).
+
+    The expected form of `python_versions` and `platforms` matches that of `filter_packages`.
+    """
+    plats = None if platforms is None else tuple(platforms)
+    if python_versions is None:
+        return [supported_tags(python_version=None, platforms=plats)]
+
+    return [supported_tags(python_version=tuple(v), platforms=plats) for v in python_versions]
 
 
 def filter_packages(
@@ -28,73 +147,690 @@ def filter_packages(
     platform, e.g. `'win_amd64'` or `'macosx_11_0_arm64'`. If `None`, the currently running platform
     is used.
     """
+    targets = target_tags(python_versions=python_versions, platforms=platforms)
+
     keep_packages: set[PackageSpec] = set()
     for p in packages:
-        if python_versions is None:
-            if is_compatible_with(tags=p.tags, python_version=python_versions, platforms=platforms):
-                keep_packages.add(p)
-        else:
-            for pyver in python_versions:
-                if is_compatible_with(tags=p.tags, python_version=pyver, platforms=platforms):
-                    keep_packages.add(p)
-                    break
+        if any(tag in supported for supported in targets for tag in p.tags):
+            keep_packages.add(p)
 
     return keep_packages
 
 
+def select_best_wheels(
+    packages: abc.Iterable[PackageSpec],
+    python_versions: abc.Iterable[tuple[int, int]] | None = None,
+    platforms: abc.Iterable[str] | None = None,
+) -> set[PackageSpec]:
+    """
+    Keep only the most preferred compatible wheel of each release, for each target.
+
+    Each combination of Python version & platform is a separate target; a release's wheels are
+    ranked for each target by the priority of their most preferred supported tag, as ordered by
+    `packaging.tags`, mirroring the wheel `pip` would install. Ties are broken by filename so the
+    selection is deterministic. Wheels incompatible with every target are dropped.
+
+    The expected form of `python_versions` and `platforms` matches that of `filter_packages`.
+    """
+    pyvers = [None] if python_versions is None else [tuple(v) for v in python_versions]
+    plats = [None] if platforms is None else [(p,) for p in platforms]
+    targets = [supported_tags(python_version=v, platforms=p) for v in pyvers for p in plats]
+
+    best: dict[tuple[int, str, Version], tuple[int, str, PackageSpec]] = {}
+    for p in packages:
+        for idx, supported in enumerate(targets):
+            priority = min((supported[tag] for tag in p.tags if tag in supported), default=None)
+            if priority is None:
+                continue
+
+            key = (idx, p.package_name, p.version)
+            current = best.get(key)
+            if current is None or (priority, p.wheel_name) < current[:2]:
+                best[key] = (priority, p.wheel_name, p)
+
+    return {p for *_, p in best.values()}
+
+
+@dataclass(slots=True)
+class DownloadSummary:
+    """
+    Tally of how each requested wheel was resolved during a download run.
+
+    Wheels newly placed into the destination are recorded in `added`, mapped to their SHA256 digest
+    if known.
+    """
+
+    downloaded: int = 0
+    existing: int = 0
+    cached: int = 0
+    stored: int = 0
+    local: int = 0
+    failed: dict[str, str] = field(default_factory=dict)
+    added: dict[str, str | None] = field(default_factory=dict)
+
+    def report(self) -> str:
+        """Summarize the download run, listing any wheels that could not be downloaded."""
+        lines = [
+            (
+                f"Downloaded {self.downloaded} wheel(s), {self.existing} already present, "
+                f"{self.cached} from pip's cache, {self.stored} from the wheel store, "
+                f"{self.local} from local indexes, {len(self.failed)} failed"
+            )
+        ]
+        lines.extend(f"  {wheel_name}: {reason}" for wheel_name, reason in self.failed.items())
+
+        return "\n".join(lines)
+
+
+class WheelIntegrityError(Exception):
+    """Raised when a wheel's size or SHA256 digest does not match its expected value."""
+
+
+async def verify_wheel(p: PackageSpec, filepath: Path, full: bool = False) -> bool:
+    """
+    Check the wheel file against its expected size and, if `full` is `True`, its SHA256 digest.
+
+    The size check only requires a `stat` call; hashing is run in a worker thread. Any checks whose
+    expected value is unknown are skipped.
+    """
+    if p.size is not None and (await anyio.Path(filepath).stat()).st_size != p.size:
+        return False
+
+    if full and p.sha256 is not None:
+        digest = await anyio.to_thread.run_sync(file_sha256, filepath)
+        if digest != p.sha256:
+            return False
+
+    return True
+
+
+def _partial_path(filepath: Path) -> Path:
+    """Build the path that an in-progress download of the provided file is written to."""
+    return filepath.with_name(f"{filepath.name}{PARTIAL_SUFFIX}")
+
+
+def _validator_path(part_filepath: Path) -> Path:
+    """Build the path the validator of a partial download's response is recorded to."""
+    return part_filepath.with_name(f"{part_filepath.name}{VALIDATOR_SUFFIX}")
+
+
+def _response_validator(r: httpx.Response) -> str | None:
+    """
+    Extract the validator identifying the response's version of the file, for use with `If-Range`.
+
+    `If-Range` only accepts strong validators, so weak `ETag`s are ignored in favor of any
+    `Last-Modified` date.
+    """
+    etag: str | None = r.headers.get("ETag")
+    if etag is not None and not etag.startswith("W/"):
+        return etag
+
+    last_modified: str | None = r.headers.get("Last-Modified")
+    return last_modified
+
+
+def _content_range_start(r: httpx.Response) -> int | None:
+    """Parse the first byte position of a `206` response's `Content-Range`, if valid."""
+    match = re.fullmatch(r"bytes (\d+)-\d+/(?:\d+|\*)", r.headers.get("Content-Range", "").strip())
+    if match is None:
+        return None
+
+    return int(match.group(1))
+
+
+def _partial_hasher(filepath: Path) -> "hashlib._Hash":
+    """Seed a SHA256 hasher with the contents of a partially downloaded file."""
+    hasher = hashlib.sha256()
+    with filepath.open("rb") as f:
+        while chunk := f.read(HASH_CHUNK_SIZE):
+            hasher.update(chunk)
+
+    return hasher
+
+
 async def _download_package(
-    client: httpx.AsyncClient, url: str, dest: Path, wheel_name: str, semaphore: asyncio.Semaphore
+    client: httpx.AsyncClient,
+    p: PackageSpec,
+    dest: Path,
+    limiter: ConcurrencyLimiter,
+    bandwidth: BandwidthLimiter | None,
+    retry: RetryPolicy,
+    summary: DownloadSummary,
+    store: WheelStore | None = None,
+    telemetry: RunTelemetry | None = None,
+    hosts: HostLimiter | None = None,
+) -> None:
+    """
+    Stream the wheel to the destination directory, hashing its contents as they are written.
+
+    Transient network errors, retryable HTTP statuses, and wheels failing verification against
+    their expected size or SHA256 digest are retried according to the provided retry policy. Any
+    wheel that still cannot be downloaded is recorded in the summary rather than raising.
+
+    Transfer outcomes are reported to the concurrency limiter so adaptive limits can be tuned. Each
+    attempt first waits on the host limiter, if provided, which is paused if the host throttles an
+    attempt, then is queued for a slot according to its expected size. The slot is only held for
+    the transfer itself, so downloads from a paused host or backing off before a retry don't hold
+    slots that downloads from other hosts could use.
+
+    If a wheel store is provided, the downloaded wheel is added to it; a wheel that can't be stored
+    is recorded as failed like any other download error. If telemetry is provided, the bytes
+    streamed by the successful attempt (excluding any resumed prefix), time spent & number of
+    attempts are recorded once a download slot is acquired.
+    """
+    out_filepath = dest / p.wheel_name
+    host = urlsplit(p.wheel_url).netloc
+    attempts = 0
+    transferred = 0
+    start = time.monotonic()
+
+    async def _attempt() -> None:
+        nonlocal attempts, start, transferred
+        attempts += 1
+        if hosts is not None:
+            await hosts.acquire(host)
+
+        async with limiter.slot(size=p.size):
+            if attempts == 1:
+                print(f"Downloading {out_filepath}")
+                start = time.monotonic()
+
+            try:
+                n_bytes, latency = await _stream_to_file(
+                    client=client, p=p, out_filepath=out_filepath, bandwidth=bandwidth
+                )
+            except RetryableStatusError as e:
+                throttled = e.status_code in THROTTLE_STATUS_CODES
+                if throttled and hosts is not None:
+                    hosts.pause(host, retry.backoff(attempts, retry_after=e.retry_after))
+                await limiter.record_failure(throttled=throttled)
+                raise
+            except httpx.TransportError:
+                await limiter.record_failure()
+                raise
+
+            await limiter.record_transfer(n_bytes=n_bytes, latency=latency)
+            transferred = n_bytes
+
+    try:
+        await call_with_retry(
+            _attempt,
+            policy=retry,
+            description=p.wheel_name,
+            retryable=(*RETRYABLE_EXCEPTIONS, WheelIntegrityError),
+        )
+        if store is not None:
+            # The digest, if known, was verified while streaming
+            await anyio.to_thread.run_sync(store.add, out_filepath, p.sha256, p.sha256 is not None)
+    except Exception as e:
+        print(f"Could not download package {p.wheel_name}: {e}")
+        summary.failed[p.wheel_name] = str(e)
+        if telemetry is not None:
+            telemetry.wheel(
+                p.wheel_name,
+                WheelSource.FAILED,
+                duration=time.monotonic() - start,
+                attempts=attempts,
+                error=str(e),
+            )
+    else:
+        summary.downloaded += 1
+        summary.added[p.wheel_name] = p.sha256
+        if telemetry is not None:
+            telemetry.wheel(
+                p.wheel_name,
+                WheelSource.NETWORK,
+                n_bytes=transferred,
+                duration=time.monotonic() - start,
+                attempts=attempts,
+            )
+
+
+async def _record_placed(
+    telemetry: RunTelemetry | None,
+    p: PackageSpec,
+    filepath: Path,
+    source: WheelSource,
+    start: float,
 ) -> None:
-    out_filepath = dest / wheel_name
-    async with semaphore:
-        print(f"Downloading {out_filepath}")
-
-        async with client.stream("GET", url) as r:
-            if r.status_code == httpx.codes.OK:
-                async with await anyio.open_file(out_filepath, "wb") as f:
-                    async for chunk in r.aiter_bytes():
-                        await f.write(chunk)
+    """Record a wheel placed into the destination without a transfer, if telemetry is provided."""
+    if telemetry is None:
+        return
+
+    n_bytes = p.size
+    if n_bytes is None:
+        n_bytes = (await anyio.Path(filepath).stat()).st_size
+
+    telemetry.wheel(p.wheel_name, source, n_bytes=n_bytes, duration=time.monotonic() - start)
+
+
+async def _add_to_store(
+    p: PackageSpec,
+    filepath: Path,
+    options: DownloadOptions,
+    summary: DownloadSummary,
+    verified: bool | None = None,
+) -> bool:
+    """
+    Add the wheel placed into the destination to the options' wheel store, if provided.
+
+    Unless specified, the wheel is only treated as `verified` if `options.verify_existing` is
+    `True`. If the wheel cannot be stored, e.g. the disk is full, the error is recorded in the
+    summary rather than raising, so other transfers are unaffected, and `False` is returned.
+    """
+    if options.store is None:
+        return True
+
+    if verified is None:
+        verified = options.verify_existing
+
+    try:
+        await anyio.to_thread.run_sync(options.store.add, filepath, p.sha256, verified)
+    except OSError as e:
+        print(f"Could not store {p.wheel_name}: {e}")
+        summary.failed[p.wheel_name] = str(e)
+        if options.telemetry is not None:
+            options.telemetry.wheel(p.wheel_name, WheelSource.FAILED, error=str(e))
+        return False
+
+    return True
+
+
+def _local_wheel_path(wheel_url: str) -> Path | None:
+    """Convert a `file://` wheel URL, e.g. from a local index, to its path; otherwise `None`."""
+    parts = urlsplit(wheel_url)
+    if parts.scheme != "file":
+        return None
+
+    return Path(url2pathname(parts.path))
+
+
+async def _link_local_wheel(
+    p: PackageSpec,
+    src: Path,
+    dest_filepath: Path,
+    options: DownloadOptions,
+    summary: DownloadSummary,
+) -> None:
+    """
+    Place a wheel served by a local index into the destination, per the options' link mode.
+
+    Wheels that are missing or fail verification are recorded in the summary rather than raising.
+    """
+    start = time.monotonic()
+    try:
+        if not await verify_wheel(p, src, full=options.verify_existing):
+            raise WheelIntegrityError("local wheel failed verification")
+
+        part_filepath = _partial_path(dest_filepath)
+        await anyio.to_thread.run_sync(materialize, src, part_filepath, options.link_mode)
+        await anyio.Path(part_filepath).replace(dest_filepath)
+    except (OSError, WheelIntegrityError) as e:
+        print(f"Could not link local wheel {p.wheel_name}: {e}")
+        summary.failed[p.wheel_name] = str(e)
+        if options.telemetry is not None:
+            options.telemetry.wheel(p.wheel_name, WheelSource.FAILED, error=str(e))
+        return
+
+    if not await _add_to_store(p, dest_filepath, options, summary):
+        return
+
+    print(f"Using local {p.wheel_name}")
+    summary.local += 1
+    summary.added[p.wheel_name] = p.sha256
+    await _record_placed(options.telemetry, p, dest_filepath, WheelSource.LOCAL, start)
+
+
+async def _place_cached_wheel(
+    p: PackageSpec, dest_filepath: Path, options: DownloadOptions
+) -> bool:
+    """
+    Place the wheel found in `pip`'s cache into the destination, per the options' link mode.
+
+    Returns `False` if the cached wheel fails verification or cannot be placed, e.g. if the cache
+    entry vanished or is unreadable, so the wheel can be downloaded instead.
+    """
+    part_filepath = _partial_path(dest_filepath)
+    try:
+        if not await verify_wheel(p, p.cached_wheel_path, full=options.verify_existing):
+            return False
+
+        # pip's cache names this as the hashed URL
+        await anyio.to_thread.run_sync(
+            materialize, p.cached_wheel_path, part_filepath, options.link_mode
+        )
+        await anyio.Path(part_filepath).replace(dest_filepath)
+    except OSError as e:
+        print(f"Could not use cached {p.wheel_name}, downloading instead: {e}")
+        await anyio.Path(part_filepath).unlink(missing_ok=True)
+        return False
+
+    return True
+
+
+async def _stream_to_file(
+    client: httpx.AsyncClient,
+    p: PackageSpec,
+    out_filepath: Path,
+    bandwidth: BandwidthLimiter | None = None,
+) -> tuple[int, float]:
+    """
+    Stream the wheel into a partial file, which is atomically moved into place once verified.
+
+    If a partial file is left over from an interrupted download, the transfer is resumed using an
+    HTTP `Range` request, conditioned with `If-Range` on the `ETag` or `Last-Modified` validator
+    recorded when the download started so a file that changed upstream is fetched again in full.
+    Partial files without a recorded validator are only resumed if the wheel's SHA256 digest is
+    known, so a mismatched resume is caught by verification. A `206` response not starting at the
+    requested byte discards the partial file & raises `WheelIntegrityError`, so the retry restarts
+    from scratch; if the server does not honor the range at all, the download is restarted.
+    Redirects, e.g. from a mirror to blob storage, are followed.
+
+    If a bandwidth limiter is provided, the transfer rate is capped accordingly.
+
+    Returns the number of bytes transferred and the time, in seconds, until the response arrived.
+    """
+    part_filepath = anyio.Path(_partial_path(out_filepath))
+    validator_filepath = anyio.Path(_validator_path(Path(part_filepath)))
+    offset = 0
+    validator = None
+    if await part_filepath.exists():
+        offset = (await part_filepath.stat()).st_size
+        if await validator_filepath.exists():
+            validator = (await validator_filepath.read_text()).strip() or None
+
+    headers = {}
+    if offset and (validator is not None or p.sha256 is not None):
+        headers["Range"] = f"bytes={offset}-"
+        if validator is not None:
+            headers["If-Range"] = validator
+
+    mode: t.Literal["ab", "wb"]
+    start = time.monotonic()
+    # Mirrors commonly redirect file URLs to blob storage
+    async with client.stream("GET", p.wheel_url, headers=headers, follow_redirects=True) as r:
+        latency = time.monotonic() - start
+        if "Range" in headers and r.status_code == httpx.codes.PARTIAL_CONTENT:
+            if (range_start := _content_range_start(r)) != offset:
+                await part_filepath.unlink(missing_ok=True)
+                await validator_filepath.unlink(missing_ok=True)
+                raise WheelIntegrityError(f"requested byte {offset}, received from {range_start}")
+
+            print(f"Resuming {p.wheel_name} from byte {offset}")
+            hasher = await anyio.to_thread.run_sync(_partial_hasher, Path(part_filepath))
+            n_bytes = offset
+            mode = "ab"
+        elif r.status_code == httpx.codes.OK:
+            offset = 0
+            hasher = hashlib.sha256()
+            n_bytes = 0
+            mode = "wb"
+            # Recorded before any data, so an interrupted transfer can be resumed conditionally
+            if (validator := _response_validator(r)) is not None:
+                await validator_filepath.write_text(validator)
             else:
-                print(f"Could not download package {wheel_name}: {r.status_code}")
+                await validator_filepath.unlink(missing_ok=True)
+        elif r.status_code == httpx.codes.REQUESTED_RANGE_NOT_SATISFIABLE:
+            await part_filepath.unlink(missing_ok=True)
+            await validator_filepath.unlink(missing_ok=True)
+            raise WheelIntegrityError(f"could not resume from byte {offset}")
+        else:
+            check_response(r)
+            raise httpx.HTTPStatusError(
+                f"Unexpected status {r.status_code}", request=r.request, response=r
+            )
+
+        async with await part_filepath.open(mode) as f:
+            async for chunk in r.aiter_bytes():
+                if bandwidth is not None:
+                    await bandwidth.consume(len(chunk))
 
+                hasher.update(chunk)
+                n_bytes += len(chunk)
+                await f.write(chunk)
 
-async def download_packages(packages: abc.Iterable[PackageSpec], dest: Path) -> None:
+    try:
+        if p.size is not None and n_bytes != p.size:
+            raise WheelIntegrityError(f"expected {p.size} bytes, received {n_bytes}")
+
+        if p.sha256 is not None and hasher.hexdigest() != p.sha256:
+            raise WheelIntegrityError(f"expected SHA256 {p.sha256}, received {hasher.hexdigest()}")
+    except WheelIntegrityError:
+        await part_filepath.unlink(missing_ok=True)
+        await validator_filepath.unlink(missing_ok=True)
+        raise
+
+    await part_filepath.replace(out_filepath)
+    await validator_filepath.unlink(missing_ok=True)
+    return n_bytes - offset, latency
+
+
+async def _abatched(
+    packages: abc.Iterable[PackageSpec] | abc.AsyncIterable[PackageSpec],
+    n: int = CHECK_BATCH_SIZE,
+    max_wait: float = CHECK_BATCH_WAIT,
+) -> abc.AsyncIterator[list[PackageSpec]]:
+    """
+    Group a synchronous or asynchronous iterable of packages into batches of up to `n` packages.
+
+    For asynchronous iterables, a partial batch is emitted once `max_wait` seconds have elapsed
+    without it filling, so a slow source doesn't hold up packages that have already arrived.
+    """
+    if not isinstance(packages, abc.AsyncIterable):
+        for chunk in itertools.batched(packages, n):
+            yield list(chunk)
+        return
+
+    it = aiter(packages)
+    next_p: asyncio.Future[PackageSpec] | None = None
+    try:
+        batch: list[PackageSpec] = []
+        while True:
+            if next_p is None:
+                next_p = asyncio.ensure_future(anext(it))
+
+            # Wait indefinitely for the first package of a batch, but not for the rest
+            timeout = max_wait if batch else None
+            done, _ = await asyncio.wait((next_p,), timeout=timeout)
+            if not done:
+                yield batch
+                batch = []
+                continue
+
+            try:
+                batch.append(next_p.result())
+            except StopAsyncIteration:
+                break
+            finally:
+                next_p = None
+
+            if len(batch) >= n:
+                yield batch
+                batch = []
+
+        if batch:
+            yield batch
+    finally:
+        if next_p is not None:
+            next_p.cancel()
+
+
+def scan_wheels(dest: Path) -> dict[str, int]:
+    """
+    List the wheels in the destination directory, mapped to their size in bytes.
+
+    The listing is built from a single `os.scandir` of the directory; subdirectories & non-wheel
+    files are ignored. A missing directory is treated as empty.
+    """
+    wheels = {}
+    try:
+        with os.scandir(dest) as it:
+            for entry in it:
+                if entry.name.endswith(".whl") and entry.is_file():
+                    wheels[entry.name] = entry.stat().st_size
+    except FileNotFoundError:
+        pass
+
+    return wheels
+
+
+def _check_pip_cache(
+    batch: abc.Iterable[PackageSpec], shard_listings: dict[Path, frozenset[str]]
+) -> list[bool]:
+    """
+    Check whether each package's wheel is present in `pip`'s HTTP cache.
+
+    Rather than checking each cached wheel path, each cache shard directory is listed once &
+    memoized in `shard_listings`, so packages sharing a shard only require a single listing.
+    """
+    present = []
+    for p in batch:
+        cached_wheel_path = p.cached_wheel_path
+        shard = cached_wheel_path.parent
+        listing = shard_listings.get(shard)
+        if listing is None:
+            try:
+                listing = frozenset(os.listdir(shard))
+            except (FileNotFoundError, NotADirectoryError):
+                listing = frozenset()
+            shard_listings[shard] = listing
+
+        present.append(cached_wheel_path.name in listing)
+
+    return present
+
+
+async def download_packages(
+    packages: abc.Iterable[PackageSpec] | abc.AsyncIterable[PackageSpec],
+    dest: Path,
+    client: httpx.AsyncClient | None = None,
+    options: DownloadOptions = DEFAULT_DOWNLOAD_OPTIONS,
+    check_dest: bool = True,
+) -> DownloadSummary:
     """
     Attempt to download the specified package(s) to the destination directory.
 
-    Prior to attempting to download, both `pip`'s cache and the destination directory are checked to
-    see if the package's wheel has already been downloaded.
+    Prior to attempting to download, the destination directory, the wheel store (if provided), and
+    `pip`'s cache are checked to see if the package's wheel has already been downloaded. Wheels
+    with a `file://` URL, e.g. from a local index, are linked into the destination rather than
+    downloaded. Existing wheels are checked against their expected size, if known; if
+    `options.verify_existing` is `True` their SHA256 digest is also checked. Any wheels failing
+    verification are downloaded again. If `check_dest` is `False`, the caller has already
+    determined that the wheels are missing from the destination and it is not checked again.
+
+    These checks are batched & run off the event loop: the destination is listed once up front, and
+    `pip`'s cache is checked for batches of up to `CHECK_BATCH_SIZE` packages at a time, listing
+    each cache shard directory once.
+
+    `packages` may also be an asynchronous iterable, in which case downloads are started as packages
+    arrive rather than waiting for the entire collection to be known. At most
+    `MAX_PENDING_DOWNLOADS` downloads are queued at once; the source is not consumed further until a
+    slot frees up.
+
+    If an `httpx.AsyncClient` instance is provided it is used for all downloads, otherwise a client
+    is created for the duration of the call, as described by `options.http`.
+
+    Failed downloads are retried according to the options' retry policy; wheels that ultimately
+    cannot be downloaded are reported in the returned summary without interrupting other downloads.
     """
-    # Check caches first, then queue any files that need downloading so a single session can be used
-    to_download: list[PackageSpec] = []
-    for p in packages:
-        dest_filepath = dest / p.wheel_name
-
-        # Check if wheel is already in destination
-        if dest_filepath.exists():
-            print(f"Wheel was already downloaded: {dest_filepath}")
-            continue
-
-        # Check if wheel is already in pip's cache
-        if p.cached_wheel_path.exists():
-            print(f"Using cached {p.wheel_name}")
-
-            # pip's cache names this as the hashed URL
-            await aioshutil.copy(src=p.cached_wheel_path, dst=dest_filepath)
-            continue
-
-        to_download.append(p)
-
-    semaphore = asyncio.Semaphore(MAX_CONCURRENT_DOWNLOADS)
-    async with httpx.AsyncClient(headers={"User-Agent": USER_AGENT}) as client:
-        dl_tasks = [
-            _download_package(
-                client=client,
-                url=p.wheel_url,
-                dest=dest,
-                wheel_name=p.wheel_name,
-                semaphore=semaphore,
-            )
-            for p in to_download
-        ]
-        await asyncio.gather(*dl_tasks)
+    summary = DownloadSummary()
+    limiter = options.build_limiter()
+    bandwidth = options.build_bandwidth_limiter()
+    hosts = options.build_host_limiter()
+    store = options.store
+    telemetry = options.telemetry
+    seen: set[str] = set()
+    pending = asyncio.Semaphore(MAX_PENDING_DOWNLOADS)
+    shard_listings: dict[Path, frozenset[str]] = {}
+    existing = await anyio.to_thread.run_sync(scan_wheels, dest) if check_dest else {}
+    async with contextlib.AsyncExitStack() as stack:
+        if client is None:
+            client = await stack.enter_async_context(options.http.build_client())
+
+        async with asyncio.TaskGroup() as tg:
+            async for batch in _abatched(packages):
+                in_pip_cache = await anyio.to_thread.run_sync(
+                    _check_pip_cache, batch, shard_listings
+                )
+                for p, is_cached in zip(batch, in_pip_cache, strict=True):
+                    # Streamed sources may yield the same wheel more than once
+                    if p.wheel_name in seen:
+                        continue
+                    seen.add(p.wheel_name)
+
+                    dest_filepath = dest / p.wheel_name
+                    start = time.monotonic()
+
+                    # Check if wheel is already in destination
+                    if (size := existing.get(p.wheel_name)) is not None:
+                        if (p.size is None or size == p.size) and (
+                            not options.verify_existing
+                            or await verify_wheel(p, dest_filepath, full=True)
+                        ):
+                            if not await _add_to_store(p, dest_filepath, options, summary):
+                                continue
+
+                            print(f"Wheel was already downloaded: {dest_filepath}")
+                            summary.existing += 1
+                            if telemetry is not None:
+                                telemetry.wheel(
+                                    p.wheel_name,
+                                    WheelSource.DESTINATION,
+                                    n_bytes=size,
+                                    duration=time.monotonic() - start,
+                                )
+                            continue
+
+                        print(f"Existing wheel failed verification: {dest_filepath}")
+
+                    # Check if another bucket has already stored the wheel
+                    if (
+                        store is not None
+                        and p.sha256 is not None
+                        and await anyio.to_thread.run_sync(
+                            store.link, p.sha256, dest_filepath, p.size
+                        )
+                    ):
+                        print(f"Using stored {p.wheel_name}")
+                        summary.stored += 1
+                        summary.added[p.wheel_name] = p.sha256
+                        await _record_placed(telemetry, p, dest_filepath, WheelSource.STORE, start)
+                        continue
+
+                    # Check if wheel is already in pip's cache
+                    if is_cached and await _place_cached_wheel(p, dest_filepath, options):
+                        if not await _add_to_store(p, dest_filepath, options, summary):
+                            continue
+
+                        print(f"Using cached {p.wheel_name}")
+                        summary.cached += 1
+                        summary.added[p.wheel_name] = p.sha256
+                        await _record_placed(
+                            telemetry, p, dest_filepath, WheelSource.PIP_CACHE, start
+                        )
+                        continue
+
+                    # Wheels served by a local index are linked rather than transferred
+                    if (local_path := _local_wheel_path(p.wheel_url)) is not None:
+                        await _link_local_wheel(p, local_path, dest_filepath, options, summary)
+                        continue
+
+                    # Stop pulling from a streamed source while the backlog is full
+                    await pending.acquire()
+                    task = tg.create_task(
+                        _download_package(
+                            client=client,
+                            p=p,
+                            dest=dest,
+                            limiter=limiter,
+                            bandwidth=bandwidth,
+                            retry=options.retry,
+                            summary=summary,
+                            store=store,
+                            telemetry=telemetry,
+                            hosts=hosts,
+                        )
+                    )
+                    task.add_done_callback(lambda _: pending.release())
+
+    return summary
@@ -0,0 +1,55 @@
+import importlib.util
+from dataclasses import dataclass
+
+import httpx
+
+from wheely_bucket import USER_AGENT
+
+
+def http2_available() -> bool:
+    """Check whether the optional `h2` package needed for HTTP/2 support is installed."""
+    return importlib.util.find_spec("h2") is not None
+
+
+@dataclass(frozen=True, slots=True)
+class ClientOptions:
+    """
+    Connection pool & protocol configuration for the HTTP client shared across a run.
+
+    At most `max_connections` connections are opened, all of which are kept alive for reuse until
+    idle for `keepalive_expiry` seconds, so the many small requests of a run don't each pay for a
+    new TCP & TLS handshake. Requests waiting for a free connection wait indefinitely, as the number
+    of concurrent requests is already bounded by the query & download limits.
+
+    If `http2` is `True`, HTTP/2 is negotiated with servers supporting it, multiplexing concurrent
+    requests to the same host over a single connection; this requires the optional `h2` package,
+    e.g. via the `http2` extra.
+    """
+
+    max_connections: int = 100
+    keepalive_expiry: float = 30
+    connect_timeout: float = 10
+    read_timeout: float = 30
+    http2: bool = False
+
+    def build_client(self, auth: httpx.Auth | None = None) -> httpx.AsyncClient:
+        """Build the HTTP client described by these options, using the provided authentication."""
+        return httpx.AsyncClient(
+            headers={"User-Agent": USER_AGENT},
+            auth=auth,
+            http2=self.http2,
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_connections,
+                keepalive_expiry=self.keepalive_expiry,
+            ),
+            timeout=httpx.Timeout(
+                connect=self.connect_timeout,
+                read=self.read_timeout,
+                write=self.read_timeout,
+                pool=None,
+            ),
+        )
+
+
+DEFAULT_CLIENT_OPTIONS = ClientOptions()
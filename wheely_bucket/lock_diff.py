@@ -0,0 +1,106 @@
+import json
+import subprocess
+from collections import abc
+from pathlib import Path
+
+from wheely_bucket.lock_index import parse_lockfile_content
+from wheely_bucket.parse_lockfile import LockedWheel
+
+
+class BaselineError(Exception):
+    """Raised when the baseline lockfile or snapshot cannot be loaded."""
+
+
+def load_snapshot(snapshot: Path) -> list[LockedWheel]:
+    """
+    Load the `(url, sha256, size)` wheel records from a snapshot file written by `save_snapshot`.
+
+    A missing snapshot is treated as empty, e.g. for the first run against a new snapshot.
+    """
+    try:
+        wheels = json.loads(snapshot.read_bytes())
+    except FileNotFoundError:
+        return []
+    except json.JSONDecodeError as e:
+        raise BaselineError(f"Could not parse snapshot '{snapshot}': {e}") from e
+
+    return [tuple(w) for w in wheels]
+
+
+def save_snapshot(snapshot: Path, wheels: abc.Iterable[LockedWheel]) -> None:
+    """Write the wheel records to a snapshot file, for use as a later baseline."""
+    snapshot.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = snapshot.with_name(f"{snapshot.name}.tmp")
+    tmp_path.write_text(json.dumps(sorted(set(wheels), key=lambda w: w[0])))
+    tmp_path.replace(snapshot)
+
+
+def read_lockfile_at_rev(lockfile: Path, rev: str) -> bytes:
+    """
+    Read the contents of the lockfile as of the provided git revision.
+
+    The lockfile's own directory is used to locate the git repository, so the lockfile need not be
+    at the repository root. A `BaselineError` is raised if the revision cannot be read, e.g. if
+    the lockfile did not exist at that revision.
+    """
+    try:
+        r = subprocess.run(
+            ["git", "show", f"{rev}:./{lockfile.name}"],
+            cwd=lockfile.parent,
+            capture_output=True,
+            check=True,
+        )
+    except FileNotFoundError as e:
+        raise BaselineError("git executable not found") from e
+    except subprocess.CalledProcessError as e:
+        msg = e.stderr.decode(errors="replace").strip()
+        raise BaselineError(f"Could not read '{lockfile}' at revision '{rev}': {msg}") from e
+
+    return r.stdout
+
+
+def load_baseline(
+    lockfile: Path, base: Path | None = None, base_rev: str | None = None
+) -> list[LockedWheel]:
+    """
+    Load the baseline wheel records to compare the lockfile against.
+
+    The baseline is either a file, `base`, or a git revision of the lockfile itself, `base_rev`.
+    A `base` ending in `.json` is treated as a snapshot written by `save_snapshot`, anything else
+    as a `uv.lock`.
+    """
+    if base is not None and base_rev is not None:
+        raise ValueError("Only one of a baseline file or git revision may be provided.")
+
+    if base_rev is not None:
+        return parse_lockfile_content(read_lockfile_at_rev(lockfile, base_rev))
+
+    if base is None:
+        raise ValueError("Either a baseline file or git revision must be provided.")
+
+    if base.suffix == ".json":
+        return load_snapshot(base)
+
+    try:
+        return parse_lockfile_content(base.read_bytes())
+    except FileNotFoundError as e:
+        raise BaselineError(f"Baseline lockfile does not exist: '{base}'") from e
+
+
+def added_wheels(
+    old: abc.Iterable[LockedWheel], new: abc.Iterable[LockedWheel]
+) -> list[LockedWheel]:
+    """Determine the wheels present in `new` but not in `old`, compared by URL."""
+    old_urls = {url for url, *_ in old}
+
+    added = []
+    seen = set()
+    for w in new:
+        url = w[0]
+        if url in old_urls or url in seen:
+            continue
+
+        seen.add(url)
+        added.append(w)
+
+    return added
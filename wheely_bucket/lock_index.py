@@ -0,0 +1,137 @@
+import hashlib
+import json
+import os
+import threading
+import tomllib
+import typing as t
+from collections import abc
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from wheely_bucket.parse_lockfile import (
+    LockedWheel,
+    PackageSpec,
+    WB_CACHE_BASE,
+    extract_locked_wheels,
+)
+
+DEFAULT_LOCK_INDEX_PATH = WB_CACHE_BASE / "lock_index.json"
+
+
+@dataclass(slots=True)
+class LockIndex:
+    """
+    On-disk index of the wheels already extracted from previously parsed lockfiles.
+
+    Entries are keyed by the lockfile's resolved path and record its modification time, size, and
+    SHA256 digest. A lockfile whose modification time & size are unchanged is not read at all; if
+    only its modification time has changed, e.g. from a fresh checkout, its contents are hashed
+    and compared before falling back to a full parse.
+    """
+
+    path: Path = DEFAULT_LOCK_INDEX_PATH
+    entries: dict[str, dict[str, t.Any]] = field(default_factory=dict)
+    hits: int = 0
+    misses: int = 0
+
+    @classmethod
+    def load(cls, path: Path = DEFAULT_LOCK_INDEX_PATH) -> t.Self:
+        """Load the index from the provided path; a missing or corrupt index is treated as empty."""
+        try:
+            entries = json.loads(path.read_bytes())
+        except (FileNotFoundError, json.JSONDecodeError):
+            entries = {}
+
+        return cls(path=path, entries=entries)
+
+    def save(self) -> None:
+        """Write the index to disk."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Unique per thread so concurrent saves don't write to or replace each other's temp file
+        tmp_path = self.path.with_name(
+            f"{self.path.name}.{os.getpid()}.{threading.get_ident()}.tmp"
+        )
+        tmp_path.write_text(json.dumps(self.entries))
+        tmp_path.replace(self.path)
+
+    def lookup(self, lockfile: Path, stat: os.stat_result) -> list[LockedWheel] | None:
+        """Return the indexed wheels if the lockfile's modification time & size are unchanged."""
+        entry = self.entries.get(str(lockfile))
+        if entry is None or entry["mtime_ns"] != stat.st_mtime_ns or entry["size"] != stat.st_size:
+            return None
+
+        return [tuple(w) for w in entry["wheels"]]
+
+    def lookup_content(self, lockfile: Path, digest: str) -> list[LockedWheel] | None:
+        """Return the indexed wheels if the lockfile's contents are unchanged."""
+        entry = self.entries.get(str(lockfile))
+        if entry is None or entry["sha256"] != digest:
+            return None
+
+        return [tuple(w) for w in entry["wheels"]]
+
+    def update(
+        self, lockfile: Path, stat: os.stat_result, digest: str, wheels: list[LockedWheel]
+    ) -> None:
+        """Record the wheels extracted from the lockfile."""
+        self.entries[str(lockfile)] = {
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "sha256": digest,
+            "wheels": wheels,
+        }
+
+    def summary(self) -> str:
+        """Summarize the lockfiles reused from & added to the index during this run."""
+        return f"Lockfile index: {self.hits} unchanged, {self.misses} parsed"
+
+
+@dataclass(slots=True)
+class LockfileState:
+    """
+    A lockfile's on-disk state & any wheels that could be resolved from the index.
+
+    If `wheels` is `None`, the lockfile needs to be parsed from its `content`.
+    """
+
+    lockfile: Path
+    stat: os.stat_result
+    wheels: list[LockedWheel] | None
+    content: bytes = b""
+    digest: str = ""
+
+
+def check_lockfile(lockfile: Path, index: LockIndex | None = None) -> LockfileState:
+    """
+    Resolve the lockfile's wheels from the index, if possible, otherwise read it for parsing.
+
+    The lockfile is only read if its modification time or size differ from the index; if its
+    contents are unchanged, the index entry is refreshed with the new modification time.
+    """
+    lockfile = lockfile.resolve()
+    stat = lockfile.stat()
+    if index is not None and (wheels := index.lookup(lockfile, stat)) is not None:
+        index.hits += 1
+        return LockfileState(lockfile=lockfile, stat=stat, wheels=wheels)
+
+    content = lockfile.read_bytes()
+    digest = hashlib.sha256(content).hexdigest()
+    if index is not None:
+        if (wheels := index.lookup_content(lockfile, digest)) is not None:
+            index.hits += 1
+            index.update(lockfile, stat, digest, wheels)
+            return LockfileState(lockfile=lockfile, stat=stat, wheels=wheels)
+
+        index.misses += 1
+
+    return LockfileState(lockfile=lockfile, stat=stat, wheels=None, content=content, digest=digest)
+
+
+def parse_lockfile_content(content: bytes) -> list[LockedWheel]:
+    """Extract the locked wheels from the raw contents of a `uv.lock`."""
+    return extract_locked_wheels(tomllib.loads(content.decode()))
+
+
+def locked_wheels_to_specs(wheels: abc.Iterable[LockedWheel]) -> set[PackageSpec]:
+    """Build `PackageSpec` instances from the provided `(url, sha256, size)` wheel records."""
+    return {PackageSpec.from_url(url, sha256=sha256, size=size) for url, sha256, size in wheels}
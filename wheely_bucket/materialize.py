@@ -0,0 +1,130 @@
+import ctypes
+import errno
+import hashlib
+import os
+import shutil
+import sys
+from enum import StrEnum
+from pathlib import Path
+
+# Linux ioctl request code for cloning a file's extents, from <linux/fs.h>
+FICLONE = 0x40049409
+
+# Errors indicating a link strategy isn't supported between the given paths, rather than a failure
+# that would also affect a plain copy
+_UNSUPPORTED_ERRNOS = frozenset(
+    {
+        errno.EXDEV,
+        errno.EPERM,
+        errno.EACCES,
+        errno.EINVAL,
+        errno.ENOSYS,
+        errno.ENOTSUP,
+        errno.EOPNOTSUPP,
+        errno.ENOTTY,
+        errno.EMLINK,
+    }
+)
+
+
+def file_sha256(filepath: Path) -> str:
+    """Compute the SHA256 digest of the file's contents."""
+    with filepath.open("rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+class LinkMode(StrEnum):
+    """
+    Strategy used to place an already available wheel into the destination directory.
+
+    `HARDLINK` and `SYMLINK` avoid duplicating any data, `REFLINK` creates a copy-on-write clone on
+    filesystems that support it (e.g. Btrfs, XFS, APFS), and `COPY` performs an in-kernel copy where
+    possible. Strategies that aren't supported for the given source & destination, e.g. a hardlink
+    across filesystem boundaries, fall back to `COPY`.
+    """
+
+    HARDLINK = "hardlink"
+    REFLINK = "reflink"
+    SYMLINK = "symlink"
+    COPY = "copy"
+
+
+def _reflink(src: Path, dst: Path) -> None:
+    """Create a copy-on-write clone of `src` at `dst`, raising `OSError` if unsupported."""
+    if sys.platform == "darwin":
+        libc = ctypes.CDLL(None, use_errno=True)
+        if libc.clonefile(os.fsencode(src), os.fsencode(dst), 0) != 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err), str(dst))
+        return
+
+    if sys.platform != "linux":
+        raise OSError(errno.ENOTSUP, "Reflinks are not supported on this platform", str(dst))
+
+    import fcntl
+
+    with src.open("rb") as fsrc, dst.open("wb") as fdst:
+        try:
+            fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+        except OSError:
+            fdst.close()
+            dst.unlink(missing_ok=True)
+            raise
+
+
+def _copy(src: Path, dst: Path) -> None:
+    """
+    Copy `src` to `dst` without passing the data through userspace, where possible.
+
+    `os.copy_file_range` is attempted first, which may itself reflink or perform a server-side copy
+    depending on the filesystem; if unavailable `shutil.copyfile` is used, which uses `sendfile` or
+    `fcopyfile` where supported by the platform.
+    """
+    if hasattr(os, "copy_file_range"):
+        with src.open("rb") as fsrc, dst.open("wb") as fdst:
+            try:
+                remaining = os.fstat(fsrc.fileno()).st_size
+                while remaining > 0:
+                    n_copied = os.copy_file_range(fsrc.fileno(), fdst.fileno(), remaining)
+                    if n_copied == 0:
+                        break
+                    remaining -= n_copied
+                else:
+                    return
+            except OSError as e:
+                if e.errno not in _UNSUPPORTED_ERRNOS:
+                    raise
+
+    shutil.copyfile(src, dst)
+
+
+def materialize(src: Path, dst: Path, mode: LinkMode = LinkMode.COPY) -> LinkMode:
+    """
+    Place the file at `src` at the path `dst` using the specified link strategy.
+
+    If the requested strategy isn't supported between the two paths, the file is copied instead. Any
+    existing file at `dst` is replaced.
+
+    Returns the strategy that was ultimately used.
+    """
+    dst.unlink(missing_ok=True)
+
+    try:
+        match mode:
+            case LinkMode.HARDLINK:
+                os.link(src, dst)
+            case LinkMode.SYMLINK:
+                dst.symlink_to(src.resolve())
+            case LinkMode.REFLINK:
+                _reflink(src, dst)
+            case LinkMode.COPY:
+                _copy(src, dst)
+    except OSError as e:
+        if mode is LinkMode.COPY or e.errno not in _UNSUPPORTED_ERRNOS:
+            raise
+
+        dst.unlink(missing_ok=True)
+        _copy(src, dst)
+        return LinkMode.COPY
+
+    return mode
@@ -0,0 +1,89 @@
+import json
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+import anyio
+
+from wheely_bucket.parse_lockfile import WB_CACHE_BASE
+
+DEFAULT_METADATA_CACHE_DIR = WB_CACHE_BASE / "simple"
+
+
+@dataclass(slots=True)
+class CachedResponse:
+    """
+    Validators & bookkeeping for a cached Simple API project page.
+
+    The response body itself is stored alongside as raw bytes so it's only decoded when used.
+    """
+
+    etag: str | None
+    last_modified: str | None
+    fetched_at: float
+
+    def is_fresh(self, ttl: float) -> bool:
+        """Check whether the response was fetched within the last `ttl` seconds."""
+        return (time.time() - self.fetched_at) < ttl
+
+    def conditional_headers(self) -> dict[str, str]:
+        """Build the request headers needed to revalidate the cached response."""
+        headers = {}
+        if self.etag is not None:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified is not None:
+            headers["If-Modified-Since"] = self.last_modified
+
+        return headers
+
+
+@dataclass(slots=True)
+class MetadataCache:
+    """
+    On-disk cache of Simple API project pages, keyed by normalized project name.
+
+    Cached responses younger than `ttl` seconds are used without contacting the index; older
+    responses are revalidated using a conditional request, where a `304` is treated as a cache hit.
+    If `offline` is `True`, cached responses are always used regardless of age and the index is
+    never contacted.
+    """
+
+    cache_dir: Path = DEFAULT_METADATA_CACHE_DIR
+    ttl: float = 0
+    offline: bool = False
+    hits: int = 0
+    misses: int = 0
+
+    def _body_path(self, project: str) -> Path:
+        return self.cache_dir / f"{project}.json"
+
+    def _meta_path(self, project: str) -> Path:
+        return self.cache_dir / f"{project}.meta.json"
+
+    async def load(self, project: str) -> tuple[CachedResponse, bytes] | None:
+        """Load the cached response for the normalized project name, if present."""
+        meta_path = anyio.Path(self._meta_path(project))
+        body_path = anyio.Path(self._body_path(project))
+        try:
+            meta = json.loads(await meta_path.read_bytes())
+            body = await body_path.read_bytes()
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+        return CachedResponse(**meta), body
+
+    async def store(self, project: str, cached: CachedResponse, body: bytes | None = None) -> None:
+        """
+        Store the cached response for the normalized project name.
+
+        If `body` is `None`, only the response validators are updated.
+        """
+        # Keys may be namespaced by index, e.g. "<index>/<project>"
+        await anyio.Path(self._meta_path(project)).parent.mkdir(parents=True, exist_ok=True)
+        if body is not None:
+            await anyio.Path(self._body_path(project)).write_bytes(body)
+        await anyio.Path(self._meta_path(project)).write_text(json.dumps(asdict(cached)))
+
+    def summary(self) -> str:
+        """Summarize the cache hits & misses recorded during this run."""
+        return f"Metadata cache: {self.hits} hit(s), {self.misses} miss(es)"
@@ -1,12 +1,29 @@
+import asyncio
+import functools
+import hashlib
+import json
 import re
+import sys
+import time
+import typing as t
+from collections import abc
+from dataclasses import dataclass, field
 
 import httpx
 from packaging.requirements import Requirement
-from packaging.specifiers import SpecifierSet
-from packaging.version import Version
+from packaging.specifiers import InvalidSpecifier, SpecifierSet
+from packaging.tags import Tag, parse_tag
+from packaging.version import InvalidVersion, Version
 
 from wheely_bucket import USER_AGENT
+from wheely_bucket.dl_manager import select_best_wheels, target_tags
+from wheely_bucket.metadata_cache import CachedResponse, MetadataCache
 from wheely_bucket.parse_lockfile import PackageSpec
+from wheely_bucket.retry import DEFAULT_RETRY_POLICY, RetryPolicy, call_with_retry, check_response
+from wheely_bucket.telemetry import QuerySource, RunTelemetry
+
+if t.TYPE_CHECKING:
+    from wheely_bucket.indexes import IndexSet
 
 PYPI_SIMPLE_API = "https://pypi.org/simple/"
 ACCEPT_JSON = "application/vnd.pypi.simple.v1+json"
@@ -15,6 +32,10 @@ HEADER = {
     "Accept": ACCEPT_JSON,
 }
 
+_LATE_PATCH = 99
+
+MAX_CONCURRENT_QUERIES = 10
+
 
 def _normalize(package_name: str) -> str:
     """
@@ -26,52 +47,411 @@ def _normalize(package_name: str) -> str:
     return re.sub(r"[-_.]+", "-", package_name).lower()
 
 
-async def query_pypi_simple(
-    client: httpx.AsyncClient, package_name: str
-) -> tuple[list[PackageSpec], list[Version]]:
+def _cache_key(project: str, index_url: str) -> str:
     """
-    Query the PyPI Simple Repository API for wheels & releases available for the specified package.
+    Build the metadata cache key of the normalized project name for the given index.
 
-    Specs should be returned in reverse chronological order.
+    PyPI's responses are keyed by the project name alone, other indexes' are namespaced by a hash
+    of their URL so their responses don't collide.
+    """
+    if index_url == PYPI_SIMPLE_API:
+        return project
 
-    NOTE: Yanked wheels are not included in the final output, though may still be included in the
-    version list.
+    index_hash = hashlib.sha224(index_url.encode()).hexdigest()[:16]
+    return f"{index_hash}/{project}"
+
+
+async def _get_project_page(
+    client: httpx.AsyncClient,
+    project: str,
+    headers: dict[str, str],
+    retry: RetryPolicy,
+    index_url: str = PYPI_SIMPLE_API,
+) -> httpx.Response:
+    """
+    Request the Simple API page for the normalized project name, retrying on transient failures.
+
+    A `304 Not Modified` response is returned as-is for the caller to handle.
+    """
+
+    async def _get() -> httpx.Response:
+        r = await client.get(f"{index_url}{project}/", headers=headers, follow_redirects=True)
+        if r.status_code != httpx.codes.NOT_MODIFIED:
+            check_response(r)
+
+        return r
+
+    return await call_with_retry(_get, policy=retry, description=f"Simple API query for {project}")
+
+
+async def _cached_simple_query(
+    client: httpx.AsyncClient,
+    project: str,
+    cache: MetadataCache,
+    retry: RetryPolicy = DEFAULT_RETRY_POLICY,
+    index_url: str = PYPI_SIMPLE_API,
+) -> tuple[dict[str, t.Any], QuerySource]:
+    """
+    Query the Simple API for the normalized project name, using & updating the metadata cache.
+
+    Fresh cached responses are used directly, stale responses are revalidated with a conditional
+    request. A `LookupError` is raised if the cache is offline and has no response for the project.
+
+    The decoded response is returned along with how it was obtained.
+    """
+    cache_key = _cache_key(project, index_url)
+    cached = await cache.load(cache_key)
+    if cached is not None:
+        cached_response, body = cached
+        if cache.offline or cached_response.is_fresh(cache.ttl):
+            cache.hits += 1
+            return json.loads(body), QuerySource.CACHE
+    elif cache.offline:
+        raise LookupError(f"No cached Simple API response for '{project}' while offline.")
+
+    headers = dict(HEADER)
+    if cached is not None:
+        headers.update(cached_response.conditional_headers())
+
+    r = await _get_project_page(
+        client=client, project=project, headers=headers, retry=retry, index_url=index_url
+    )
+    if cached is not None and r.status_code == httpx.codes.NOT_MODIFIED:
+        cache.hits += 1
+        cached_response.fetched_at = time.time()
+        await cache.store(cache_key, cached_response)
+        return json.loads(body), QuerySource.REVALIDATED
+
+    cache.misses += 1
+    await cache.store(
+        cache_key,
+        CachedResponse(
+            etag=r.headers.get("ETag"),
+            last_modified=r.headers.get("Last-Modified"),
+            fetched_at=time.time(),
+        ),
+        body=r.content,
+    )
+
+    return r.json(), QuerySource.NETWORK
+
+
+def filename_version(filename: str) -> str | None:
+    """Extract the raw version component of a wheel filename, without validating the filename."""
+    parts = filename.split("-")
+    if len(parts) not in (5, 6):
+        return None
+
+    return parts[1]
+
+
+def _filename_tags(filename: str) -> frozenset[Tag]:
+    """
+    Expand the compressed tag set of a wheel filename, without validating the rest of the filename.
+
+    Malformed filenames expand to no tags.
+    """
+    parts = filename.removesuffix(".whl").split("-")
+    if len(parts) not in (5, 6):
+        return frozenset()
+
+    return parse_tag("-".join(parts[-3:]))
+
+
+@functools.cache
+def _parse_requires_python(requires_python: str) -> SpecifierSet | None:
+    try:
+        return SpecifierSet(requires_python)
+    except InvalidSpecifier:
+        return None
+
+
+def allows_python(
+    requires_python: str | None, python_versions: abc.Iterable[tuple[int, int]] | None = None
+) -> bool:
+    """
+    Check whether the `requires-python` specifier allows any of the targeted Python versions.
+
+    Targets only identify a minor version, so a target is allowed if either its first or a late
+    patch release satisfies the specifier. If `python_versions` is `None`, the currently running
+    interpreter is targeted. Missing or invalid specifiers allow every target.
+    """
+    if not requires_python:
+        return True
+
+    spec = _parse_requires_python(requires_python)
+    if spec is None:
+        return True
+
+    if python_versions is None:
+        python_versions = (sys.version_info[:2],)
+
+    for major, minor in python_versions:
+        for patch in (0, _LATE_PATCH):
+            if spec.contains(f"{major}.{minor}.{patch}", prereleases=True):
+                return True
+
+    return False
+
+
+@dataclass(slots=True)
+class SimpleProject:
     """
-    r = await client.get(
-        f"{PYPI_SIMPLE_API}{_normalize(package_name)}/",
-        headers=HEADER,
-        follow_redirects=True,
+    Wheel files of a project's Simple API response, in reverse chronological order.
+
+    Files are kept as their raw Simple API entries & are only parsed into `PackageSpec` instances
+    once requested, so the bulk of a project's release history is never materialized. Parsed specs
+    are memoized per file.
+    """
+
+    files: list[dict[str, t.Any]]
+    versions: list[Version]
+    _releases: dict[Version, list[dict[str, t.Any]]] | None = field(
+        default=None, init=False, repr=False
     )
-    r.raise_for_status()
+    _specs: dict[str, PackageSpec] = field(default_factory=dict, init=False, repr=False)
+
+    @classmethod
+    def from_json(cls, package_info: dict[str, t.Any]) -> t.Self:
+        """
+        Build the project from a PEP 691 JSON response, discarding yanked & non-wheel files.
 
-    package_info = r.json()
-    packages = []
-    for f in reversed(package_info["files"]):
-        if f.get("yanked", False):
-            continue
+        NOTE: Yanked releases may still be included in the version list.
+        """
+        files = [
+            f
+            for f in reversed(package_info["files"])
+            if not f.get("yanked", False) and f["url"].endswith(".whl")
+        ]
+        versions = [Version(v) for v in reversed(package_info["versions"])]
 
+        return cls(files=files, versions=versions)
+
+    def _release_files(self, version: Version) -> list[dict[str, t.Any]]:
+        """
+        Look up the files of the release, grouping all files by version on first use.
+
+        Versions are read from the filename without parsing the rest of it, and each distinct
+        version string is only parsed once.
+        """
+        if self._releases is None:
+            releases: dict[Version, list[dict[str, t.Any]]] = {}
+            parsed: dict[str, Version | None] = {}
+            for f in self.files:
+                raw_version = filename_version(f["url"].rsplit("/", 1)[-1])
+                if raw_version is None:
+                    continue
+
+                if raw_version not in parsed:
+                    try:
+                        parsed[raw_version] = Version(raw_version)
+                    except InvalidVersion:
+                        parsed[raw_version] = None
+
+                if (file_version := parsed[raw_version]) is not None:
+                    releases.setdefault(file_version, []).append(f)
+
+            self._releases = releases
+
+        return self._releases.get(version, [])
+
+    def _spec(self, f: dict[str, t.Any]) -> PackageSpec:
         url: str = f["url"]
-        if not url.endswith(".whl"):
-            continue
+        if (spec := self._specs.get(url)) is None:
+            # PEP 714 renamed PEP 658's data-dist-info-metadata key, indexes may serve either
+            core_metadata = f.get("core-metadata", f.get("data-dist-info-metadata", False))
+            spec = PackageSpec.from_url(
+                url,
+                sha256=f.get("hashes", {}).get("sha256"),
+                size=f.get("size"),
+                core_metadata=bool(core_metadata),
+            )
+            self._specs[url] = spec
+
+        return spec
 
-        packages.append(PackageSpec.from_url(f["url"]))
+    def all_wheels(self) -> list[PackageSpec]:
+        """Build specs for every wheel of every release."""
+        return [self._spec(f) for f in self.files]
 
-    releases = [Version(v) for v in reversed(package_info["versions"])]
+    def wheels(self, version: Version) -> list[PackageSpec]:
+        """Build specs for every wheel of the release."""
+        return [self._spec(f) for f in self._release_files(version)]
 
-    return packages, releases
+    def compatible_wheels(
+        self,
+        version: Version,
+        python_versions: abc.Iterable[tuple[int, int]] | None = None,
+        platforms: abc.Iterable[str] | None = None,
+        best_only: bool = False,
+    ) -> list[PackageSpec]:
+        """
+        Build specs for the wheels of the release compatible with the targets.
 
+        Files are checked against their `requires-python` & the tags in their filename before a
+        spec is built, so specs are only built for the compatible wheels. The expected form of
+        `python_versions` and `platforms` matches that of `filter_packages`.
 
-async def filtered_pypi_query(client: httpx.AsyncClient, req: Requirement) -> set[PackageSpec]:
+        If `best_only` is `True`, only the most preferred of the compatible wheels for each Python
+        version & platform is kept, per `select_best_wheels`.
+        """
+        if python_versions is not None:
+            python_versions = tuple(python_versions)
+        if platforms is not None:
+            platforms = tuple(platforms)
+        targets = target_tags(python_versions=python_versions, platforms=platforms)
+
+        compatible = []
+        for f in self._release_files(version):
+            if not allows_python(f.get("requires-python"), python_versions):
+                continue
+
+            tags = _filename_tags(f["url"].rsplit("/", 1)[-1])
+            if any(tag in supported for supported in targets for tag in tags):
+                compatible.append(self._spec(f))
+
+        if best_only:
+            best = select_best_wheels(compatible, python_versions, platforms)
+            compatible = [p for p in compatible if p in best]
+
+        return compatible
+
+
+async def fetch_simple_project(
+    client: httpx.AsyncClient,
+    package_name: str,
+    cache: MetadataCache | None = None,
+    retry: RetryPolicy = DEFAULT_RETRY_POLICY,
+    index_url: str = PYPI_SIMPLE_API,
+    telemetry: RunTelemetry | None = None,
+) -> SimpleProject:
     """
-    Query the PyPI Simple Repository API for wheels that satisfy the provided requirement.
+    Query the Simple Repository API for the files & releases of the specified package.
 
-    NOTE: Yanked wheels are not included in the final output.
+    PyPI is queried unless another index is specified by `index_url`, which is expected to end with
+    a trailing slash.
+
+    If a `MetadataCache` instance is provided, responses are cached on disk & revalidated on later
+    queries rather than being fetched in full each time.
+
+    Transient network errors & retryable HTTP statuses are retried according to the provided retry
+    policy.
+
+    If telemetry is provided, the query's duration & how it was answered are recorded.
+    """
+    project = _normalize(package_name)
+    start = time.monotonic()
+    try:
+        if cache is None:
+            r = await _get_project_page(
+                client=client, project=project, headers=HEADER, retry=retry, index_url=index_url
+            )
+            package_info, source = r.json(), QuerySource.NETWORK
+        else:
+            package_info, source = await _cached_simple_query(
+                client=client, project=project, cache=cache, retry=retry, index_url=index_url
+            )
+    except Exception as e:
+        if telemetry is not None:
+            telemetry.query(
+                project, QuerySource.FAILED, duration=time.monotonic() - start, error=str(e)
+            )
+        raise
+
+    if telemetry is not None:
+        telemetry.query(project, source, duration=time.monotonic() - start)
+
+    return SimpleProject.from_json(package_info)
+
+
+@dataclass(slots=True)
+class ProjectMemo:
     """
-    available_packages, available_versions = await query_pypi_simple(
-        client=client, package_name=req.name
+    Memoize parsed Simple API responses per normalized project name for the duration of a run.
+
+    Concurrent lookups of the same project share a single query. If `indexes` are provided they
+    are queried in priority order, otherwise PyPI is queried. Queries are recorded to `telemetry`,
+    if provided.
+    """
+
+    indexes: "IndexSet | None" = None
+    telemetry: RunTelemetry | None = None
+    projects: dict[str, asyncio.Future[SimpleProject]] = field(default_factory=dict)
+
+    async def get(
+        self,
+        client: httpx.AsyncClient,
+        package_name: str,
+        cache: MetadataCache | None = None,
+        retry: RetryPolicy = DEFAULT_RETRY_POLICY,
+    ) -> SimpleProject:
+        """Look up the project, querying the Simple API only on its first lookup."""
+        project = _normalize(package_name)
+        if project not in self.projects:
+            query: abc.Awaitable[SimpleProject]
+            if self.indexes is None:
+                query = fetch_simple_project(
+                    client=client,
+                    package_name=project,
+                    cache=cache,
+                    retry=retry,
+                    telemetry=self.telemetry,
+                )
+            else:
+                query = self.indexes.fetch_project(
+                    client=client,
+                    project=project,
+                    cache=cache,
+                    retry=retry,
+                    telemetry=self.telemetry,
+                )
+            self.projects[project] = asyncio.ensure_future(query)
+
+        return await self.projects[project]
+
+    def cancel(self) -> None:
+        """Cancel any queries still in flight."""
+        for query in self.projects.values():
+            query.cancel()
+
+
+async def query_pypi_simple(
+    client: httpx.AsyncClient,
+    package_name: str,
+    cache: MetadataCache | None = None,
+    retry: RetryPolicy = DEFAULT_RETRY_POLICY,
+) -> tuple[list[PackageSpec], list[Version]]:
+    """
+    Query the PyPI Simple Repository API for wheels & releases available for the specified package.
+
+    Specs should be returned in reverse chronological order.
+
+    If a `MetadataCache` instance is provided, responses are cached on disk & revalidated on later
+    queries rather than being fetched in full each time.
+
+    Transient network errors & retryable HTTP statuses are retried according to the provided retry
+    policy.
+
+    NOTE: Specs are built for the project's entire release history; `fetch_simple_project` should
+    be preferred where only some releases are needed.
+
+    NOTE: Yanked wheels are not included in the final output, though may still be included in the
+    version list.
+    """
+    project = await fetch_simple_project(
+        client=client, package_name=package_name, cache=cache, retry=retry
     )
-    filtered_packages: set[PackageSpec] = set()
 
+    return project.all_wheels(), project.versions
+
+
+def select_version(req: Requirement, available_versions: list[Version]) -> Version | None:
+    """
+    Select the latest of the available versions satisfying the requirement's specifier.
+
+    Versions are assumed to be in reverse chronological order, as from `query_pypi_simple`. If the
+    requirement has no specifier, the latest version is selected.
+    """
     # For an unspecified requirement, set the specifier to the latest version
     # Not sure if this might run into issues with yanked releases, I think those might still show up
     # in the version list
@@ -80,14 +460,93 @@ async def filtered_pypi_query(client: httpx.AsyncClient, req: Requirement) -> se
     else:
         filter_spec = req.specifier
 
-    # Resolve the latest compatible version & add all matching wheels
     filtered_versions = list(filter_spec.filter(available_versions))
     if not filtered_versions:
-        return filtered_packages
+        return None
+
+    return filtered_versions[0]
+
+
+async def filtered_pypi_query(
+    client: httpx.AsyncClient,
+    req: Requirement,
+    cache: MetadataCache | None = None,
+    retry: RetryPolicy = DEFAULT_RETRY_POLICY,
+) -> set[PackageSpec]:
+    """
+    Query the PyPI Simple Repository API for wheels that satisfy the provided requirement.
+
+    NOTE: Yanked wheels are not included in the final output.
+    """
+    project = await fetch_simple_project(
+        client=client, package_name=req.name, cache=cache, retry=retry
+    )
+
+    # Resolve the latest compatible version & add all matching wheels
+    latest_ver = select_version(req, project.versions)
+    if latest_ver is None:
+        return set()
+
+    return set(project.wheels(latest_ver))
+
+
+async def stream_filtered_queries(
+    client: httpx.AsyncClient,
+    reqs: abc.Iterable[Requirement],
+    python_versions: abc.Iterable[tuple[int, int]] | None,
+    platforms: abc.Iterable[str] | None,
+    cache: MetadataCache | None = None,
+    retry: RetryPolicy = DEFAULT_RETRY_POLICY,
+    failures: dict[str, str] | None = None,
+    indexes: "IndexSet | None" = None,
+    telemetry: RunTelemetry | None = None,
+    best_only: bool = False,
+) -> abc.AsyncIterator[PackageSpec]:
+    """
+    Concurrently query the Simple API for the provided requirements, yielding compatible wheels.
+
+    Queries are bounded by `MAX_CONCURRENT_QUERIES`; wheels for each requirement are filtered &
+    yielded as soon as its query resolves so downstream downloads can begin immediately. Each
+    project is only queried once, even if named by several requirements, and specs are only built
+    for the compatible wheels of the selected release. If `indexes` are provided they are queried
+    in priority order, otherwise PyPI is queried. Queries are recorded to `telemetry`, if provided.
+    If `best_only` is `True`, only the most preferred wheel for each Python version & platform is
+    yielded.
+
+    Requirements whose query ultimately fails are recorded in `failures`, if provided, rather than
+    interrupting the remaining queries.
+    """
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_QUERIES)
+    memo = ProjectMemo(indexes=indexes, telemetry=telemetry)
+    python_versions = None if python_versions is None else tuple(python_versions)
+    platforms = None if platforms is None else tuple(platforms)
+
+    async def _query(req: Requirement) -> list[PackageSpec]:
+        async with semaphore:
+            try:
+                project = await memo.get(
+                    client=client, package_name=req.name, cache=cache, retry=retry
+                )
+            except Exception as e:
+                print(f"Could not query {req}: {e}")
+                if failures is not None:
+                    failures[str(req)] = str(e)
+                return []
+
+        version = select_version(req, project.versions) if project.versions else None
+        if version is None:
+            return []
 
-    latest_ver = filtered_versions[0]
-    for p in available_packages:
-        if p.version == latest_ver:
-            filtered_packages.add(p)
+        return project.compatible_wheels(
+            version, python_versions=python_versions, platforms=platforms, best_only=best_only
+        )
 
-    return filtered_packages
+    query_tasks = [asyncio.create_task(_query(r)) for r in reqs]
+    try:
+        for next_done in asyncio.as_completed(query_tasks):
+            for p in await next_done:
+                yield p
+    finally:
+        for task in query_tasks:
+            task.cancel()
+        memo.cancel()
@@ -1,19 +1,25 @@
+import functools
 import hashlib
+import itertools
 import tomllib
 import typing as t
 from collections import abc
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
+from types import MappingProxyType
 
 from packaging.tags import Tag, compatible_tags, cpython_tags
 from packaging.utils import parse_wheel_filename
 from packaging.version import Version
 from pip._internal.locations import USER_CACHE_DIR
+from pip._internal.utils.appdirs import user_cache_dir
 
 PIP_CACHE_BASE = Path(USER_CACHE_DIR)
 PIP_HTTP_CACHE = PIP_CACHE_BASE / "http-v2"
 PIP_USER_WHEEL_CACHE = PIP_CACHE_BASE / "wheels"
 
+WB_CACHE_BASE = Path(user_cache_dir("wheely-bucket"))
+
 
 @dataclass(frozen=True, slots=True)
 class PackageSpec:  # noqa: D101
@@ -22,11 +28,25 @@ class PackageSpec:  # noqa: D101
     wheel_name: str
     wheel_url: str
     tags: frozenset[Tag]
+    sha256: str | None = field(default=None, compare=False)
+    size: int | None = field(default=None, compare=False)
+    core_metadata: bool = field(default=False, compare=False)
+    _url_hash: str | None = field(default=None, init=False, repr=False, compare=False)
 
     @property
     def url_hash(self) -> str:
-        """Calculate the SHA224 hash of the wheel URL."""
-        return hashlib.sha224(self.wheel_url.encode()).hexdigest()
+        """
+        Calculate the SHA224 hash of the wheel URL.
+
+        The hash is only calculated on first access & memoized on the instance.
+        """
+        url_hash = self._url_hash
+        if url_hash is None:
+            url_hash = hashlib.sha224(self.wheel_url.encode()).hexdigest()
+            # Instances are frozen, so the memoized value has to bypass the dataclass' __setattr__
+            object.__setattr__(self, "_url_hash", url_hash)
+
+        return url_hash
 
     @property
     def cached_wheel_path(self) -> Path:
@@ -64,13 +84,31 @@ class PackageSpec:  # noqa: D101
 
         for spec in wheel_spec:
             wheel_url = spec["url"]
-            packages.add(cls.from_url(wheel_url))
+            packages.add(
+                cls.from_url(
+                    wheel_url, sha256=_parse_lock_hash(spec.get("hash")), size=spec.get("size")
+                )
+            )
 
         return packages
 
     @classmethod
-    def from_url(cls, url: str) -> t.Self:
-        """Build `PackageSpec` instance(s) from the provided wheel URL."""
+    def from_url(
+        cls,
+        url: str,
+        sha256: str | None = None,
+        size: int | None = None,
+        core_metadata: bool = False,
+    ) -> t.Self:
+        """
+        Build `PackageSpec` instance(s) from the provided wheel URL.
+
+        The expected SHA256 digest & size of the wheel may optionally be provided for verification
+        of the downloaded file; these do not participate in equality checks.
+
+        `core_metadata` indicates whether the index serves the wheel's core metadata file alongside
+        the wheel, at `<url>.metadata`, per PEP 658.
+        """
         *_, wheel_filename = url.split("/")
         name, ver, _, tags = parse_wheel_filename(wheel_filename)
 
@@ -80,9 +118,54 @@ class PackageSpec:  # noqa: D101
             wheel_name=wheel_filename,
             wheel_url=url,
             tags=tags,
+            sha256=sha256,
+            size=size,
+            core_metadata=core_metadata,
         )
 
 
+def _parse_lock_hash(lock_hash: str | None) -> str | None:
+    """
+    Extract the SHA256 digest from a lockfile's `<algorithm>:<digest>` hash specification.
+
+    If the hash is missing or uses an algorithm other than SHA256, `None` is returned.
+    """
+    if lock_hash is None:
+        return None
+
+    algorithm, _, digest = lock_hash.partition(":")
+    if algorithm != "sha256" or not digest:
+        return None
+
+    return digest
+
+
+@functools.cache
+def supported_tags(
+    python_version: tuple[int, ...] | None = None,
+    platforms: tuple[str, ...] | None = None,
+) -> abc.Mapping[Tag, int]:
+    """
+    Build an index of the tags supported by the given Python version and platform(s).
+
+    Tags are mapped to their priority, as ordered by `packaging.tags`, where lower values indicate a
+    more preferred tag. Results are cached per target, so the supported tags are only generated once
+    regardless of the number of wheels being checked.
+
+    The expected form of `python_version` and `platforms` matches that of
+    `packaging.tags.cpython_tags`, but as tuples so they may be hashed.
+    """
+    index: dict[Tag, int] = {}
+    all_tags = itertools.chain(
+        cpython_tags(python_version=python_version, platforms=platforms),
+        compatible_tags(python_version=python_version, platforms=platforms),
+    )
+    for priority, tag in enumerate(all_tags):
+        index.setdefault(tag, priority)
+
+    return MappingProxyType(index)
+
+
 def is_compatible_with(
     tags: abc.Iterable[Tag],
     python_version: abc.Sequence[int] | None = None,
@@ -94,15 +177,33 @@ def is_compatible_with(
     The expected form of `python_version` and `platforms` matches that of
     `packaging.tags.cpython_tags`.
     """
-    for tag in cpython_tags(python_version=python_version, platforms=platforms):
-        if tag in tags:
-            return True
+    supported = supported_tags(
+        python_version=None if python_version is None else tuple(python_version),
+        platforms=None if platforms is None else tuple(platforms),
+    )
+
+    return any(tag in supported for tag in tags)
+
+
+LockedWheel: t.TypeAlias = tuple[str, str | None, int | None]
+
+
+def extract_locked_wheels(locked: dict[str, t.Any]) -> list[LockedWheel]:
+    """
+    Extract the `(url, sha256, size)` of each wheel from a parsed `uv.lock`.
 
-    for tag in compatible_tags(python_version=python_version, platforms=platforms):
-        if tag in tags:
-            return True
+    This is a lightweight alternative to building `PackageSpec` instances, e.g. for passing results
+    between processes or storing them on disk. Editable packages are not extracted.
+    """
+    wheels = []
+    for p in locked["package"]:
+        if "editable" in p["source"]:
+            continue
+
+        for spec in p.get("wheels", ()):
+            wheels.append((spec["url"], _parse_lock_hash(spec.get("hash")), spec.get("size")))
 
-    return False
+    return wheels
 
 
 def parse_project(
@@ -128,11 +229,7 @@ def parse_project(
     with lockfile.open("rb") as f:
         locked = tomllib.load(f)
 
-    packages = set()
-    for p in locked["package"]:
-        if "editable" in p["source"]:
-            continue
-
-        packages |= PackageSpec.from_lock(p)
-
-    return packages
+    return {
+        PackageSpec.from_url(url, sha256=sha256, size=size)
+        for url, sha256, size in extract_locked_wheels(locked)
+    }
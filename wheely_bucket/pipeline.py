@@ -0,0 +1,170 @@
+import asyncio
+import functools
+import multiprocessing
+from collections import abc
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+import anyio
+
+from wheely_bucket.dl_manager import filter_packages, select_best_wheels
+from wheely_bucket.lock_index import (
+    LockIndex,
+    check_lockfile,
+    locked_wheels_to_specs,
+    parse_lockfile_content,
+)
+from wheely_bucket.parse_lockfile import LockedWheel, PackageSpec
+
+QUEUE_DEPTH = 64
+DISCOVERY_BATCH_SIZE = 32
+MAX_CONCURRENT_PARSES = 8
+
+# Until this many lockfiles need parsing, process pool startup outweighs any parsing speedup
+PARALLEL_PARSE_THRESHOLD = 4
+
+# Forking while the event loop's worker threads are running risks deadlocking the children
+PARSE_MP_CONTEXT = multiprocessing.get_context(
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+
+
+@dataclass(slots=True)
+class PipelineStats:
+    """Running tally of the work done by each stage of the lockfile pipeline."""
+
+    lockfiles: int = 0
+    wheels: int = 0
+    unique_wheels: int = 0
+    compatible_wheels: int = 0
+
+    def report(self) -> str:
+        """Summarize the lockfile pipeline run."""
+        return (
+            f"Processed {self.lockfiles} lockfile(s): {self.wheels} locked wheel(s), "
+            f"{self.unique_wheels} unique, {self.compatible_wheels} compatible"
+        )
+
+
+async def discover_lockfiles(topdir: Path, pattern: str) -> abc.AsyncIterator[Path]:
+    """
+    Lazily walk the base directory for lockfiles matching the provided glob pattern.
+
+    The walk is performed in a worker thread, in batches, so lockfiles are yielded as they are found
+    rather than after the entire tree has been walked.
+    """
+    matches = await anyio.to_thread.run_sync(
+        functools.partial(topdir.glob, pattern, case_sensitive=False)
+    )
+
+    def _next_batch() -> list[Path]:
+        return [lf for _, lf in zip(range(DISCOVERY_BATCH_SIZE), matches, strict=False)]
+
+    while batch := await anyio.to_thread.run_sync(_next_batch):
+        for lf in batch:
+            yield lf
+
+
+async def stream_project_wheels(
+    lockfiles: abc.AsyncIterable[Path],
+    python_versions: abc.Iterable[tuple[int, int]] | None = None,
+    platforms: abc.Iterable[str] | None = None,
+    index: LockIndex | None = None,
+    max_workers: int | None = None,
+    stats: PipelineStats | None = None,
+    queue_depth: int = QUEUE_DEPTH,
+    best_only: bool = False,
+) -> abc.AsyncIterator[PackageSpec]:
+    """
+    Stream compatible wheels from the provided lockfiles as each lockfile is parsed.
+
+    Lockfiles are checked against the index, if provided. The first few lockfiles requiring a
+    parse are parsed in a worker thread; once `PARALLEL_PARSE_THRESHOLD` lockfiles have needed a
+    parse, a pool of up to `max_workers` processes is started for the remainder. Wheels are
+    deduplicated across lockfiles & filtered for compatibility before being yielded; if
+    `best_only` is `True`, only the most preferred wheel of each locked release is yielded for each
+    Python version & platform.
+
+    Lockfiles are pulled from `lockfiles` only as parse slots free up, at most
+    `MAX_CONCURRENT_PARSES` lockfiles are in flight, and wheels are handed off through a queue
+    holding at most `queue_depth` items. A slow consumer (e.g. a download) therefore applies
+    backpressure all the way back to discovery rather than allowing results to accumulate in memory.
+    """
+    if stats is None:
+        stats = PipelineStats()
+
+    python_versions = None if python_versions is None else tuple(python_versions)
+    platforms = None if platforms is None else tuple(platforms)
+
+    wheel_queue: asyncio.Queue[PackageSpec | None] = asyncio.Queue(maxsize=queue_depth)
+    seen_urls: set[str] = set()
+    parse_limit = asyncio.Semaphore(MAX_CONCURRENT_PARSES)
+
+    executor: ProcessPoolExecutor | None = None
+    n_parses = 0
+
+    async def _parse(content: bytes) -> list[LockedWheel]:
+        nonlocal executor, n_parses
+        n_parses += 1
+        if n_parses < PARALLEL_PARSE_THRESHOLD:
+            return await anyio.to_thread.run_sync(parse_lockfile_content, content)
+
+        if executor is None:
+            executor = ProcessPoolExecutor(max_workers=max_workers, mp_context=PARSE_MP_CONTEXT)
+
+        # Submitting may start a worker process, so it's kept off the event loop
+        future = await anyio.to_thread.run_sync(executor.submit, parse_lockfile_content, content)
+        return await asyncio.wrap_future(future)
+
+    async def _process(lf: Path) -> None:
+        try:
+            state = await anyio.to_thread.run_sync(check_lockfile, lf, index)
+            if state.wheels is None:
+                wheels = await _parse(state.content)
+                if index is not None:
+                    index.update(state.lockfile, state.stat, state.digest, wheels)
+            else:
+                wheels = state.wheels
+
+            stats.lockfiles += 1
+            stats.wheels += len(wheels)
+            new_wheels = [w for w in wheels if w[0] not in seen_urls]
+            seen_urls.update(w[0] for w in new_wheels)
+            stats.unique_wheels += len(new_wheels)
+
+            compatible = filter_packages(
+                locked_wheels_to_specs(new_wheels),
+                python_versions=python_versions,
+                platforms=platforms,
+            )
+            if best_only:
+                compatible = select_best_wheels(compatible, python_versions, platforms)
+            stats.compatible_wheels += len(compatible)
+            for p in compatible:
+                await wheel_queue.put(p)
+        finally:
+            parse_limit.release()
+
+    async def _produce() -> None:
+        try:
+            async with asyncio.TaskGroup() as tg:
+                async for lf in lockfiles:
+                    await parse_limit.acquire()
+                    tg.create_task(_process(lf))
+        finally:
+            if executor is not None:
+                await anyio.to_thread.run_sync(
+                    functools.partial(executor.shutdown, cancel_futures=True)
+                )
+            await wheel_queue.put(None)
+
+    producer = asyncio.create_task(_produce())
+    try:
+        while (p := await wheel_queue.get()) is not None:
+            yield p
+
+        # Surface any errors raised while producing
+        await producer
+    finally:
+        producer.cancel()
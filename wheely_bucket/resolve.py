@@ -0,0 +1,300 @@
+import asyncio
+import re
+from collections import abc
+from dataclasses import dataclass, field
+
+import httpx
+from packaging.markers import default_environment
+from packaging.metadata import Metadata
+from packaging.requirements import Requirement
+from packaging.utils import canonicalize_name
+from packaging.version import Version
+
+from wheely_bucket.indexes import IndexSet
+from wheely_bucket.metadata_cache import MetadataCache
+from wheely_bucket.package_query import SimpleProject, fetch_simple_project, select_version
+from wheely_bucket.parse_lockfile import PackageSpec
+from wheely_bucket.retry import DEFAULT_RETRY_POLICY, RetryPolicy, call_with_retry, check_response
+from wheely_bucket.telemetry import RunTelemetry
+
+MAX_CONCURRENT_REQUESTS = 10
+
+_LINUX_PLATFORM = re.compile(r"^(?:many|musl)?linux(?:\d+|_\d+_\d+)?_(?P<machine>.+)$")
+_MACOS_PLATFORM = re.compile(r"^macosx_\d+_\d+_(?P<machine>.+)$")
+_WINDOWS_MACHINES = {"win32": "x86", "win_amd64": "AMD64", "win_arm64": "ARM64"}
+
+
+def _platform_markers(platform: str) -> dict[str, str]:
+    """
+    Map a platform tag, e.g. `'win_amd64'`, to the environment markers of that platform.
+
+    Unrecognized platforms map to no markers, leaving those of the running platform in place.
+    """
+    if (machine := _WINDOWS_MACHINES.get(platform)) is not None:
+        return {
+            "os_name": "nt",
+            "sys_platform": "win32",
+            "platform_system": "Windows",
+            "platform_machine": machine,
+        }
+
+    if (match := _MACOS_PLATFORM.match(platform)) is not None:
+        return {
+            "os_name": "posix",
+            "sys_platform": "darwin",
+            "platform_system": "Darwin",
+            "platform_machine": match["machine"],
+        }
+
+    if (match := _LINUX_PLATFORM.match(platform)) is not None:
+        return {
+            "os_name": "posix",
+            "sys_platform": "linux",
+            "platform_system": "Linux",
+            "platform_machine": match["machine"],
+        }
+
+    return {}
+
+
+def target_environments(
+    python_versions: abc.Iterable[tuple[int, int]] | None = None,
+    platforms: abc.Iterable[str] | None = None,
+) -> list[dict[str, str]]:
+    """
+    Build the environment markers for each combination of Python version & platform targeted.
+
+    If either is `None`, the currently running interpreter or platform is used, matching the
+    behavior of `filter_packages`.
+    """
+    base = {marker: str(value) for marker, value in default_environment().items()}
+    pyvers: abc.Iterable[tuple[int, int] | None] = (
+        (None,) if python_versions is None else python_versions
+    )
+
+    environments = []
+    for pyver in pyvers:
+        for platform in (None,) if platforms is None else platforms:
+            env = dict(base)
+            if pyver is not None:
+                major, minor = pyver
+                env["python_version"] = f"{major}.{minor}"
+                env["python_full_version"] = f"{major}.{minor}.0"
+            if platform is not None:
+                env.update(_platform_markers(platform))
+
+            environments.append(env)
+
+    return environments
+
+
+def dependency_applies(
+    dep: Requirement, environments: abc.Iterable[dict[str, str]], extras: abc.Iterable[str] = ()
+) -> bool:
+    """
+    Check whether the dependency is required in any of the target environments.
+
+    The dependency's marker is evaluated for the base requirement & each of the requested extras.
+    """
+    if dep.marker is None:
+        return True
+
+    for env in environments:
+        for extra in ("", *extras):
+            if dep.marker.evaluate({**env, "extra": extra}):
+                return True
+
+    return False
+
+
+@dataclass(slots=True)
+class ResolveStats:
+    """Running tally of the work done while walking the dependency graph."""
+
+    requirements: int = 0
+    projects: int = 0
+    metadata_fetched: int = 0
+    missing_metadata: list[str] = field(default_factory=list)
+
+    def report(self) -> str:
+        """Summarize the dependency walk, listing any releases whose metadata was unavailable."""
+        lines = [
+            (
+                f"Resolved {self.requirements} requirement(s) across {self.projects} project(s), "
+                f"fetched {self.metadata_fetched} metadata file(s)"
+            )
+        ]
+        lines.extend(
+            f"  {release}: no metadata available, dependencies not followed"
+            for release in self.missing_metadata
+        )
+
+        return "\n".join(lines)
+
+
+async def fetch_requirements(
+    client: httpx.AsyncClient, p: PackageSpec, retry: RetryPolicy = DEFAULT_RETRY_POLICY
+) -> list[Requirement]:
+    """
+    Fetch the wheel's `Requires-Dist` requirements from its PEP 658 core metadata file.
+
+    Only the metadata file served alongside the wheel is fetched, rather than the wheel itself.
+    """
+
+    async def _get() -> httpx.Response:
+        r = await client.get(f"{p.wheel_url}.metadata", follow_redirects=True)
+        check_response(r)
+        return r
+
+    r = await call_with_retry(_get, policy=retry, description=f"metadata for {p.wheel_name}")
+    metadata = Metadata.from_email(r.content, validate=False)
+
+    return list(metadata.requires_dist or ())
+
+
+def _without_marker(req: Requirement) -> Requirement:
+    """Copy the requirement, dropping its already evaluated environment marker."""
+    unmarked = Requirement(str(req))
+    unmarked.marker = None
+    return unmarked
+
+
+def _metadata_candidate(wheels: abc.Iterable[PackageSpec]) -> PackageSpec | None:
+    """
+    Pick the wheel whose metadata should be used for a release, preferring pure Python wheels.
+
+    Wheels of a release are assumed to share their dependencies, with any platform differences
+    expressed through environment markers.
+    """
+    candidates = sorted(
+        (p for p in wheels if p.core_metadata),
+        key=lambda p: (not p.wheel_name.endswith("-none-any.whl"), p.wheel_name),
+    )
+    return candidates[0] if candidates else None
+
+
+async def stream_transitive_wheels(
+    client: httpx.AsyncClient,
+    reqs: abc.Iterable[Requirement],
+    python_versions: abc.Iterable[tuple[int, int]] | None = None,
+    platforms: abc.Iterable[str] | None = None,
+    cache: MetadataCache | None = None,
+    retry: RetryPolicy = DEFAULT_RETRY_POLICY,
+    failures: dict[str, str] | None = None,
+    stats: ResolveStats | None = None,
+    indexes: IndexSet | None = None,
+    telemetry: RunTelemetry | None = None,
+    best_only: bool = False,
+) -> abc.AsyncIterator[PackageSpec]:
+    """
+    Walk the dependency graph of the requirements, yielding compatible wheels for each release.
+
+    Each requirement is resolved to its latest matching release, whose compatible wheels are
+    yielded as soon as they are known. Its dependencies are read from the release's PEP 658 core
+    metadata file, and any whose environment markers apply to at least one targeted Python version
+    & platform are walked concurrently. Simple API responses & release metadata are memoized, so
+    each project & release is only fetched once.
+
+    NOTE: Requirements are resolved independently & without backtracking; if dependents disagree
+    on a project's version, the latest release satisfying each distinct specifier is included.
+    Releases without core metadata are included, but their dependencies are not followed.
+
+    If `indexes` are provided they are queried in priority order, otherwise PyPI is queried.
+    Queries are recorded to `telemetry`, if provided. If `best_only` is `True`, only the most
+    preferred wheel of each release is yielded for each Python version & platform.
+
+    Requirements whose query ultimately fails are recorded in `failures`, if provided, rather than
+    interrupting the rest of the walk.
+    """
+    if stats is None:
+        stats = ResolveStats()
+
+    python_versions = None if python_versions is None else tuple(python_versions)
+    platforms = None if platforms is None else tuple(platforms)
+    environments = target_environments(python_versions, platforms)
+
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+    projects: dict[str, asyncio.Future[SimpleProject]] = {}
+    releases: dict[tuple[str, Version], asyncio.Future[list[Requirement]]] = {}
+    visited: set[tuple[str, str, frozenset[str]]] = set()
+    wheel_queue: asyncio.Queue[PackageSpec | None] = asyncio.Queue()
+
+    async def _query(project: str) -> SimpleProject:
+        async with semaphore:
+            stats.projects += 1
+            if indexes is not None:
+                return await indexes.fetch_project(
+                    client=client, project=project, cache=cache, retry=retry, telemetry=telemetry
+                )
+
+            return await fetch_simple_project(
+                client=client, package_name=project, cache=cache, retry=retry, telemetry=telemetry
+            )
+
+    async def _requirements(p: PackageSpec) -> list[Requirement]:
+        async with semaphore:
+            stats.metadata_fetched += 1
+            return await fetch_requirements(client=client, p=p, retry=retry)
+
+    async def _visit(req: Requirement, tg: asyncio.TaskGroup) -> None:
+        project = canonicalize_name(req.name)
+        key = (project, str(req.specifier), frozenset(req.extras))
+        if key in visited:
+            return
+        visited.add(key)
+        stats.requirements += 1
+
+        try:
+            if project not in projects:
+                projects[project] = asyncio.ensure_future(_query(project))
+            simple_project = await projects[project]
+
+            versions = simple_project.versions
+            version = select_version(req, versions) if versions else None
+            if version is None:
+                raise LookupError(f"No release satisfies '{req}'")
+
+            compatible = simple_project.compatible_wheels(
+                version, python_versions=python_versions, platforms=platforms, best_only=best_only
+            )
+            for p in compatible:
+                await wheel_queue.put(p)
+
+            release = (project, version)
+            if release not in releases:
+                candidate = _metadata_candidate(simple_project.wheels(version))
+                if candidate is None:
+                    stats.missing_metadata.append(f"{project}=={version}")
+                    return
+                releases[release] = asyncio.ensure_future(_requirements(candidate))
+            deps = await releases[release]
+        except Exception as e:
+            print(f"Could not resolve {req}: {e}")
+            if failures is not None:
+                failures[str(req)] = str(e)
+            return
+
+        for dep in deps:
+            if dependency_applies(dep, environments, extras=req.extras):
+                tg.create_task(_visit(_without_marker(dep), tg))
+
+    async def _produce() -> None:
+        try:
+            async with asyncio.TaskGroup() as tg:
+                for req in reqs:
+                    tg.create_task(_visit(req, tg))
+        finally:
+            await wheel_queue.put(None)
+
+    producer = asyncio.create_task(_produce())
+    try:
+        while (p := await wheel_queue.get()) is not None:
+            yield p
+
+        await producer
+    finally:
+        producer.cancel()
+        for query in projects.values():
+            query.cancel()
+        for requirements in releases.values():
+            requirements.cancel()
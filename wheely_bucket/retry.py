@@ -0,0 +1,130 @@
+import asyncio
+import math
+import random
+import typing as t
+from collections import abc
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from email.utils import parsedate_to_datetime
+
+import httpx
+
+T = t.TypeVar("T")
+
+RETRYABLE_STATUS_CODES = frozenset(
+    {
+        httpx.codes.REQUEST_TIMEOUT,
+        httpx.codes.TOO_EARLY,
+        httpx.codes.TOO_MANY_REQUESTS,
+        httpx.codes.INTERNAL_SERVER_ERROR,
+        httpx.codes.BAD_GATEWAY,
+        httpx.codes.SERVICE_UNAVAILABLE,
+        httpx.codes.GATEWAY_TIMEOUT,
+    }
+)
+
+
+class RetryableStatusError(Exception):
+    """Raised for HTTP responses whose status indicates that the request may be retried."""
+
+    def __init__(self, status_code: int, url: str, retry_after: float | None = None) -> None:
+        super().__init__(f"HTTP {status_code} for {url}")
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+RETRYABLE_EXCEPTIONS: tuple[type[Exception], ...] = (httpx.TransportError, RetryableStatusError)
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """
+    Parse the value of a `Retry-After` header into a delay, in seconds.
+
+    The header may be specified as either a number of seconds or an HTTP date; `None` is returned if
+    the header is absent or cannot be parsed.
+    """
+    if value is None:
+        return None
+
+    try:
+        return max(float(value), 0)
+    except ValueError:
+        pass
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+    return max((retry_at - datetime.now(UTC)).total_seconds(), 0)
+
+
+def check_response(r: httpx.Response) -> None:
+    """
+    Raise an appropriate exception if the response does not indicate success.
+
+    Responses with a retryable status code raise a `RetryableStatusError`, carrying any delay
+    requested by the server's `Retry-After` header; all others defer to `raise_for_status`.
+    """
+    if r.status_code in RETRYABLE_STATUS_CODES:
+        raise RetryableStatusError(
+            status_code=r.status_code,
+            url=str(r.request.url),
+            retry_after=parse_retry_after(r.headers.get("Retry-After")),
+        )
+
+    r.raise_for_status()
+
+
+@dataclass(frozen=True, slots=True)
+class RetryPolicy:
+    """
+    Exponential backoff policy for retrying failed network requests.
+
+    The `n`th retry is delayed by `base_delay * 2**(n - 1)` seconds, capped at `max_delay`, then
+    reduced by a random fraction of up to `jitter` so concurrent retries don't arrive in lockstep.
+    If the server provides a `Retry-After` delay it is used instead, also capped at `max_delay`;
+    delays that aren't finite & non-negative are ignored.
+    """
+
+    max_attempts: int = 5
+    base_delay: float = 0.5
+    max_delay: float = 30
+    jitter: float = 0.5
+
+    def backoff(self, attempt: int, retry_after: float | None = None) -> float:
+        """Calculate the delay, in seconds, before the retry following the provided attempt."""
+        if retry_after is not None and math.isfinite(retry_after) and retry_after >= 0:
+            return min(retry_after, self.max_delay)
+
+        delay = min(self.base_delay * 2.0 ** (attempt - 1), self.max_delay)
+        return delay * (1 - random.uniform(0, self.jitter))
+
+
+DEFAULT_RETRY_POLICY = RetryPolicy()
+
+
+async def call_with_retry(
+    fn: abc.Callable[[], abc.Awaitable[T]],
+    policy: RetryPolicy,
+    description: str,
+    retryable: tuple[type[Exception], ...] = RETRYABLE_EXCEPTIONS,
+) -> T:
+    """
+    Await the provided callable, retrying according to the policy if a retryable error is raised.
+
+    The final error is re-raised once all attempts have been exhausted; errors not contained in
+    `retryable` are raised immediately.
+    """
+    for attempt in range(1, policy.max_attempts):
+        try:
+            return await fn()
+        except retryable as e:
+            delay = policy.backoff(attempt, retry_after=getattr(e, "retry_after", None))
+            print(
+                f"Retrying {description} in {delay:.1f}s "
+                f"(attempt {attempt}/{policy.max_attempts}): {e}"
+            )
+            await asyncio.sleep(delay)
+
+    return await fn()
@@ -0,0 +1,187 @@
+import html
+import json
+import os
+import shutil
+import typing as t
+from collections import abc, defaultdict
+from pathlib import Path
+
+from packaging.utils import InvalidWheelFilename, parse_wheel_filename
+
+from wheely_bucket.materialize import file_sha256
+
+SIMPLE_DIRNAME = "simple"
+API_VERSION = "1.1"
+
+
+def _write_atomic(filepath: Path, content: str) -> None:
+    tmp_path = filepath.with_name(f"{filepath.name}.tmp")
+    tmp_path.write_text(content, encoding="utf-8")
+    tmp_path.replace(filepath)
+
+
+def _list_wheels(dest: Path) -> dict[str, list[os.DirEntry[str]]]:
+    """Group the wheels in the destination directory by normalized project name."""
+    projects: dict[str, list[os.DirEntry[str]]] = defaultdict(list)
+    with os.scandir(dest) as it:
+        for entry in it:
+            if not entry.name.endswith(".whl") or not entry.is_file():
+                continue
+
+            try:
+                name, *_ = parse_wheel_filename(entry.name)
+            except InvalidWheelFilename:
+                continue
+
+            projects[name].append(entry)
+
+    return projects
+
+
+def _load_project_page(page_path: Path) -> dict[str, dict[str, t.Any]]:
+    """Load the previously generated file records for a project, keyed by filename."""
+    try:
+        page = json.loads(page_path.read_bytes())
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+    return {f["filename"]: f for f in page.get("files", ())}
+
+
+def _project_html(project: str, files: abc.Sequence[dict[str, t.Any]]) -> str:
+    lines = [
+        "<!DOCTYPE html>",
+        "<html>",
+        "  <head>",
+        f'    <meta name="pypi:repository-version" content="{API_VERSION}">',
+        f"    <title>Links for {html.escape(project)}</title>",
+        "  </head>",
+        "  <body>",
+        f"    <h1>Links for {html.escape(project)}</h1>",
+    ]
+    for f in files:
+        href = html.escape(f"{f['url']}#sha256={f['hashes']['sha256']}")
+        lines.append(f'    <a href="{href}">{html.escape(f["filename"])}</a><br>')
+    lines.extend(("  </body>", "</html>", ""))
+
+    return "\n".join(lines)
+
+
+def _root_html(projects: abc.Iterable[str]) -> str:
+    lines = [
+        "<!DOCTYPE html>",
+        "<html>",
+        "  <head>",
+        f'    <meta name="pypi:repository-version" content="{API_VERSION}">',
+        "    <title>Simple index</title>",
+        "  </head>",
+        "  <body>",
+    ]
+    lines.extend(f'    <a href="{html.escape(p)}/">{html.escape(p)}</a><br>' for p in projects)
+    lines.extend(("  </body>", "</html>", ""))
+
+    return "\n".join(lines)
+
+
+def _write_project(
+    simple_dir: Path,
+    project: str,
+    wheels: abc.Iterable[os.DirEntry[str]],
+    known_digests: abc.Mapping[str, str | None],
+) -> None:
+    """
+    Write the HTML & JSON Simple API pages for the project's wheels.
+
+    Digests are taken from `known_digests` or the project's previous JSON page where available, so
+    only wheels new to the index and lacking a known digest are hashed.
+    """
+    project_dir = simple_dir / project
+    project_dir.mkdir(parents=True, exist_ok=True)
+    json_path = project_dir / "index.json"
+    previous = _load_project_page(json_path)
+
+    files = []
+    versions = set()
+    for entry in sorted(wheels, key=lambda e: e.name):
+        size = entry.stat().st_size
+        sha256 = known_digests.get(entry.name)
+        if sha256 is None:
+            prev = previous.get(entry.name)
+            if prev is not None and prev.get("size") == size:
+                sha256 = prev["hashes"]["sha256"]
+            else:
+                sha256 = file_sha256(Path(entry.path))
+
+        files.append(
+            {
+                "filename": entry.name,
+                "url": f"../../{entry.name}",
+                "hashes": {"sha256": sha256},
+                "size": size,
+            }
+        )
+        versions.add(parse_wheel_filename(entry.name)[1])
+
+    page = {
+        "meta": {"api-version": API_VERSION},
+        "name": project,
+        "versions": [str(v) for v in sorted(versions)],
+        "files": files,
+    }
+    _write_atomic(json_path, json.dumps(page, indent=2))
+    _write_atomic(project_dir / "index.html", _project_html(project, files))
+
+
+def update_simple_index(
+    dest: Path,
+    projects: abc.Iterable[str] | None = None,
+    known_digests: abc.Mapping[str, str | None] | None = None,
+) -> int:
+    """
+    Generate PEP 503 (HTML) & PEP 691 (JSON) Simple API pages for the wheels in the destination.
+
+    Pages are written to `<dest>/simple/<project>/` as `index.html` & `index.json`, linking to the
+    wheels in the destination by relative URL, so the directory can be served directly as a package
+    index, e.g. `pip install --index-url http://localhost:8000/simple/ ...`.
+
+    If `projects` is provided, only the pages for those normalized project names are regenerated,
+    along with the pages of any project in the destination without one; otherwise all pages are
+    regenerated. Pages for projects no longer having any wheels in the destination are removed. The
+    root project listing is always rewritten.
+
+    Wheel SHA256 digests may be provided via `known_digests`, keyed by wheel filename, to avoid
+    hashing the wheel.
+
+    Returns the number of project pages written.
+    """
+    if known_digests is None:
+        known_digests = {}
+
+    simple_dir = dest / SIMPLE_DIRNAME
+    simple_dir.mkdir(exist_ok=True)
+    wheels = _list_wheels(dest)
+
+    if projects is None:
+        to_write = set(wheels)
+        stale = {d.name for d in simple_dir.iterdir() if d.is_dir()} - to_write
+    else:
+        projects = set(projects)
+        to_write = projects & wheels.keys()
+        to_write.update(p for p in wheels if not (simple_dir / p / "index.json").exists())
+        stale = projects - wheels.keys()
+
+    for project in stale:
+        shutil.rmtree(simple_dir / project, ignore_errors=True)
+
+    for project in to_write:
+        _write_project(simple_dir, project, wheels[project], known_digests)
+
+    all_projects = sorted(wheels)
+    root_page = {
+        "meta": {"api-version": API_VERSION},
+        "projects": [{"name": p} for p in all_projects],
+    }
+    _write_atomic(simple_dir / "index.json", json.dumps(root_page, indent=2))
+    _write_atomic(simple_dir / "index.html", _root_html(all_projects))
+
+    return len(to_write)
@@ -0,0 +1,142 @@
+from collections import abc
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import anyio
+import httpx
+
+from wheely_bucket.dl_manager import (
+    DEFAULT_DOWNLOAD_OPTIONS,
+    DownloadOptions,
+    DownloadSummary,
+    download_packages,
+    scan_wheels,
+    verify_wheel,
+)
+from wheely_bucket.parse_lockfile import PackageSpec
+
+
+@dataclass(slots=True)
+class SyncPlan:
+    """
+    Changes needed to make a destination directory match a desired set of wheels.
+
+    `to_add` contains the desired wheels that are missing from the destination or whose size doesn't
+    match their expected size, `to_keep` the desired wheels already present, and `to_remove` the
+    filenames of wheels present in the destination that are no longer desired.
+    """
+
+    to_add: list[PackageSpec] = field(default_factory=list)
+    to_keep: list[PackageSpec] = field(default_factory=list)
+    to_remove: list[str] = field(default_factory=list)
+
+    def report(self, verbose: bool = False) -> str:
+        """Summarize the plan, listing each wheel to be added or removed if `verbose` is `True`."""
+        lines = [
+            (
+                f"Sync plan: {len(self.to_add)} to add, {len(self.to_keep)} up to date, "
+                f"{len(self.to_remove)} to remove"
+            )
+        ]
+        if verbose:
+            lines.extend(
+                f"  + {p.wheel_name}" for p in sorted(self.to_add, key=lambda p: p.wheel_name)
+            )
+            lines.extend(f"  - {wheel_name}" for wheel_name in sorted(self.to_remove))
+
+        return "\n".join(lines)
+
+
+def plan_sync(desired: abc.Iterable[PackageSpec], existing: abc.Mapping[str, int]) -> SyncPlan:
+    """
+    Compare the desired wheels against the destination's existing wheels, as from `scan_wheels`.
+
+    Existing wheels are only checked against their expected size, if known; see `verify_plan` for
+    a full digest check.
+    """
+    plan = SyncPlan()
+    desired_names = set()
+    for p in desired:
+        if p.wheel_name in desired_names:
+            continue
+        desired_names.add(p.wheel_name)
+
+        size = existing.get(p.wheel_name)
+        if size is None or (p.size is not None and size != p.size):
+            plan.to_add.append(p)
+        else:
+            plan.to_keep.append(p)
+
+    plan.to_remove = [wheel_name for wheel_name in existing if wheel_name not in desired_names]
+
+    return plan
+
+
+async def verify_plan(plan: SyncPlan, dest: Path) -> None:
+    """Check the SHA256 digest of the wheels being kept, moving any that fail to `to_add`."""
+    keep = []
+    for p in plan.to_keep:
+        if await verify_wheel(p, dest / p.wheel_name, full=True):
+            keep.append(p)
+        else:
+            print(f"Existing wheel failed verification: {dest / p.wheel_name}")
+            plan.to_add.append(p)
+
+    plan.to_keep = keep
+
+
+def prune_wheels(dest: Path, wheel_names: abc.Iterable[str]) -> int:
+    """Remove the named wheels from the destination directory, returning the number removed."""
+    n_removed = 0
+    for wheel_name in wheel_names:
+        try:
+            (dest / wheel_name).unlink()
+        except FileNotFoundError:
+            continue
+
+        n_removed += 1
+
+    return n_removed
+
+
+async def sync_bucket(
+    desired: abc.Iterable[PackageSpec],
+    dest: Path,
+    prune: bool = False,
+    dry_run: bool = False,
+    client: httpx.AsyncClient | None = None,
+    options: DownloadOptions = DEFAULT_DOWNLOAD_OPTIONS,
+) -> tuple[SyncPlan, DownloadSummary]:
+    """
+    Make the destination directory match the desired set of wheels.
+
+    The destination is listed once & compared against the desired wheels in memory before any
+    changes are made; missing wheels are then downloaded without checking the destination again.
+    If `options.verify_existing` is `True`, the SHA256 digest of each wheel being kept is checked
+    and any failing wheels are downloaded again.
+
+    If `prune` is `True`, wheels in the destination that are not desired are removed. If `dry_run`
+    is `True`, the plan is reported without downloading or removing anything.
+    """
+    existing = await anyio.to_thread.run_sync(scan_wheels, dest)
+    plan = plan_sync(desired, existing)
+    if options.verify_existing:
+        await verify_plan(plan, dest)
+
+    print(plan.report(verbose=dry_run))
+    summary = DownloadSummary(existing=len(plan.to_keep))
+    if dry_run:
+        return plan, summary
+
+    if plan.to_add:
+        await anyio.Path(dest).mkdir(parents=True, exist_ok=True)
+        summary = await download_packages(
+            packages=plan.to_add, dest=dest, client=client, options=options, check_dest=False
+        )
+        summary.existing += len(plan.to_keep)
+
+    if prune:
+        n_removed = await anyio.to_thread.run_sync(prune_wheels, dest, plan.to_remove)
+        print(f"Removed {n_removed} wheel(s) no longer desired")
+
+    return plan, summary
@@ -0,0 +1,165 @@
+import itertools
+import json
+import typing as t
+from collections import abc
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from packaging.tags import Tag
+
+from wheely_bucket.dl_manager import DownloadSummary, select_best_wheels
+from wheely_bucket.parse_lockfile import PackageSpec, supported_tags
+
+MANIFEST_DIRNAME = "manifests"
+
+
+@dataclass(frozen=True, slots=True)
+class Target:
+    """
+    A single Python version & platform combination targeted by a matrix run.
+
+    A `None` Python version or platform targets the currently running interpreter or platform.
+    """
+
+    python_version: tuple[int, int] | None = None
+    platform: str | None = None
+
+    @property
+    def name(self) -> str:
+        """Filesystem-safe identifier of the target, e.g. `'py3.13-win_amd64'`."""
+        pyver = "current" if self.python_version is None else "{}.{}".format(*self.python_version)
+        return f"py{pyver}-{self.platform or 'current'}"
+
+    def supported_tags(self) -> abc.Mapping[Tag, int]:
+        """Build the supported tag index of the target."""
+        return supported_tags(
+            python_version=self.python_version,
+            platforms=None if self.platform is None else (self.platform,),
+        )
+
+
+def target_matrix(
+    python_versions: abc.Iterable[tuple[int, int]] | None = None,
+    platforms: abc.Iterable[str] | None = None,
+) -> list[Target]:
+    """
+    Build a target for each combination of the provided Python version(s) & platform(s).
+
+    The expected form of `python_versions` and `platforms` matches that of `filter_packages`.
+    """
+    pyvers: abc.Iterable[tuple[int, int] | None] = (None,)
+    if python_versions is not None:
+        pyvers = dict.fromkeys(python_versions)
+
+    plats: abc.Iterable[str | None] = (None,)
+    if platforms is not None:
+        plats = dict.fromkeys(platforms)
+
+    return [Target(python_version=v, platform=p) for v, p in itertools.product(pyvers, plats)]
+
+
+@dataclass(slots=True)
+class TargetManifests:
+    """
+    Track which targets of a matrix run need each wheel, for writing a manifest per target.
+
+    Wheels are shared by every target needing them, so each wheel is only downloaded once per run
+    regardless of the number of targets it is compatible with. If `best_only` is `True`, each
+    target's manifest only lists the most preferred of its compatible wheels for each release.
+    """
+
+    targets: list[Target]
+    best_only: bool = False
+    wheels: dict[str, PackageSpec] = field(default_factory=dict)
+    assigned: dict[Target, set[str]] = field(default_factory=dict)
+    _supported: list[tuple[Target, abc.Mapping[Tag, int]]] = field(
+        default_factory=list, init=False, repr=False
+    )
+
+    def __post_init__(self) -> None:
+        self._supported = [(target, target.supported_tags()) for target in self.targets]
+        for target in self.targets:
+            self.assigned.setdefault(target, set())
+
+    def assign(self, p: PackageSpec) -> bool:
+        """
+        Record the wheel against each target it is compatible with.
+
+        Returns `True` if the wheel is needed by at least one target and hasn't been seen before.
+        """
+        if p.wheel_name in self.wheels:
+            return False
+
+        needed = False
+        for target, supported in self._supported:
+            if any(tag in supported for tag in p.tags):
+                self.assigned[target].add(p.wheel_name)
+                needed = True
+
+        if needed:
+            self.wheels[p.wheel_name] = p
+
+        return needed
+
+    async def select(
+        self, packages: abc.AsyncIterable[PackageSpec]
+    ) -> abc.AsyncIterator[PackageSpec]:
+        """Pass through each wheel needed by at least one target, as it arrives, once."""
+        async for p in packages:
+            if self.assign(p):
+                yield p
+
+    def manifest(self, target: Target, summary: DownloadSummary) -> dict[str, t.Any]:
+        """
+        Build the target's manifest of the wheels placed into the destination.
+
+        Wheels that failed to download are omitted. Each wheel's path is given relative to the
+        manifest directory, pointing into the shared destination.
+        """
+        candidates = {self.wheels[wheel_name] for wheel_name in self.assigned[target]}
+        if self.best_only:
+            candidates = select_best_wheels(
+                candidates,
+                python_versions=None if target.python_version is None else [target.python_version],
+                platforms=None if target.platform is None else [target.platform],
+            )
+
+        wheels = []
+        for p in sorted(candidates, key=lambda p: p.wheel_name):
+            if p.wheel_name in summary.failed:
+                continue
+
+            wheels.append(
+                {
+                    "filename": p.wheel_name,
+                    "path": f"../{p.wheel_name}",
+                    "sha256": summary.added.get(p.wheel_name) or p.sha256,
+                    "size": p.size,
+                }
+            )
+
+        return {
+            "target": {
+                "name": target.name,
+                "python_version": (
+                    None
+                    if target.python_version is None
+                    else "{}.{}".format(*target.python_version)
+                ),
+                "platform": target.platform,
+            },
+            "wheels": wheels,
+        }
+
+    def write(self, dest: Path, summary: DownloadSummary) -> list[Path]:
+        """Write each target's manifest to the destination's `manifests` directory."""
+        manifest_dir = dest / MANIFEST_DIRNAME
+        manifest_dir.mkdir(parents=True, exist_ok=True)
+
+        written = []
+        for target in self.targets:
+            manifest_path = manifest_dir / f"{target.name}.json"
+            manifest_path.write_text(json.dumps(self.manifest(target, summary), indent=2))
+            written.append(manifest_path)
+
+        return written
@@ -0,0 +1,225 @@
+import json
+import statistics
+import sys
+import time
+import typing as t
+from collections import abc
+from dataclasses import asdict, dataclass, field
+from enum import StrEnum
+from pathlib import Path
+
+
+class WheelSource(StrEnum):
+    """Where a requested wheel was obtained from during a download run."""
+
+    DESTINATION = "destination"
+    STORE = "store"
+    PIP_CACHE = "pip_cache"
+    LOCAL = "local"
+    NETWORK = "network"
+    FAILED = "failed"
+
+
+class QuerySource(StrEnum):
+    """How a Simple API query was answered."""
+
+    CACHE = "cache"
+    REVALIDATED = "revalidated"
+    NETWORK = "network"
+    LOCAL = "local"
+    FAILED = "failed"
+
+
+@dataclass(frozen=True, slots=True)
+class Event:
+    """
+    A single wheel placed into the destination, or a single Simple API query.
+
+    `n_bytes` is the number of bytes written to the destination, whether transferred or linked;
+    `duration` is the wall time, in seconds, spent on the wheel or query, including any retries.
+    """
+
+    kind: t.Literal["wheel", "query"]
+    name: str
+    source: str
+    n_bytes: int = 0
+    duration: float = 0
+    attempts: int = 1
+    error: str | None = None
+    timestamp: float = field(default_factory=time.time)
+
+
+def _percentile(values: abc.Sequence[float], pct: int) -> float:
+    if len(values) < 2:
+        return values[0] if values else 0
+
+    return statistics.quantiles(values, n=100, method="inclusive")[pct - 1]
+
+
+@dataclass(slots=True)
+class RunTelemetry:
+    """
+    Collects an `Event` for each wheel & query of a run, for progress display & reporting.
+
+    If provided, `on_event` is called with each event as it is recorded, e.g. a `ProgressDisplay`.
+    """
+
+    events: list[Event] = field(default_factory=list)
+    on_event: abc.Callable[[Event], None] | None = None
+    started: float = field(default_factory=time.monotonic)
+
+    def record(self, event: Event) -> None:
+        """Record the event, passing it along to the `on_event` callback, if any."""
+        self.events.append(event)
+        if self.on_event is not None:
+            self.on_event(event)
+
+    def wheel(
+        self,
+        wheel_name: str,
+        source: WheelSource,
+        n_bytes: int = 0,
+        duration: float = 0,
+        attempts: int = 1,
+        error: str | None = None,
+    ) -> None:
+        """Record how a wheel was obtained."""
+        self.record(Event("wheel", wheel_name, source, n_bytes, duration, attempts, error))
+
+    def query(
+        self, project: str, source: QuerySource, duration: float = 0, error: str | None = None
+    ) -> None:
+        """Record how a Simple API query was answered."""
+        self.record(Event("query", project, source, duration=duration, error=error))
+
+    def summary(self) -> dict[str, t.Any]:
+        """
+        Aggregate the recorded events.
+
+        Wheels & queries are tallied by source, along with the bytes transferred over the network,
+        the resulting throughput, the fraction of wheels not needing a transfer, the number of
+        retried attempts, and the latency distribution of network transfers.
+        """
+        elapsed = time.monotonic() - self.started
+        by_kind: dict[str, dict[str, dict[str, float]]] = {"wheel": {}, "query": {}}
+        for e in self.events:
+            tally = by_kind[e.kind].setdefault(e.source, {"count": 0, "bytes": 0, "duration": 0})
+            tally["count"] += 1
+            tally["bytes"] += e.n_bytes
+            tally["duration"] += e.duration
+
+        wheels = [e for e in self.events if e.kind == "wheel"]
+        transferred = [e for e in wheels if e.source == WheelSource.NETWORK]
+        resolved = [e for e in wheels if e.source != WheelSource.FAILED]
+        network_bytes = sum(e.n_bytes for e in transferred)
+        durations = sorted(e.duration for e in transferred)
+
+        return {
+            "elapsed": elapsed,
+            "wheels": by_kind["wheel"],
+            "queries": by_kind["query"],
+            "network_bytes": network_bytes,
+            "throughput": network_bytes / elapsed if elapsed > 0 else 0,
+            "cache_hit_ratio": 1 - len(transferred) / len(resolved) if resolved else 0,
+            "retries": sum(e.attempts - 1 for e in wheels),
+            "transfer_duration": {
+                "p50": _percentile(durations, 50),
+                "p95": _percentile(durations, 95),
+                "max": durations[-1] if durations else 0,
+            },
+        }
+
+    def report(self) -> str:
+        """Summarize the recorded events in human readable form."""
+        summary = self.summary()
+        lines = [
+            (
+                f"Transferred {_format_bytes(summary['network_bytes'])} in "
+                f"{summary['elapsed']:.1f}s ({_format_bytes(summary['throughput'])}/s), "
+                f"{summary['cache_hit_ratio']:.0%} of wheels without a transfer, "
+                f"{summary['retries']} retried attempt(s)"
+            )
+        ]
+        for kind in ("wheels", "queries"):
+            for source, tally in sorted(summary[kind].items()):
+                lines.append(
+                    f"  {kind} from {source}: {tally['count']:.0f}, "
+                    f"{_format_bytes(tally['bytes'])}, {tally['duration']:.1f}s"
+                )
+
+        return "\n".join(lines)
+
+    def write(self, path: Path) -> None:
+        """
+        Write the run report to the provided path.
+
+        A `.ndjson` path is written as one JSON object per event, followed by the summary, so it
+        may be appended to an existing log; anything else is written as a single JSON document.
+        """
+        path.parent.mkdir(parents=True, exist_ok=True)
+        events = [{"type": e.kind, **asdict(e)} for e in self.events]
+        summary = self.summary()
+        if path.suffix == ".ndjson":
+            with path.open("a") as f:
+                for record in (*events, {"type": "summary", **summary}):
+                    f.write(f"{json.dumps(record)}\n")
+            return
+
+        path.write_text(json.dumps({"summary": summary, "events": events}, indent=2))
+
+
+def _format_bytes(n_bytes: float) -> str:
+    for unit in ("B", "KiB", "MiB"):
+        if abs(n_bytes) < 1024:
+            return f"{n_bytes:.1f} {unit}"
+        n_bytes /= 1024
+
+    return f"{n_bytes:.1f} GiB"
+
+
+@dataclass(slots=True)
+class ProgressDisplay:
+    """
+    Live aggregate progress of a run, written to `stream` at most once every `interval` seconds.
+
+    Intended as a `RunTelemetry.on_event` callback.
+    """
+
+    interval: float = 1
+    stream: t.TextIO = field(default_factory=lambda: sys.stderr)
+    wheels: int = 0
+    failed: int = 0
+    queries: int = 0
+    n_bytes: int = 0
+    started: float = field(default_factory=time.monotonic)
+    _last_shown: float | None = field(default=None, init=False, repr=False)
+
+    def __call__(self, event: Event) -> None:
+        """Tally the event, writing the progress if `interval` has elapsed since last written."""
+        if event.kind == "query":
+            self.queries += 1
+        elif event.source == WheelSource.FAILED:
+            self.failed += 1
+        else:
+            self.wheels += 1
+            if event.source == WheelSource.NETWORK:
+                self.n_bytes += event.n_bytes
+
+        now = time.monotonic()
+        if self._last_shown is None or now - self._last_shown >= self.interval:
+            self._last_shown = now
+            self.show()
+
+    def show(self) -> None:
+        """Write the current progress."""
+        elapsed = time.monotonic() - self.started
+        rate = self.n_bytes / elapsed if elapsed > 0 else 0
+        print(
+            (
+                f"[{elapsed:.0f}s] {self.queries} queries, {self.wheels} wheels, "
+                f"{self.failed} failed, {_format_bytes(self.n_bytes)} transferred "
+                f"({_format_bytes(rate)}/s)"
+            ),
+            file=self.stream,
+            flush=True,
+        )
@@ -0,0 +1,366 @@
+import asyncio
+import contextlib
+import heapq
+import itertools
+import math
+import time
+import typing as t
+from collections import abc
+from enum import StrEnum
+from statistics import fmean
+
+ADAPTIVE_WINDOW = 2.0  # seconds
+THROUGHPUT_TOLERANCE = 0.05
+LATENCY_TOLERANCE = 1.5
+OLDEST_EVERY = 4
+
+
+class SchedulePolicy(StrEnum):
+    """Order in which transfers waiting on a concurrency limit are started."""
+
+    FIFO = "fifo"
+    SMALLEST_FIRST = "smallest-first"
+
+
+class WaitQueue:
+    """
+    Admission order of the tasks waiting on a `ConcurrencyLimiter`, first come, first served.
+
+    Each waiter may declare a size, e.g. the number of bytes it will transfer, which subclasses may
+    use to admit waiters in a different order. Waiters without a declared size are treated as larger
+    than any declared size.
+    """
+
+    def __init__(self) -> None:
+        self._waiting: dict[int, float] = {}
+        self._tickets = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._waiting)
+
+    def push(self, size: float | None = None) -> int:
+        """Queue a waiter, returning its ticket."""
+        ticket = next(self._tickets)
+        self._waiting[ticket] = math.inf if size is None else size
+        return ticket
+
+    def peek(self) -> int | None:
+        """Return the ticket of the waiter to be admitted next, if any."""
+        return next(iter(self._waiting), None)
+
+    def remove(self, ticket: int) -> None:
+        """Drop the waiter from the queue, e.g. if it was cancelled while waiting."""
+        self._waiting.pop(ticket, None)
+
+    def admit(self, ticket: int) -> None:
+        """Drop the waiter from the queue once it has been admitted."""
+        self.remove(ticket)
+
+
+class SmallestFirstQueue(WaitQueue):
+    """
+    Admit the waiter declaring the smallest size first.
+
+    Small transfers are therefore not held up behind large ones, lowering the total time until
+    wheels are available. So large transfers aren't starved, every `oldest_every`th admission goes
+    to the longest-waiting waiter instead, interleaving large transfers with the small ones.
+    """
+
+    def __init__(self, oldest_every: int = OLDEST_EVERY) -> None:
+        if oldest_every < 1:
+            raise ValueError(f"Oldest waiter interval must be at least 1, received: {oldest_every}")
+
+        super().__init__()
+        self.oldest_every = oldest_every
+        self._heap: list[tuple[float, int]] = []
+        self._admitted = 0
+
+    def push(self, size: float | None = None) -> int:
+        """Queue a waiter, returning its ticket."""
+        ticket = super().push(size)
+        heapq.heappush(self._heap, (self._waiting[ticket], ticket))
+        return ticket
+
+    def peek(self) -> int | None:
+        """Return the ticket of the waiter to be admitted next, if any."""
+        if not self._waiting:
+            return None
+
+        if self._admitted % self.oldest_every == self.oldest_every - 1:
+            return super().peek()
+
+        # Admitted & removed waiters are dropped from the heap lazily
+        while self._heap[0][1] not in self._waiting:
+            heapq.heappop(self._heap)
+
+        return self._heap[0][1]
+
+    def admit(self, ticket: int) -> None:
+        """Drop the waiter from the queue once it has been admitted."""
+        super().admit(ticket)
+        self._admitted += 1
+
+
+def build_wait_queue(policy: SchedulePolicy) -> WaitQueue:
+    """Build the wait queue implementing the provided scheduling policy."""
+    if policy == SchedulePolicy.SMALLEST_FIRST:
+        return SmallestFirstQueue()
+
+    return WaitQueue()
+
+
+class ConcurrencyLimiter:
+    """
+    Asynchronous concurrency limit whose capacity may be adjusted while in use.
+
+    This behaves like an `asyncio.Semaphore`, but lowering the limit takes effect as in-flight
+    holders release rather than requiring the limit to be fixed up-front. The base limiter is fixed;
+    the `record_*` hooks allow subclasses to adjust the limit based on observed transfers.
+
+    Waiters are admitted in the order determined by `queue`, first come, first served by default.
+    """
+
+    def __init__(self, limit: int, queue: WaitQueue | None = None) -> None:
+        if limit < 1:
+            raise ValueError(f"Concurrency limit must be at least 1, received: {limit}")
+
+        self._limit = limit
+        self._active = 0
+        self._condition = asyncio.Condition()
+        self._queue = WaitQueue() if queue is None else queue
+
+    @property
+    def limit(self) -> int:
+        """Current maximum number of concurrent holders."""
+        return self._limit
+
+    @property
+    def active(self) -> int:
+        """Number of currently active holders."""
+        return self._active
+
+    async def _set_limit(self, limit: int) -> None:
+        async with self._condition:
+            self._limit = limit
+            self._condition.notify_all()
+
+    async def acquire(self, size: float | None = None) -> None:
+        """
+        Wait until a slot is free & it is this waiter's turn, then become active.
+
+        Waiters are admitted in the order determined by the limiter's queue, which may be based on
+        their declared `size`.
+        """
+        async with self._condition:
+            ticket = self._queue.push(size)
+            try:
+                await self._condition.wait_for(
+                    lambda: self._active < self._limit and self._queue.peek() == ticket
+                )
+            except BaseException:
+                self._queue.remove(ticket)
+                self._condition.notify_all()
+                raise
+
+            self._queue.admit(ticket)
+            self._active += 1
+
+            # The next waiter in line may be able to take another free slot
+            self._condition.notify_all()
+
+    async def release(self) -> None:
+        """Release a previously acquired slot, waking any waiting tasks."""
+        async with self._condition:
+            self._active -= 1
+            self._condition.notify_all()
+
+    async def __aenter__(self) -> None:
+        await self.acquire()
+
+    async def __aexit__(self, *args: t.Any) -> None:
+        await self.release()
+
+    @contextlib.asynccontextmanager
+    async def slot(self, size: float | None = None) -> abc.AsyncIterator[None]:
+        """Hold a slot for the duration of the context, queued according to its `size`."""
+        await self.acquire(size)
+        try:
+            yield
+        finally:
+            await self.release()
+
+    async def record_transfer(self, n_bytes: int, latency: float) -> None:
+        """Record a completed transfer of `n_bytes` whose first byte arrived after `latency` s."""
+
+    async def record_failure(self, throttled: bool = False) -> None:
+        """Record a failed transfer; `throttled` indicates the server asked us to slow down."""
+
+
+class AdaptiveLimiter(ConcurrencyLimiter):
+    """
+    Concurrency limit that tunes itself to the observed aggregate throughput.
+
+    Transfers are aggregated over a rolling window of `window` seconds. While the limit is being
+    saturated, it is increased by one whenever the window's throughput improves on the previous
+    window's without a corresponding rise in time-to-first-byte; a latency rise backs off by one.
+    A throttling response (e.g. `429`) halves the limit immediately, while other transfer errors
+    back off by one.
+
+    The limit is kept within `[min_limit, max_limit]`.
+    """
+
+    _window_start: float
+    _window_bytes: int
+    _window_latencies: list[float]
+    _saturated: bool
+
+    def __init__(
+        self,
+        limit: int,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        window: float = ADAPTIVE_WINDOW,
+        queue: WaitQueue | None = None,
+    ) -> None:
+        super().__init__(limit=min(max(limit, min_limit), max_limit), queue=queue)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.window = window
+
+        self._reset_window()
+        self._prev_throughput: float | None = None
+        self._prev_latency: float | None = None
+
+    def _reset_window(self) -> None:
+        self._window_start = time.monotonic()
+        self._window_bytes = 0
+        self._window_latencies = []
+        self._saturated = False
+
+    async def acquire(self, size: float | None = None) -> None:
+        """Wait until fewer than `limit` holders are active & it is this waiter's turn."""
+        await super().acquire(size)
+        if self._active >= self._limit:
+            self._saturated = True
+
+    async def record_transfer(self, n_bytes: int, latency: float) -> None:
+        """Record a completed transfer, adjusting the limit if the current window has elapsed."""
+        self._window_bytes += n_bytes
+        self._window_latencies.append(latency)
+
+        elapsed = time.monotonic() - self._window_start
+        if elapsed < self.window:
+            return
+
+        throughput = self._window_bytes / elapsed
+        latency = fmean(self._window_latencies)
+        if self._saturated and self._prev_throughput is not None and self._prev_latency is not None:
+            if latency > self._prev_latency * LATENCY_TOLERANCE:
+                await self._set_limit(max(self._limit - 1, self.min_limit))
+            elif throughput > self._prev_throughput * (1 + THROUGHPUT_TOLERANCE):
+                await self._set_limit(min(self._limit + 1, self.max_limit))
+        elif self._saturated:
+            # No baseline yet, probe upwards
+            await self._set_limit(min(self._limit + 1, self.max_limit))
+
+        self._prev_throughput = throughput
+        self._prev_latency = latency
+        self._reset_window()
+
+    async def record_failure(self, throttled: bool = False) -> None:
+        """Back off in response to a failed transfer, halving the limit if it was throttled."""
+        if throttled:
+            await self._set_limit(max(self._limit // 2, self.min_limit))
+        else:
+            await self._set_limit(max(self._limit - 1, self.min_limit))
+
+        self._prev_throughput = None
+        self._prev_latency = None
+        self._reset_window()
+
+
+class TokenBucket:
+    """
+    Token bucket limiting the rate at which units (e.g. bytes or requests) are consumed.
+
+    Tokens accrue at `rate` per second, up to `capacity`, which defaults to one second's worth; a
+    consumer may take more tokens than are available, in which case it waits out the deficit.
+    Waiters are served in order.
+    """
+
+    def __init__(self, rate: float, capacity: float | None = None) -> None:
+        if rate <= 0:
+            raise ValueError(f"Token rate must be positive, received: {rate}")
+
+        self.rate = rate
+        self.capacity = rate if capacity is None else capacity
+        self._tokens = self.capacity
+        self._last_refill = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def consume(self, n: float = 1) -> None:
+        """Wait until `n` tokens may be consumed without exceeding the rate limit."""
+        async with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self._tokens + (now - self._last_refill) * self.rate, self.capacity)
+            self._last_refill = now
+
+            self._tokens -= n
+            if self._tokens < 0:
+                # Sleep while holding the lock so waiters are served in order
+                await asyncio.sleep(-self._tokens / self.rate)
+
+
+class BandwidthLimiter(TokenBucket):
+    """
+    Token bucket limiting the aggregate transfer rate, in bytes per second, across all consumers.
+
+    Up to one second's worth of bandwidth may be consumed in a burst.
+    """
+
+    def __init__(self, bytes_per_second: float) -> None:
+        if bytes_per_second <= 0:
+            raise ValueError(f"Bandwidth limit must be positive, received: {bytes_per_second}")
+
+        super().__init__(rate=bytes_per_second)
+
+
+class HostLimiter:
+    """
+    Per-host request rate limits, so no single host is sent an outsized share of requests.
+
+    If `requests_per_second` is specified, each host is given its own `TokenBucket` allowing bursts
+    of up to one second's worth of requests. Independently of any rate limit, a host that throttles
+    a request may be paused, holding back every request to that host until the pause elapses rather
+    than each request independently running into the throttle.
+    """
+
+    def __init__(self, requests_per_second: float | None = None) -> None:
+        if requests_per_second is not None and requests_per_second <= 0:
+            raise ValueError(f"Request rate must be positive, received: {requests_per_second}")
+
+        self.requests_per_second = requests_per_second
+        self._buckets: dict[str, TokenBucket] = {}
+        self._paused_until: dict[str, float] = {}
+
+    async def acquire(self, host: str) -> None:
+        """Wait until a request may be sent to the host."""
+        # The pause may be extended while waiting, so it is checked again once the wait elapses
+        while (delay := self._paused_until.get(host, 0) - time.monotonic()) > 0:  # noqa: ASYNC110
+            await asyncio.sleep(delay)
+
+        if self.requests_per_second is None:
+            return
+
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            rate = self.requests_per_second
+            bucket = TokenBucket(rate=rate, capacity=max(rate, 1))
+            self._buckets[host] = bucket
+
+        await bucket.consume()
+
+    def pause(self, host: str, seconds: float) -> None:
+        """Hold back requests to the host for at least the provided number of seconds."""
+        resume = time.monotonic() + seconds
+        self._paused_until[host] = max(self._paused_until.get(host, 0), resume)
@@ -0,0 +1,443 @@
+import asyncio
+import contextlib
+import dataclasses
+import importlib
+import importlib.util
+import json
+import time
+import typing as t
+from collections import abc
+from dataclasses import dataclass, field
+from enum import StrEnum
+from pathlib import Path
+
+import anyio
+import httpx
+from packaging.utils import parse_wheel_filename
+
+from wheely_bucket.dl_manager import (
+    DEFAULT_DOWNLOAD_OPTIONS,
+    DownloadOptions,
+    DownloadSummary,
+    download_packages,
+)
+from wheely_bucket.lock_index import LockIndex
+from wheely_bucket.parse_lockfile import PackageSpec
+from wheely_bucket.pipeline import PipelineStats, stream_project_wheels
+from wheely_bucket.simple_index import update_simple_index
+from wheely_bucket.telemetry import Event, RunTelemetry, WheelSource
+
+POLL_INTERVAL = 1.0
+RESCAN_EVERY = 10
+DEBOUNCE = 0.5
+RETRY_INTERVAL = 60.0
+STATUS_HOST = "127.0.0.1"
+STATUS_TIMEOUT = 5.0
+
+
+class WatchBackend(StrEnum):
+    """How changes to the watched lockfiles are detected."""
+
+    INOTIFY = "inotify"
+    POLLING = "polling"
+
+
+def inotify_available() -> bool:
+    """Check whether the optional `watchfiles` package needed for inotify support is installed."""
+    return importlib.util.find_spec("watchfiles") is not None
+
+
+def select_backend(polling: bool = False) -> WatchBackend:
+    """Use inotify, via `watchfiles`, where available unless polling is requested."""
+    if not polling and inotify_available():
+        return WatchBackend.INOTIFY
+
+    return WatchBackend.POLLING
+
+
+def find_lockfiles(roots: abc.Iterable[Path], lock_filename: str) -> list[Path]:
+    """Walk each base directory for lockfiles with the provided name, ignoring case."""
+    found: dict[Path, None] = {}
+    for root in roots:
+        found.update(dict.fromkeys(root.glob(f"**/{lock_filename}", case_sensitive=False)))
+
+    return list(found)
+
+
+@dataclass(slots=True)
+class LockfilePoller:
+    """
+    Detect lockfile changes by periodically comparing each lockfile's modification time & size.
+
+    Only the previously seen lockfiles are checked on each poll; the base directories are walked
+    for new lockfiles every `rescan_every` polls, as walking a large tree is far more expensive than
+    checking a handful of known paths. The first poll reports every lockfile found.
+    """
+
+    roots: list[Path]
+    lock_filename: str = "uv.lock"
+    interval: float = POLL_INTERVAL
+    rescan_every: int = RESCAN_EVERY
+    snapshot: dict[Path, tuple[int, int]] = field(default_factory=dict)
+    _polls: int = field(default=0, init=False, repr=False)
+
+    def poll(self) -> set[Path]:
+        """Check for lockfiles added or modified since the previous poll."""
+        if self._polls % self.rescan_every == 0:
+            candidates = find_lockfiles(self.roots, self.lock_filename)
+        else:
+            candidates = list(self.snapshot)
+        self._polls += 1
+
+        current = {}
+        for lf in candidates:
+            try:
+                st = lf.stat()
+            except OSError:
+                continue
+            current[lf] = (st.st_mtime_ns, st.st_size)
+
+        changed = {lf for lf, signature in current.items() if self.snapshot.get(lf) != signature}
+        self.snapshot = current
+        return changed
+
+    async def changes(self) -> abc.AsyncIterator[set[Path]]:
+        """Poll for changes every `interval` seconds, yielding each non-empty set of changes."""
+        while True:
+            if changed := await anyio.to_thread.run_sync(self.poll):
+                yield changed
+
+            await asyncio.sleep(self.interval)
+
+
+async def _inotify_changes(
+    roots: abc.Sequence[Path], lock_filename: str
+) -> abc.AsyncIterator[set[Path]]:
+    """Yield each set of lockfiles changed, as reported by inotify, after an initial full walk."""
+    watchfiles = importlib.import_module("watchfiles")
+    name = lock_filename.casefold()
+
+    if found := await anyio.to_thread.run_sync(find_lockfiles, roots, lock_filename):
+        yield set(found)
+
+    async for changes in watchfiles.awatch(
+        *roots, watch_filter=lambda _, path: Path(path).name.casefold() == name
+    ):
+        changed = {Path(path) for change, path in changes if change != watchfiles.Change.deleted}
+        if changed:
+            yield changed
+
+
+def lockfile_changes(
+    backend: WatchBackend,
+    roots: abc.Sequence[Path],
+    lock_filename: str = "uv.lock",
+    interval: float = POLL_INTERVAL,
+) -> abc.AsyncIterator[set[Path]]:
+    """
+    Yield each set of lockfiles added or modified under the base directories.
+
+    Every lockfile present when watching begins is reported first. When polling, changes are checked
+    for every `interval` seconds.
+    """
+    match backend:
+        case WatchBackend.INOTIFY:
+            return _inotify_changes(roots, lock_filename)
+        case WatchBackend.POLLING:
+            return LockfilePoller(list(roots), lock_filename, interval).changes()
+
+
+@dataclass(slots=True)
+class WatchStatus:
+    """
+    Health & queue depth of a running watch, as reported by its status endpoint.
+
+    `pending` is the number of changed lockfiles waiting to be synced; `queued` & `completed` count
+    the wheels handed to the downloader & resolved during the current (or most recent) sync.
+    `missing` is the number of wheels that could not be downloaded by any sync so far & are waiting
+    to be retried.
+    """
+
+    backend: WatchBackend = WatchBackend.POLLING
+    lockfiles: int = 0
+    pending: int = 0
+    syncing: bool = False
+    queued: int = 0
+    completed: int = 0
+    syncs: int = 0
+    downloaded: int = 0
+    failed: int = 0
+    missing: int = 0
+    last_sync: float | None = None
+    last_error: str | None = None
+    started: float = field(default_factory=time.monotonic)
+
+    @property
+    def healthy(self) -> bool:
+        """Whether the most recent sync, if any, completed without error & no wheels are missing."""
+        return self.last_error is None and self.missing == 0
+
+    def record(self, event: Event) -> None:
+        """Tally a wheel resolved by the current sync; used as the sync's telemetry callback."""
+        if event.kind != "wheel":
+            return
+
+        self.completed += 1
+        if event.source == WheelSource.FAILED:
+            self.failed += 1
+        elif event.source != WheelSource.DESTINATION:
+            self.downloaded += 1
+
+    def to_dict(self) -> dict[str, t.Any]:
+        """Summarize the status as a JSON serializable mapping."""
+        return {
+            "status": "ok" if self.healthy else "error",
+            "backend": str(self.backend),
+            "uptime": time.monotonic() - self.started,
+            "lockfiles": self.lockfiles,
+            "syncing": self.syncing,
+            "queue_depth": {"lockfiles": self.pending, "wheels": self.queued - self.completed},
+            "syncs": self.syncs,
+            "downloaded": self.downloaded,
+            "failed": self.failed,
+            "missing": self.missing,
+            "last_sync": self.last_sync,
+            "last_error": self.last_error,
+        }
+
+    def respond(self, path: str) -> tuple[int, dict[str, t.Any]]:
+        """
+        Build the status endpoint's response to a request for the provided path.
+
+        `/health` responds with `503` if the most recent sync failed or any wheel is still missing,
+        for use as a liveness check; `/` & `/status` respond with the full status.
+        """
+        match path.split("?", 1)[0]:
+            case "/health":
+                return (200 if self.healthy else 503), {"status": self.to_dict()["status"]}
+            case "/" | "/status":
+                return 200, self.to_dict()
+            case _:
+                return 404, {"error": f"Not found: {path}"}
+
+
+async def _handle_status_request(
+    status: WatchStatus, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+) -> None:
+    try:
+        request_line = await asyncio.wait_for(reader.readline(), STATUS_TIMEOUT)
+        # Headers aren't needed, but are drained so the client doesn't see a reset connection
+        while await asyncio.wait_for(reader.readline(), STATUS_TIMEOUT) not in (
+            b"\r\n",
+            b"\n",
+            b"",
+        ):
+            pass
+
+        _, path, *_ = (*request_line.decode("latin-1").split(), "", "")
+        code, payload = status.respond(path)
+        body = json.dumps(payload).encode()
+        writer.write(
+            (
+                f"HTTP/1.1 {code} {httpx.codes.get_reason_phrase(code)}\r\n"
+                "Content-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                "Connection: close\r\n\r\n"
+            ).encode()
+            + body
+        )
+        await writer.drain()
+    except (TimeoutError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+        with contextlib.suppress(ConnectionError):
+            await writer.wait_closed()
+
+
+async def start_status_server(
+    status: WatchStatus,
+    port: int | None = None,
+    host: str = STATUS_HOST,
+    socket_path: Path | None = None,
+) -> asyncio.Server:
+    """
+    Serve the watch's status as JSON over HTTP, on a local TCP port or a Unix socket.
+
+    If `socket_path` is provided the status is served on the Unix socket, e.g. for
+    `curl --unix-socket <path> http://localhost/status`; otherwise it is served on the provided
+    host & port, a port of `0` picking any free port.
+    """
+
+    async def _handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        await _handle_status_request(status, reader, writer)
+
+    if socket_path is not None:
+        return await asyncio.start_unix_server(_handle, path=socket_path)
+
+    return await asyncio.start_server(_handle, host=host, port=port or 0)
+
+
+def _describe_error(e: BaseException) -> str:
+    """Describe the error, unwrapping the exception groups raised by a sync's task groups."""
+    while isinstance(e, BaseExceptionGroup) and len(e.exceptions) == 1:
+        e = e.exceptions[0]
+
+    return f"{type(e).__name__}: {e}"
+
+
+async def _aiter(lockfiles: abc.Iterable[Path]) -> abc.AsyncIterator[Path]:
+    for lf in lockfiles:
+        yield lf
+
+
+@dataclass(slots=True)
+class WatchService:
+    """
+    Keep a destination up to date with the wheels locked by a set of watched lockfiles.
+
+    The lockfile index, HTTP client & names of the wheels already placed into the destination are
+    kept for the lifetime of the service, so a changed lockfile only needs to be parsed once and
+    only the wheels it newly requires are fetched. Wheels removed from the destination by another
+    process are not fetched again until the service is restarted.
+
+    Changed lockfiles are gathered for `debounce` seconds before syncing, so a burst of changes
+    (e.g. `uv lock` across a workspace) is handled by a single sync.
+
+    Wheels that could not be downloaded are kept in `failed` & requeued by every following sync,
+    whichever lockfiles it was triggered by; while any remain, a sync is also started every
+    `retry_interval` seconds without waiting for a change.
+    """
+
+    dest: Path
+    python_versions: abc.Sequence[tuple[int, int]] | None = None
+    platforms: abc.Sequence[str] | None = None
+    best_only: bool = False
+    index: LockIndex | None = None
+    parse_workers: int | None = None
+    options: DownloadOptions = DEFAULT_DOWNLOAD_OPTIONS
+    simple_index: bool = False
+    debounce: float = DEBOUNCE
+    retry_interval: float = RETRY_INTERVAL
+    status: WatchStatus = field(default_factory=WatchStatus)
+    placed: set[str] = field(default_factory=set)
+    watched: set[Path] = field(default_factory=set)
+    failed: dict[str, PackageSpec] = field(default_factory=dict)
+    _pending: set[Path] = field(default_factory=set, init=False, repr=False)
+    _changed: asyncio.Event = field(default_factory=asyncio.Event, init=False, repr=False)
+
+    def notify(self, lockfiles: abc.Iterable[Path]) -> None:
+        """Queue the changed lockfiles for the next sync."""
+        self._pending.update(lockfiles)
+        self.status.pending = len(self._pending)
+        self._changed.set()
+
+    async def sync(
+        self, lockfiles: abc.Iterable[Path], client: httpx.AsyncClient
+    ) -> DownloadSummary:
+        """
+        Fetch the compatible wheels of the provided lockfiles not placed by an earlier sync.
+
+        Wheels that an earlier sync failed to download are fetched again first.
+        """
+        lockfiles = tuple(lockfiles)
+        present = await anyio.to_thread.run_sync(
+            lambda: sorted(lf for lf in lockfiles if lf.is_file())
+        )
+        self.watched.difference_update(lockfiles)
+        self.watched.update(present)
+        self.status.lockfiles = len(self.watched)
+
+        requested: dict[str, PackageSpec] = {}
+
+        async def _new_wheels() -> abc.AsyncIterator[PackageSpec]:
+            for p in list(self.failed.values()):
+                requested[p.wheel_name] = p
+                self.status.queued += 1
+                yield p
+
+            async for p in stream_project_wheels(
+                _aiter(present),
+                python_versions=self.python_versions,
+                platforms=self.platforms,
+                index=self.index,
+                max_workers=self.parse_workers,
+                stats=stats,
+                best_only=self.best_only,
+            ):
+                if p.wheel_name in self.placed or p.wheel_name in requested:
+                    continue
+
+                requested[p.wheel_name] = p
+                self.status.queued += 1
+                yield p
+
+        stats = PipelineStats()
+        options = dataclasses.replace(
+            self.options, telemetry=RunTelemetry(on_event=self.status.record)
+        )
+        self.status.syncing = True
+        self.status.queued = self.status.completed = 0
+        try:
+            summary = await download_packages(
+                _new_wheels(), self.dest, client=client, options=options
+            )
+        finally:
+            self.status.syncing = False
+
+        for wheel_name, p in requested.items():
+            if wheel_name in summary.failed:
+                self.failed[wheel_name] = p
+            else:
+                self.failed.pop(wheel_name, None)
+                self.placed.add(wheel_name)
+        self.status.missing = len(self.failed)
+
+        if self.index is not None:
+            await anyio.to_thread.run_sync(self.index.save)
+        if self.options.store is not None:
+            await anyio.to_thread.run_sync(self.options.store.save)
+        if self.simple_index and summary.added:
+            projects = {parse_wheel_filename(wheel_name)[0] for wheel_name in summary.added}
+            await anyio.to_thread.run_sync(update_simple_index, self.dest, projects, summary.added)
+
+        self.status.syncs += 1
+        self.status.last_sync = time.time()
+        self.status.last_error = None
+        print(stats.report())
+        print(summary.report())
+
+        return summary
+
+    async def _collect(self, changes: abc.AsyncIterable[set[Path]]) -> None:
+        async for changed in changes:
+            self.notify(changed)
+
+    async def run(self, changes: abc.AsyncIterable[set[Path]], client: httpx.AsyncClient) -> None:
+        """
+        Sync each set of changed lockfiles as it arrives, until cancelled.
+
+        Changes arriving while a sync is in progress are queued for the following sync. A failed
+        sync is reported through the status rather than stopping the service. While any wheels are
+        missing, they are retried every `retry_interval` seconds even if no lockfile changes.
+        """
+        async with asyncio.TaskGroup() as tg:
+            tg.create_task(self._collect(changes))
+            while True:
+                timeout = self.retry_interval if self.failed else None
+                with contextlib.suppress(TimeoutError):
+                    await asyncio.wait_for(self._changed.wait(), timeout)
+                await asyncio.sleep(self.debounce)
+                self._changed.clear()
+                batch, self._pending = self._pending, set()
+                self.status.pending = 0
+
+                if batch:
+                    print(f"Syncing {len(batch)} changed lockfile(s)")
+                else:
+                    print(f"Retrying {len(self.failed)} missing wheel(s)")
+                try:
+                    await self.sync(batch, client)
+                except Exception as e:
+                    self.status.last_error = _describe_error(e)
+                    print(f"Sync failed: {self.status.last_error}")
@@ -0,0 +1,248 @@
+import json
+import os
+import threading
+import typing as t
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from wheely_bucket.materialize import LinkMode, file_sha256, materialize
+from wheely_bucket.parse_lockfile import WB_CACHE_BASE
+
+DEFAULT_WHEEL_STORE_DIR = WB_CACHE_BASE / "store"
+
+
+@dataclass(slots=True)
+class GCSummary:
+    """Tally of the references & objects removed by a wheel store garbage collection."""
+
+    stale_refs: int = 0
+    removed: int = 0
+    freed_bytes: int = 0
+
+    def report(self) -> str:
+        """Summarize the garbage collection run."""
+        return (
+            f"Dropped {self.stale_refs} stale reference(s), removed {self.removed} wheel(s), "
+            f"freed {self.freed_bytes / (1024 * 1024):.1f} MiB"
+        )
+
+
+@dataclass(slots=True)
+class WheelStore:
+    """
+    Content-addressed store of wheels, keyed by SHA256 digest, shared across destination buckets.
+
+    Wheels are stored once under `objects/`, and each bucket's copy is a link into the store made
+    using `link_mode`. The bucket paths referencing each wheel are recorded in `refs.json`, which
+    `collect_garbage` uses to remove wheels no longer referenced by any bucket.
+
+    Several runs may share a store at once, so `save` merges this run's references into those
+    written by other runs since the store was loaded rather than overwriting them.
+    """
+
+    root: Path = DEFAULT_WHEEL_STORE_DIR
+    link_mode: LinkMode = LinkMode.HARDLINK
+    refs: dict[str, list[str]] = field(default_factory=dict)
+    hits: int = 0
+    added: int = 0
+    _dropped: dict[str, set[str]] = field(default_factory=dict, init=False, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+
+    @property
+    def _refs_path(self) -> Path:
+        return self.root / "refs.json"
+
+    @staticmethod
+    def _read_refs(refs_path: Path) -> dict[str, list[str]]:
+        try:
+            refs: dict[str, list[str]] = json.loads(refs_path.read_bytes())
+        except (FileNotFoundError, json.JSONDecodeError):
+            refs = {}
+
+        return refs
+
+    @classmethod
+    def load(
+        cls, root: Path = DEFAULT_WHEEL_STORE_DIR, link_mode: LinkMode = LinkMode.HARDLINK
+    ) -> t.Self:
+        """Load the store at the provided root; missing or corrupt references are reset."""
+        return cls(root=root, link_mode=link_mode, refs=cls._read_refs(root / "refs.json"))
+
+    def save(self) -> None:
+        """
+        Merge the store's references with those currently on disk & atomically write them back.
+
+        References added by other runs since the store was loaded are kept, while those dropped by
+        `collect_garbage` are not written back.
+        """
+        self.root.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            merged = self._read_refs(self._refs_path)
+            for sha256, bucket_refs in self.refs.items():
+                merged_refs = merged.setdefault(sha256, [])
+                merged_refs.extend(r for r in bucket_refs if r not in merged_refs)
+
+            for sha256, dropped in self._dropped.items():
+                if sha256 in merged:
+                    merged[sha256] = [r for r in merged[sha256] if r not in dropped]
+
+            self.refs = {sha256: refs for sha256, refs in merged.items() if refs}
+            self._dropped.clear()
+
+            # Unique per process so concurrent saves don't write to the same temporary file
+            tmp_path = self._tmp_path(self._refs_path)
+            tmp_path.write_text(json.dumps(self.refs))
+            tmp_path.replace(self._refs_path)
+
+    def object_path(self, sha256: str) -> Path:
+        """Build the path the wheel with the provided SHA256 digest is stored at."""
+        return self.root / "objects" / sha256[:2] / sha256
+
+    def _add_ref(self, sha256: str, filepath: Path) -> None:
+        ref = str(filepath.resolve())
+        # Wheels are placed from worker threads, so the check & append must not interleave
+        with self._lock:
+            bucket_refs = self.refs.setdefault(sha256, [])
+            if ref not in bucket_refs:
+                bucket_refs.append(ref)
+
+    def _tmp_path(self, filepath: Path) -> Path:
+        # Unique per thread so concurrent placements of the same wheel don't collide
+        return filepath.with_name(f"{filepath.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+    def link(self, sha256: str, dest_filepath: Path, size: int | None = None) -> bool:
+        """
+        Atomically place the stored wheel with the provided SHA256 digest at the destination path.
+
+        If the wheel isn't in the store, or its size doesn't match the expected size, the
+        destination is left untouched and `False` is returned.
+        """
+        obj = self.object_path(sha256)
+        try:
+            obj_size = obj.stat().st_size
+        except FileNotFoundError:
+            return False
+
+        if size is not None and obj_size != size:
+            return False
+
+        tmp_path = self._tmp_path(dest_filepath)
+        materialize(obj, tmp_path, self.link_mode)
+        tmp_path.replace(dest_filepath)
+        self._add_ref(sha256, dest_filepath)
+        self.hits += 1
+        return True
+
+    def add(self, filepath: Path, sha256: str | None = None, verified: bool = False) -> str | None:
+        """
+        Record the wheel at the provided path as a reference to its stored copy, storing it if new.
+
+        The wheel is hardlinked into the store where possible, so adopting a bucket's wheels does
+        not duplicate any data. Unless `verified` is `True`, the wheel is hashed before being added
+        and is skipped if its digest doesn't match `sha256`; if `sha256` is `None` the computed
+        digest is used. If the wheel is already stored, the bucket's copy is deduplicated against
+        the stored object instead.
+
+        Returns the wheel's SHA256 digest, or `None` if it was not added.
+        """
+        if sha256 is not None and self.object_path(sha256).exists():
+            return self._adopt(filepath, sha256, verified)
+
+        if not verified or sha256 is None:
+            digest = file_sha256(filepath)
+            if sha256 is not None and digest != sha256:
+                return None
+            sha256 = digest
+
+        obj = self.object_path(sha256)
+        if not obj.exists():
+            obj.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self._tmp_path(obj)
+            # Regardless of `link_mode`, which only governs how stored wheels are placed into
+            # buckets, the stored object must own its data: a symlink back into the bucket would
+            # dangle once the bucket's wheel is removed, so a hardlink (or copy) is always used
+            materialize(filepath, tmp_path, LinkMode.HARDLINK)
+            tmp_path.replace(obj)
+            self.added += 1
+
+        self._add_ref(sha256, filepath)
+        return sha256
+
+    def _adopt(self, filepath: Path, sha256: str, verified: bool) -> str | None:
+        """
+        Record the bucket wheel as a reference to the already stored wheel with the same digest.
+
+        Unless the bucket wheel is already linked to the stored object, its size & (unless
+        `verified`) digest are checked against it, then it is atomically replaced by a link to the
+        object using `link_mode` so the bucket doesn't hold a duplicate copy.
+        """
+        obj = self.object_path(sha256)
+        if not os.path.samefile(filepath, obj):
+            if filepath.stat().st_size != obj.stat().st_size:
+                return None
+            if not verified and file_sha256(filepath) != sha256:
+                return None
+
+            # Replacing one copy with another would only rewrite identical data
+            if self.link_mode != LinkMode.COPY:
+                tmp_path = self._tmp_path(filepath)
+                materialize(obj, tmp_path, self.link_mode)
+                tmp_path.replace(filepath)
+
+        self._add_ref(sha256, filepath)
+        return sha256
+
+    def _is_reference(self, ref: Path, obj: Path) -> bool:
+        """
+        Check whether the bucket path still refers to the stored object.
+
+        Linked wheels must share the stored object's file; wheels that had to be copied, e.g. across
+        filesystems, are only required to match its size.
+        """
+        try:
+            if os.path.samefile(ref, obj):
+                return True
+
+            return not ref.is_symlink() and ref.stat().st_size == obj.stat().st_size
+        except FileNotFoundError:
+            return False
+
+    def collect_garbage(self) -> GCSummary:
+        """
+        Drop stale bucket references & remove any stored wheels that are no longer referenced.
+
+        A reference is stale if the bucket path no longer exists or has been replaced by a different
+        file. Stored wheels without any recorded references are also removed, unless they are still
+        hardlinked elsewhere, e.g. into a bucket by a concurrent run that hasn't saved its
+        references yet.
+        """
+        summary = GCSummary()
+        for sha256, bucket_refs in list(self.refs.items()):
+            obj = self.object_path(sha256)
+            live = [r for r in bucket_refs if self._is_reference(Path(r), obj)]
+            summary.stale_refs += len(bucket_refs) - len(live)
+            self._dropped.setdefault(sha256, set()).update(set(bucket_refs).difference(live))
+            if live:
+                self.refs[sha256] = live
+            else:
+                del self.refs[sha256]
+
+        objects_dir = self.root / "objects"
+        if objects_dir.exists():
+            for obj in objects_dir.glob("*/*"):
+                if obj.name in self.refs or obj.suffix == ".tmp":
+                    continue
+
+                obj_stat = obj.stat()
+                if obj_stat.st_nlink > 1:
+                    continue
+
+                summary.freed_bytes += obj_stat.st_size
+                obj.unlink()
+                summary.removed += 1
+
+        return summary
+
+    def summary(self) -> str:
+        """Summarize the wheels reused from & added to the store during this run."""
+        return f"Wheel store: {self.hits} reused, {self.added} added"